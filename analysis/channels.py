@@ -1,7 +1,9 @@
 import pandas as pd
 import numpy as np
-from scipy.signal import find_peaks
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Union
+
+from market_data import MarketData, as_frame
+from .pivots import find_series_peaks
 
 def get_line_equation_from_points(points: np.ndarray) -> Optional[Dict[str, float]]:
     """Calculates the slope and intercept of a line given a set of points."""
@@ -17,8 +19,13 @@ class PriceChannels:
     وحدة تحليل القنوات السعرية المتقدمة
     Uses a more robust pivot-based method instead of simple linear regression.
     """
-    def __init__(self, df: pd.DataFrame, config: dict = None, timeframe: str = '1h'):
-        self.df = df.copy()
+    @classmethod
+    def required_indicators(cls, config: dict = None) -> List[str]:
+        """Channels are fitted to raw price pivots only."""
+        return []
+
+    def __init__(self, df: Union[pd.DataFrame, MarketData], config: dict = None, timeframe: str = '1h'):
+        self.df = as_frame(df)
         if config is None: config = {}
         self.config = config
 
@@ -34,15 +41,15 @@ class PriceChannels:
 
         data = self.df.tail(self.lookback)
 
-        prominence = data['close'].std() * 0.5
-        high_pivots_idx, _ = find_peaks(data['high'], prominence=prominence, distance=3)
-        low_pivots_idx, _ = find_peaks(-data['low'], prominence=prominence, distance=3)
+        prominence = data['Close'].std() * 0.5
+        high_pivots_idx = find_series_peaks(self.df['High'], prominence=prominence, distance=3, window=len(data))
+        low_pivots_idx = find_series_peaks(-self.df['Low'], prominence=prominence, distance=3, window=len(data))
 
         if len(high_pivots_idx) < 2 or len(low_pivots_idx) < 2:
              return {'error': 'Not enough pivots to form a channel.', 'total_score': 0}
 
-        high_points = np.array([[i, data['high'].iloc[i]] for i in high_pivots_idx])
-        low_points = np.array([[i, data['low'].iloc[i]] for i in low_pivots_idx])
+        high_points = np.array([[i, data['High'].iloc[i]] for i in high_pivots_idx])
+        low_points = np.array([[i, data['Low'].iloc[i]] for i in low_pivots_idx])
 
         upper_line = get_line_equation_from_points(high_points)
         lower_line = get_line_equation_from_points(low_points)
@@ -69,7 +76,7 @@ class PriceChannels:
         else: channel_type = "قناة عرضية"
 
         score = 0
-        current_price = data['close'].iloc[-1]
+        current_price = data['Close'].iloc[-1]
         if current_price < current_lower: score = 1
         if current_price > current_upper: score = -1
 
@@ -1,17 +1,24 @@
 import pandas as pd
-from typing import Dict
+from typing import Dict, List, Union
+
+from market_data import MarketData, as_frame
 
 # Import the refactored, modular components
 from .patterns.utils import get_pivots
-from .patterns import check_all_patterns
+from .patterns import check_all_patterns, required_indicators
 
 class ClassicPatterns:
     """
     This class serves as a wrapper for the modular pattern analysis system.
     It orchestrates fetching pivots and running all configured pattern checks.
     """
-    def __init__(self, df: pd.DataFrame, config: dict = None, timeframe: str = '1h'):
-        self.df = df
+    @classmethod
+    def required_indicators(cls, config: dict = None) -> List[str]:
+        """Indicator columns read by the pattern checkers."""
+        return required_indicators(config or {})
+
+    def __init__(self, df: Union[pd.DataFrame, MarketData], config: dict = None, timeframe: str = '1h'):
+        self.df = as_frame(df)
         if config is None: config = {}
         self.config = config
 
@@ -32,7 +39,7 @@ class ClassicPatterns:
             return {'error': 'Not enough data for pattern analysis.', 'pattern_score': 0, 'found_patterns': []}
 
         # 1. Get pivot points using the utility function
-        highs, lows = get_pivots(self.data)
+        highs, lows = get_pivots(self.df, window=self.lookback_period)
         if not highs or not lows:
             return {'error': 'Could not determine pivots.', 'pattern_score': 0, 'found_patterns': []}
 
@@ -1,14 +1,21 @@
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Optional
-from scipy.signal import find_peaks
+from typing import Dict, List, Optional, Union
+
+from market_data import MarketData, as_frame
+from .pivots import find_series_peaks
 
 class FibonacciAnalysis:
     """
     وحدة تحليل فيبوناتشي المتقدمة
     """
-    def __init__(self, df: pd.DataFrame, config: dict = None, timeframe: str = '1h'):
-        self.df = df.copy()
+    @classmethod
+    def required_indicators(cls, config: dict = None) -> List[str]:
+        """The ATR column used to scale the swing-pivot prominence."""
+        return [f"ATRr_{(config or {}).get('ATR_PERIOD', 14)}"]
+
+    def __init__(self, df: Union[pd.DataFrame, MarketData], config: dict = None, timeframe: str = '1h'):
+        self.df = as_frame(df)
         if config is None: config = {}
 
         overrides = config.get('TIMEFRAME_OVERRIDES', {}).get(timeframe, {})
@@ -41,8 +48,8 @@ class FibonacciAnalysis:
 
         # 2. Find all pivot points with increased distance to filter out noise
         distance = 10
-        high_pivots_idx, _ = find_peaks(self.data['High'], prominence=prominence, distance=distance)
-        low_pivots_idx, _ = find_peaks(-self.data['Low'], prominence=prominence, distance=distance)
+        high_pivots_idx = find_series_peaks(self.df['High'], prominence=prominence, distance=distance, window=len(self.data))
+        low_pivots_idx = find_series_peaks(-self.df['Low'], prominence=prominence, distance=distance, window=len(self.data))
 
         if high_pivots_idx.size < 1 or low_pivots_idx.size < 1:
             return {}
@@ -7,8 +7,16 @@ from .bull_flag import check_bull_flag
 from .bear_flag import check_bear_flag
 from .falling_wedge import check_falling_wedge
 from .rising_wedge import check_rising_wedge
+from .utils import confidence_indicator_columns
 # Import other pattern checkers here as they are created
 
+def required_indicators(config: dict) -> List[str]:
+    """
+    Indicator columns the pattern checkers read. They only use indicators to score the
+    confidence of a match, so this is the confidence scorer's dependency list.
+    """
+    return confidence_indicator_columns(config)
+
 def check_all_patterns(df: pd.DataFrame, config: dict, highs: List[Dict], lows: List[Dict], current_price: float, price_tolerance: float) -> List[Dict]:
     """
     Runs all individual pattern checkers and aggregates the results.
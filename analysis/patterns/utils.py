@@ -1,7 +1,12 @@
 import numpy as np
 import pandas as pd
-from scipy.signal import find_peaks
-from typing import Dict, List
+from typing import Dict, List, Optional
+
+from ..pivots import find_series_peaks
+
+def confidence_indicator_columns(config: dict) -> List[str]:
+    """The indicator columns calculate_dynamic_confidence reads (Volume is a raw column)."""
+    return [f"ADX_{config.get('ADX_PERIOD', 14)}", f"RSI_{config.get('RSI_PERIOD', 14)}"]
 
 def calculate_dynamic_confidence(df: pd.DataFrame, config: dict, base_confidence: int, is_bullish: bool) -> int:
     """
@@ -45,11 +50,16 @@ def calculate_dynamic_confidence(df: pd.DataFrame, config: dict, base_confidence
 
     return min(confidence, 98)
 
-def find_pivots(data_series: pd.Series, prominence_multiplier: float, distance: int) -> List[Dict]:
+def find_pivots(data_series: pd.Series, prominence_multiplier: float, distance: int, window: Optional[int] = None) -> List[Dict]:
     """
     A generic function to find pivot points (highs or lows) in any given data series.
-    To find lows, pass a negated series (-data_series).
+    To find lows, pass a negated series (-data_series). With `window`, only the last
+    `window` rows are searched (indices are relative to them), reusing the pivot index
+    of the full series.
     """
+    full_series = data_series
+    if window is not None:
+        data_series = data_series.iloc[-window:]
     if data_series.empty or len(data_series) < distance:
         return []
 
@@ -68,19 +78,20 @@ def find_pivots(data_series: pd.Series, prominence_multiplier: float, distance:
     if np.isnan(prominence) or prominence == 0:
         return []
 
-    pivots_idx, _ = find_peaks(data_series, prominence=prominence, distance=distance)
+    pivots_idx = find_series_peaks(full_series, prominence=prominence, distance=distance, window=len(data_series))
 
     return [{'index': i, 'value': data_series.iloc[i]} for i in pivots_idx]
 
-def get_price_pivots(data: pd.DataFrame, prominence_multiplier=0.8, distance=5) -> (List[Dict], List[Dict]):
+def get_price_pivots(data: pd.DataFrame, prominence_multiplier=0.8, distance=5, window: Optional[int] = None) -> (List[Dict], List[Dict]):
     """
-    Finds high and low pivot points specifically for price data (High and Low series).
+    Finds high and low pivot points specifically for price data (High and Low series),
+    optionally in the last `window` rows only.
     """
     if data.empty or 'High' not in data.columns or 'Low' not in data.columns:
         return [], []
 
-    highs = find_pivots(data['High'], prominence_multiplier, distance)
-    lows = find_pivots(-data['Low'], prominence_multiplier, distance)
+    highs = find_pivots(data['High'], prominence_multiplier, distance, window)
+    lows = find_pivots(-data['Low'], prominence_multiplier, distance, window)
 
     for low in lows:
         low['value'] = -low['value']
@@ -90,8 +101,8 @@ def get_price_pivots(data: pd.DataFrame, prominence_multiplier=0.8, distance=5)
 
     return highs, lows
 
-def get_pivots(data: pd.DataFrame, prominence_multiplier=0.8) -> (List[Dict], List[Dict]):
-    return get_price_pivots(data, prominence_multiplier)
+def get_pivots(data: pd.DataFrame, prominence_multiplier=0.8, window: Optional[int] = None) -> (List[Dict], List[Dict]):
+    return get_price_pivots(data, prominence_multiplier, window=window)
 
 def find_trend_line(x_coords: List[int], y_coords: List[float]) -> Dict[str, float]:
     """
@@ -0,0 +1,96 @@
+import hashlib
+import math
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy.signal import find_peaks, peak_prominences
+
+from bounded_cache import BoundedCache
+
+try:
+    # The compiled distance filter find_peaks itself uses
+    from scipy.signal._peak_finding_utils import _select_by_peak_distance
+except ImportError:
+    def _select_by_peak_distance(peaks: np.ndarray, priority: np.ndarray, distance: float) -> np.ndarray:
+        keep = np.ones(len(peaks), dtype=bool)
+        distance = math.ceil(distance)
+        for j in np.argsort(priority)[::-1]:
+            if not keep[j]:
+                continue
+            k = j - 1
+            while k >= 0 and peaks[j] - peaks[k] < distance:
+                keep[k] = False
+                k -= 1
+            k = j + 1
+            while k < len(peaks) and peaks[k] - peaks[j] < distance:
+                keep[k] = False
+                k += 1
+        return keep
+
+class PivotIndex:
+    """
+    Every peak candidate of one series with what is needed to derive its prominence inside
+    any trailing window, so find_peaks(series[-window:], prominence=..., distance=...) can be
+    answered for many thresholds and windows from one scan of the series.
+
+    The right-hand side of a peak's prominence does not depend on a trailing window. The
+    left-hand minimum only changes when the window starts after the peak's full-series left
+    base, and it then becomes the minimum from the window start to the peak.
+    """
+    def __init__(self, values: np.ndarray):
+        self.values = np.ascontiguousarray(values, dtype=np.float64)
+        self.peaks, properties = find_peaks(self.values, plateau_size=1)
+        self.left_edges = properties['left_edges']
+        _, self.left_bases, right_bases = peak_prominences(self.values, self.peaks)
+        self.left_min = self.values[self.left_bases]
+        self.right_min = self.values[right_bases]
+        self._windows: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+
+    def _window(self, start: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Peaks (absolute positions) of values[start:] and their prominences within it."""
+        if start not in self._windows:
+            # A plateau touching the window's first row is not a peak inside the window
+            inside = self.left_edges > start
+            peaks = self.peaks[inside]
+            left_min = self.left_min[inside]
+            cut = self.left_bases[inside] < start
+            if cut.any():
+                running_min = np.minimum.accumulate(self.values[start:])
+                left_min = np.where(cut, running_min[peaks - start], left_min)
+            self._windows[start] = (peaks, self.values[peaks] - np.maximum(left_min, self.right_min[inside]))
+        return self._windows[start]
+
+    def find(self, prominence: float, distance: Optional[float] = None, window: Optional[int] = None) -> np.ndarray:
+        """
+        Same result as find_peaks(values[-window:], prominence=prominence, distance=distance)[0]:
+        positions relative to the start of the window (the whole series if window is None).
+        """
+        start = 0 if window is None else max(len(self.values) - window, 0)
+        peaks, prominences = self._window(start)
+        keep = np.ones(len(peaks), dtype=bool)
+        if distance is not None and len(peaks):
+            keep = _select_by_peak_distance(peaks, self.values[peaks], distance).astype(bool)
+        keep &= prominences >= prominence
+        return peaks[keep] - start
+
+# Pivot indexes keyed by the content of the series they cover, so every module analysing
+# the same candles shares one scan; new candles change the key.
+_pivot_indexes = BoundedCache(max_entries=256)
+
+def get_pivot_index(series) -> PivotIndex:
+    """Returns the (memoized) PivotIndex of a Series or array; pass a negated series for lows."""
+    values = np.ascontiguousarray(series.to_numpy() if isinstance(series, pd.Series) else series, dtype=np.float64)
+    key = (len(values), hashlib.blake2b(values.tobytes(), digest_size=16).digest())
+    index = _pivot_indexes.get(key)
+    if index is None:
+        index = PivotIndex(values)
+        _pivot_indexes.set(key, index)
+    return index
+
+def find_series_peaks(series, prominence: float, distance: Optional[float] = None, window: Optional[int] = None) -> np.ndarray:
+    """Shared-index equivalent of find_peaks(series[-window:], prominence=..., distance=...)[0]."""
+    return get_pivot_index(series).find(prominence, distance, window)
+
+def get_pivot_cache_stats() -> Dict:
+    return _pivot_indexes.get_stats()
@@ -1,15 +1,22 @@
 import pandas as pd
 import numpy as np
-from typing import Dict, List
-from scipy.signal import find_peaks
+from typing import Dict, List, Union
+
+from market_data import MarketData, as_frame
+from .pivots import find_series_peaks
 
 class SupportResistanceAnalysis:
     """
     وحدة تحليل الدعوم والمقاومة المتقدمة
     تحدد مناطق العرض والطلب وتوفر بيانات مفصلة للتقارير.
     """
-    def __init__(self, df: pd.DataFrame, config: dict = None, timeframe: str = '1h'):
-        self.df = df.copy()
+    @classmethod
+    def required_indicators(cls, config: dict = None) -> List[str]:
+        """Levels are found from raw prices and volume only."""
+        return []
+
+    def __init__(self, df: Union[pd.DataFrame, MarketData], config: dict = None, timeframe: str = '1h'):
+        self.df = as_frame(df)
         if config is None: config = {}
 
         # Get timeframe-specific overrides or default values
@@ -21,8 +28,8 @@ class SupportResistanceAnalysis:
         data = self.df.tail(self.lookback_period)
         if len(data) < 20: return {'supports': [], 'resistances': []}
 
-        resistance_indices, _ = find_peaks(data['high'], prominence=data['high'].std() * 0.5, distance=5)
-        support_indices, _ = find_peaks(-data['low'], prominence=data['low'].std() * 0.5, distance=5)
+        resistance_indices = find_series_peaks(self.df['high'], prominence=data['high'].std() * 0.5, distance=5, window=len(data))
+        support_indices = find_series_peaks(-self.df['low'], prominence=data['low'].std() * 0.5, distance=5, window=len(data))
 
         supports = [{'price': data['low'].iloc[i], 'volume': data['volume'].iloc[i]} for i in support_indices]
         resistances = [{'price': data['high'].iloc[i], 'volume': data['volume'].iloc[i]} for i in resistance_indices]
@@ -1,10 +1,25 @@
 import pandas as pd
-from typing import Dict, Any
+from typing import Dict, Any, List, Union
+
+from market_data import MarketData, as_frame
 from .divergence import detect_divergence
 
 class TechnicalIndicators:
-    def __init__(self, df: pd.DataFrame, config: dict = None):
-        self.df = df.copy()
+    @classmethod
+    def required_indicators(cls, config: dict = None) -> List[str]:
+        """Indicator columns read by get_comprehensive_analysis."""
+        config = config or {}
+        return [
+            f"RSI_{config.get('RSI_PERIOD', 14)}",
+            'MACD_12_26_9', 'MACDh_12_26_9', 'MACDs_12_26_9',
+            'BBL_20_2.0', 'BBU_20_2.0',
+            'STOCHk_14_3_3',
+            'OBV',
+            'SMA_50', 'SMA_200',
+        ]
+
+    def __init__(self, df: Union[pd.DataFrame, MarketData], config: dict = None, timeframe: str = '1h'):
+        self.df = as_frame(df)
         if config is None: config = {}
         self.config = config
         self.rsi_period = config.get('RSI_PERIOD', 14)
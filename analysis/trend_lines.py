@@ -1,6 +1,8 @@
 import pandas as pd
-from scipy.signal import find_peaks
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Union
+
+from market_data import MarketData, as_frame
+from .pivots import find_series_peaks
 
 def get_line_equation(p1: tuple, p2: tuple) -> Optional[Dict[str, float]]:
     """Calculates the slope and intercept of a line given two points."""
@@ -12,8 +14,13 @@ def get_line_equation(p1: tuple, p2: tuple) -> Optional[Dict[str, float]]:
     return {'slope': slope, 'intercept': intercept}
 
 class TrendLineAnalysis:
-    def __init__(self, df: pd.DataFrame, config: dict = None):
-        self.df = df.copy()
+    @classmethod
+    def required_indicators(cls, config: dict = None) -> List[str]:
+        """Trend lines are drawn from raw prices only."""
+        return []
+
+    def __init__(self, df: Union[pd.DataFrame, MarketData], config: dict = None, timeframe: str = '1h'):
+        self.df = as_frame(df)
         if config is None: config = {}
         self.config = config
         self.long_period = config.get('TREND_LONG_PERIOD', 100)
@@ -27,8 +34,8 @@ class TrendLineAnalysis:
             return {'uptrend': None, 'downtrend': None, 'price_position': 'N/A'}
 
         prominence = data['Close'].std() * 0.75
-        high_pivots_idx, _ = find_peaks(data['High'], prominence=prominence, distance=5)
-        low_pivots_idx, _ = find_peaks(-data['Low'], prominence=prominence, distance=5)
+        high_pivots_idx = find_series_peaks(self.df['High'], prominence=prominence, distance=5, window=len(data))
+        low_pivots_idx = find_series_peaks(-self.df['Low'], prominence=prominence, distance=5, window=len(data))
 
         uptrend_line, downtrend_line = None, None
 
@@ -1,9 +1,22 @@
 import pandas as pd
-from typing import Dict, Any
+from typing import Dict, Any, List, Union
+
+from market_data import MarketData, as_frame
 
 class TrendAnalysis:
-    def __init__(self, df: pd.DataFrame, config: dict = None):
-        self.df = df.copy()
+    @classmethod
+    def required_indicators(cls, config: dict = None) -> List[str]:
+        """EMA and ADX columns read by get_comprehensive_trends_analysis."""
+        config = config or {}
+        return [
+            f"EMA_{config.get('TREND_SHORT_PERIOD', 20)}",
+            f"EMA_{config.get('TREND_MEDIUM_PERIOD', 50)}",
+            f"EMA_{config.get('TREND_LONG_PERIOD', 100)}",
+            f"ADX_{config.get('ADX_PERIOD', 14)}",
+        ]
+
+    def __init__(self, df: Union[pd.DataFrame, MarketData], config: dict = None, timeframe: str = '1h'):
+        self.df = as_frame(df)
         if config is None: config = {}
         self.config = config
         # Using more descriptive names for periods based on their default values
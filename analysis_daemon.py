@@ -0,0 +1,114 @@
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from main_bot import ComprehensiveTradingBot
+from okx_data import OKXDataFetcher
+from run_bot import build_ranked_report, rank_opportunities, scan_watchlist
+
+logger = logging.getLogger(__name__)
+
+class AnalysisDaemon:
+    """
+    Keeps the analyses of a watchlist current in the background: a (symbol, timeframe) is
+    re-analysed only once its candle has closed, the other timeframes keep their cached
+    results, and every symbol has an up-to-date ranking. Reports built from the cache
+    need no analysis at request time.
+    """
+    def __init__(self, symbols: List[str], timeframes: List[str], config: dict, okx_fetcher: OKXDataFetcher):
+        self.symbols = list(symbols)
+        self.timeframes = list(timeframes)
+        self.config = config
+        self.okx_fetcher = okx_fetcher
+        # Wait a little past the close so OKX has confirmed the candle
+        self.settle_ms = int(config['analysis'].get('DAEMON_SETTLE_SECONDS', 3) * 1000)
+        self.max_sleep = config['analysis'].get('DAEMON_MAX_SLEEP_SECONDS', 30)
+        self._analysed_bar: Dict[Tuple[str, str], int] = {}
+        self._results: Dict[Tuple[str, str], dict] = {}
+        self._ranked: Dict[str, List[dict]] = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def _bar_bounds(self, timeframe: str, now_ms: int) -> Tuple[int, int]:
+        return self.okx_fetcher.bar_bounds(ComprehensiveTradingBot.okx_bar(timeframe), now_ms)
+
+    def _now_ms(self) -> int:
+        return int(self.okx_fetcher.clock() * 1000)
+
+    def due_jobs(self, now_ms: Optional[int] = None) -> List[Tuple[str, List[str]]]:
+        """(symbol, timeframes) whose latest closed candle has not been analysed yet."""
+        now_ms = self._now_ms() if now_ms is None else now_ms
+        bars = {tf: self._bar_bounds(tf, now_ms - self.settle_ms)[0] for tf in self.timeframes}
+        jobs = []
+        for symbol in self.symbols:
+            due = [tf for tf in self.timeframes if self._analysed_bar.get((symbol, tf)) != bars[tf]]
+            if due:
+                jobs.append((symbol, due))
+        return jobs
+
+    def refresh(self, now_ms: Optional[int] = None) -> int:
+        """Analyses every due (symbol, timeframe) and returns how many were run."""
+        now_ms = self._now_ms() if now_ms is None else now_ms
+        jobs = self.due_jobs(now_ms)
+        if not jobs:
+            return 0
+        bars = {tf: self._bar_bounds(tf, now_ms - self.settle_ms)[0] for tf in self.timeframes}
+        timeframes = dict(jobs)
+
+        def store(symbol: str, results: List[dict]):
+            with self._lock:
+                for tf, result in zip(timeframes[symbol], results):
+                    # Failures are retried at the next close; until then a previous success is kept
+                    self._analysed_bar[(symbol, tf)] = bars[tf]
+                    if result.get('success') or (symbol, tf) not in self._results:
+                        self._results[(symbol, tf)] = result
+                cached = [self._results[(symbol, tf)] for tf in self.timeframes if (symbol, tf) in self._results]
+                self._ranked[symbol] = rank_opportunities([r for r in cached if r.get('success')])
+
+        scan_watchlist(jobs, self.config, self.okx_fetcher, store)
+        return sum(len(tfs) for _, tfs in jobs)
+
+    def next_due_ms(self, now_ms: Optional[int] = None) -> int:
+        """When the next candle of any timeframe closes (plus the settle delay)."""
+        now_ms = self._now_ms() if now_ms is None else now_ms
+        return min(self._bar_bounds(tf, now_ms - self.settle_ms)[1] for tf in self.timeframes) + self.settle_ms
+
+    def run(self):
+        """Refreshes until stop(), sleeping until the next candle close in between."""
+        while not self._stop_event.is_set():
+            try:
+                analysed = self.refresh()
+                if analysed:
+                    logger.info(f"🔄 Re-analysed {analysed} symbol/timeframe pairs after candle closes.")
+            except Exception as e:
+                logger.error(f"❌ Scheduled analysis failed: {e}", exc_info=True)
+            # Capped so a replay clock running faster than real time is followed closely
+            delay = (self.next_due_ms() - self._now_ms()) / 1000
+            self._stop_event.wait(min(max(delay, 0.1), self.max_sleep))
+
+    def start(self):
+        self._thread = threading.Thread(target=self.run, name='analysis-daemon', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def ranked_results(self, symbol: str) -> List[dict]:
+        """The symbol's latest successful timeframe results, best first."""
+        with self._lock:
+            return list(self._ranked.get(symbol, []))
+
+    def report(self, symbol: str, analysis_type: str, timeframes: Optional[List[str]] = None) -> Optional[str]:
+        """
+        The final report for the given timeframes (default: all) from cached results, or None
+        if one of them has not been analysed yet and the caller should run the analysis itself.
+        """
+        timeframes = timeframes or self.timeframes
+        with self._lock:
+            if any((symbol, tf) not in self._results for tf in timeframes):
+                return None
+            results = [self._results[(symbol, tf)] for tf in timeframes]
+        return build_ranked_report(symbol, analysis_type, results)
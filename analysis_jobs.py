@@ -0,0 +1,67 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+class AnalysisJobQueue:
+    """
+    Runs analysis requests on a bounded worker pool so async handlers never block on them.
+    Identical requests that are already running share one job, and each chat may only
+    have `max_jobs_per_chat` requests outstanding; submit() returns None beyond that.
+    """
+    def __init__(self, max_workers: int = 2, max_jobs_per_chat: int = 1):
+        self.max_jobs_per_chat = max_jobs_per_chat
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='analysis-job')
+        self._inflight: Dict[Hashable, Future] = {}
+        self._chat_jobs: Dict[Hashable, int] = {}
+        # key -> chats waiting for that job
+        self._waiting: Dict[Hashable, List[Hashable]] = {}
+        self._lock = threading.Lock()
+        self.stats = {'submitted': 0, 'deduplicated': 0, 'rejected': 0, 'failed': 0}
+
+    def submit(self, chat_id: Hashable, key: Hashable, func: Callable[..., Any], *args) -> Optional[Future]:
+        """
+        Returns the Future of the job for `key`, starting func(*args) unless the same key is
+        already running, or None if the chat has reached its limit.
+        """
+        with self._lock:
+            if self._chat_jobs.get(chat_id, 0) >= self.max_jobs_per_chat:
+                self.stats['rejected'] += 1
+                return None
+            self._chat_jobs[chat_id] = self._chat_jobs.get(chat_id, 0) + 1
+            if key in self._inflight:
+                self.stats['deduplicated'] += 1
+                self._waiting[key].append(chat_id)
+                return self._inflight[key]
+            self.stats['submitted'] += 1
+            self._waiting[key] = [chat_id]
+            future = self._inflight[key] = self._executor.submit(self._run, key, func, *args)
+            return future
+
+    def _run(self, key: Hashable, func: Callable[..., Any], *args) -> Any:
+        try:
+            return func(*args)
+        except Exception:
+            with self._lock:
+                self.stats['failed'] += 1
+            raise
+        finally:
+            # Released before the Future resolves, so a waiting chat can submit again right away
+            with self._lock:
+                del self._inflight[key]
+                for chat_id in self._waiting.pop(key):
+                    remaining = self._chat_jobs[chat_id] - 1
+                    if remaining:
+                        self._chat_jobs[chat_id] = remaining
+                    else:
+                        del self._chat_jobs[chat_id]
+
+    def active_jobs(self, chat_id: Hashable) -> int:
+        with self._lock:
+            return self._chat_jobs.get(chat_id, 0)
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self.stats, 'running': len(self._inflight)}
+
+    def shutdown(self, wait: bool = False):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
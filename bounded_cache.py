@@ -0,0 +1,146 @@
+import logging
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+def estimate_size(value: Any) -> int:
+    """Bytes held by a cached value: the buffer size for NumPy arrays, a shallow estimate otherwise."""
+    nbytes = getattr(value, 'nbytes', None)
+    if nbytes is not None:
+        return int(nbytes)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(sys.getsizeof(v) for v in value.values())
+    return sys.getsizeof(value)
+
+class BoundedCache:
+    """
+    Thread-safe dict-like cache with a memory budget, LRU eviction and per-entry expiry.
+    Entries expire at an absolute time (e.g. the close of the candle they end with) or
+    after the default TTL; when the budget is exceeded the least recently used entries
+    are evicted. Hits, misses, evictions and expirations are counted in `stats`.
+    """
+    def __init__(self, max_bytes: Optional[int] = None, max_entries: Optional[int] = None,
+                 default_ttl: Optional[float] = None, sizeof: Callable[[Any], int] = estimate_size,
+                 clock: Callable[[], float] = time.time):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.sizeof = sizeof
+        self.clock = clock
+        self.current_bytes = 0
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0}
+        # key -> (value, size in bytes, expiry time or None)
+        self._entries: "OrderedDict[Hashable, Tuple[Any, int, Optional[float]]]" = OrderedDict()
+        self._lock = threading.RLock()
+
+    def _remove(self, key: Hashable):
+        _, size, _ = self._entries.pop(key)
+        self.current_bytes -= size
+
+    def _expired(self, key: Hashable, now: float) -> bool:
+        expires_at = self._entries[key][2]
+        if expires_at is not None and expires_at <= now:
+            self._remove(key)
+            self.stats['expirations'] += 1
+            return True
+        return False
+
+    def _purge_expired(self):
+        now = self.clock()
+        for key in [k for k, (_, _, expires_at) in self._entries.items() if expires_at is not None and expires_at <= now]:
+            self._remove(key)
+            self.stats['expirations'] += 1
+
+    def _over_budget(self) -> bool:
+        return ((self.max_bytes is not None and self.current_bytes > self.max_bytes)
+                or (self.max_entries is not None and len(self._entries) > self.max_entries))
+
+    def _enforce_budget(self, keep: Hashable):
+        if not self._over_budget():
+            return
+        self._purge_expired()
+        for key in list(self._entries):
+            if not self._over_budget():
+                break
+            if key == keep:
+                continue
+            self._remove(key)
+            self.stats['evictions'] += 1
+        if self._over_budget():
+            logger.warning(f"⚠️ Cache entry {keep} alone exceeds the cache budget ({self.current_bytes} bytes).")
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None, expires_at: Optional[float] = None):
+        """Stores a value; `expires_at` (absolute, clock time) wins over `ttl`, which wins over default_ttl."""
+        if expires_at is None:
+            ttl = self.default_ttl if ttl is None else ttl
+            expires_at = self.clock() + ttl if ttl is not None else None
+        size = self.sizeof(value)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size, expires_at)
+            self.current_bytes += size
+            self._enforce_budget(keep=key)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Returns the value and marks it as most recently used, or `default` if missing or expired."""
+        with self._lock:
+            if key not in self._entries or self._expired(key, self.clock()):
+                self.stats['misses'] += 1
+                return default
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return self._entries[key][0]
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            if key not in self._entries:
+                return default
+            value = self._entries[key][0]
+            self._remove(key)
+            return value
+
+    def items(self) -> List[Tuple[Hashable, Any]]:
+        """Returns a snapshot of the live entries without touching their LRU position or the stats."""
+        with self._lock:
+            self._purge_expired()
+            return [(key, value) for key, (value, _, _) in self._entries.items()]
+
+    def keys(self) -> List[Hashable]:
+        return [key for key, _ in self.items()]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Returns the hit/miss/eviction/expiration counters plus the current size."""
+        with self._lock:
+            return {**self.stats, 'entries': len(self._entries), 'bytes': self.current_bytes, 'max_bytes': self.max_bytes}
+
+    def __getitem__(self, key: Hashable) -> Any:
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: Hashable, value: Any):
+        self.set(key, value)
+
+    def __delitem__(self, key: Hashable):
+        with self._lock:
+            self._remove(key)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._entries and not self._expired(key, self.clock())
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
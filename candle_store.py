@@ -0,0 +1,126 @@
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Fixed-width on-disk record: one row per candle, 48 bytes, little-endian.
+CANDLE_DTYPE = np.dtype([
+    ('timestamp', '<i8'),
+    ('open', '<f8'),
+    ('high', '<f8'),
+    ('low', '<f8'),
+    ('close', '<f8'),
+    ('volume', '<f8'),
+])
+
+def empty_candles() -> np.ndarray:
+    """Returns an empty candle array with the store's record layout."""
+    return np.empty(0, dtype=CANDLE_DTYPE)
+
+def slice_by_time(candles: np.ndarray, start_ts: Optional[int] = None, end_ts: Optional[int] = None) -> np.ndarray:
+    """
+    Returns the candles whose timestamp lies in [start_ts, end_ts].
+    The input must be sorted by timestamp; the result is a view, not a copy.
+    """
+    timestamps = candles['timestamp']
+    lo = 0 if start_ts is None else int(np.searchsorted(timestamps, start_ts, side='left'))
+    hi = len(candles) if end_ts is None else int(np.searchsorted(timestamps, end_ts, side='right'))
+    return candles[lo:hi]
+
+class CandleStore:
+    """
+    Append-only on-disk candle store with one binary file per (instId, bar).
+    Each file is a flat sequence of CANDLE_DTYPE records sorted by timestamp,
+    so it can be memory-mapped and sliced by timestamp without parsing.
+    """
+    def __init__(self, root_dir: str = 'okx_data/candles'):
+        self.root_dir = Path(root_dir)
+        self._locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def _path(self, inst_id: str, bar: str) -> Path:
+        return self.root_dir / f"{inst_id}_{bar}.candles"
+
+    def _lock(self, inst_id: str, bar: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault((inst_id, bar), threading.Lock())
+
+    def _record_count(self, path: Path) -> int:
+        try:
+            return path.stat().st_size // CANDLE_DTYPE.itemsize
+        except FileNotFoundError:
+            return 0
+
+    def load(self, inst_id: str, bar: str) -> np.ndarray:
+        """
+        Memory-maps all stored candles for (inst_id, bar) read-only.
+        A trailing partial record (e.g. from an interrupted write) is ignored.
+        """
+        path = self._path(inst_id, bar)
+        count = self._record_count(path)
+        if count == 0:
+            return empty_candles()
+        return np.memmap(path, dtype=CANDLE_DTYPE, mode='r', shape=(count,))
+
+    def load_range(self, inst_id: str, bar: str, start_ts: Optional[int] = None, end_ts: Optional[int] = None) -> np.ndarray:
+        """Returns the stored candles in [start_ts, end_ts] as a memory-mapped view."""
+        return slice_by_time(self.load(inst_id, bar), start_ts, end_ts)
+
+    def last_timestamp(self, inst_id: str, bar: str) -> Optional[int]:
+        candles = self.load(inst_id, bar)
+        return int(candles['timestamp'][-1]) if len(candles) else None
+
+    def append(self, inst_id: str, bar: str, candles: np.ndarray) -> int:
+        """
+        Appends the candles that are newer than the last stored one.
+        The input must be sorted by timestamp. Returns the number of rows written.
+        """
+        with self._lock(inst_id, bar):
+            path = self._path(inst_id, bar)
+            count = self._record_count(path)
+            last_ts = self.last_timestamp(inst_id, bar)
+            new_rows = candles if last_ts is None else candles[candles['timestamp'] > last_ts]
+            if len(new_rows) == 0:
+                return 0
+
+            self.root_dir.mkdir(parents=True, exist_ok=True)
+            with open(path, 'ab') as f:
+                # Drop any partial record left behind by an interrupted write before appending.
+                f.truncate(count * CANDLE_DTYPE.itemsize)
+                f.write(np.ascontiguousarray(new_rows, dtype=CANDLE_DTYPE).tobytes())
+            return len(new_rows)
+
+    def _write_atomic(self, inst_id: str, bar: str, candles: np.ndarray):
+        self.root_dir.mkdir(parents=True, exist_ok=True)
+        path = self._path(inst_id, bar)
+        tmp_path = path.with_suffix('.tmp')
+        with open(tmp_path, 'wb') as f:
+            f.write(np.ascontiguousarray(candles, dtype=CANDLE_DTYPE).tobytes())
+        os.replace(tmp_path, path)
+
+    def rewrite(self, inst_id: str, bar: str, candles: np.ndarray):
+        """Atomically replaces the stored candles for (inst_id, bar)."""
+        with self._lock(inst_id, bar):
+            self._write_atomic(inst_id, bar, candles)
+            logger.info(f"💾 Rewrote candle store for {inst_id} ({bar}) with {len(candles)} candles.")
+
+    def merge(self, inst_id: str, bar: str, candles: np.ndarray) -> int:
+        """
+        Merges candles that may be older than the stored history (a backfill).
+        Unlike append this rewrites the file; stored rows win on duplicate
+        timestamps. Returns the number of rows added.
+        """
+        with self._lock(inst_id, bar):
+            existing = self.load(inst_id, bar)
+            combined = np.concatenate([np.asarray(existing), np.asarray(candles, dtype=CANDLE_DTYPE)])
+            _, first_idx = np.unique(combined['timestamp'], return_index=True)
+            merged = combined[first_idx]
+            added = len(merged) - len(existing)
+            if added > 0:
+                self._write_atomic(inst_id, bar, merged)
+            return added
@@ -34,12 +34,47 @@ EXCHANGE_CONFIG = {
 
 TELEGRAM_CONFIG = {
     'BOT_TOKEN': os.getenv('TELEGRAM_BOT_TOKEN', ''),
-    'CHAT_ID': os.getenv('TELEGRAM_CHAT_ID', '')
+    'CHAT_ID': os.getenv('TELEGRAM_CHAT_ID', ''),
+    # Analysis requests run on this many background workers; a chat may have this many pending
+    'ANALYSIS_WORKERS': 2,
+    'MAX_JOBS_PER_CHAT': 1,
+    # Send each timeframe's section as soon as it is analysed instead of one report at the end
+    'STREAM_REPORTS': True,
+    # Outbound rate limits of the Bot API (groups and channels have negative chat ids)
+    'PER_CHAT_INTERVAL_SECONDS': 1.0,
+    'GROUP_CHAT_INTERVAL_SECONDS': 3.0,
+    'GLOBAL_MESSAGES_PER_SECOND': 30
 }
 
 ANALYSIS_CONFIG = {
     # General
     'ATR_PERIOD': 14,
+    # Indicator backend: 'pandas_ta' (one df.ta call per indicator) or 'fused' (single NumPy pass;
+    # its Wilder smoothing is SMA-seeded, so the first RSI/ATR values differ from pandas_ta's)
+    'INDICATOR_ENGINE': 'pandas_ta',
+    # Compile the recursive indicator loops with numba when it is installed (NumPy otherwise)
+    'INDICATOR_JIT': True,
+    # Fused engine only: rescans extend each (symbol, timeframe)'s indicators by the newly closed
+    # candles instead of recomputing the window (recursive indicators then run on from the first scan)
+    'STREAMING_INDICATORS': True,
+    # Analysis modules to run; only the indicators these modules declare are computed
+    'ENABLED_MODULES': ['indicators', 'trends', 'trend_lines', 'channels', 'support_resistance', 'fibonacci', 'patterns'],
+    # How the modules of one analysis run: 'serial', 'thread' or 'process' (shared-memory candles)
+    'MODULE_EXECUTOR': 'serial',
+    'MODULE_WORKERS': None,
+    # How the (symbol, timeframe) analyses run: 'thread' or 'process' (long-lived workers, shared-memory candles)
+    'TIMEFRAME_EXECUTOR': 'thread',
+    'TIMEFRAME_WORKERS': None,
+    # Watchlist scans: symbols fetched (and batch-prepared) together, batches fetched ahead of the
+    # analyses, and whether reports follow the watchlist order ('watchlist') or completion ('completed')
+    'SCAN_BATCH_SYMBOLS': 4,
+    'SCAN_MAX_PENDING_BATCHES': 2,
+    'SCAN_ORDER': 'watchlist',
+    # Telegram bot: keep the watchlist analysed in the background, re-running a timeframe only when
+    # its candle closes, so reports are served from cache. Settle delay after each close.
+    'ANALYSIS_DAEMON': False,
+    'DAEMON_SETTLE_SECONDS': 3,
+    'DAEMON_MAX_SLEEP_SECONDS': 30,
 
     # Trend Analysis
     'TREND_SHORT_PERIOD': 20,
@@ -77,6 +112,30 @@ ANALYSIS_CONFIG = {
     }
 }
 
+DATA_CONFIG = {
+    # 'okx' for live data, 'replay' to serve recorded files from REPLAY_DIR without network access
+    'DATA_SOURCE': 'okx',
+    'REPLAY_DIR': 'okx_data',
+    # Replay clock speed relative to real time (0 freezes it for deterministic runs)
+    'REPLAY_SPEED': 1.0,
+    # Build 5m/15m/30m/1H/4H/1D candles locally from the finest requested bar when possible
+    'RESAMPLE_LOCALLY': True,
+    # Largest number of base candles to download for local resampling (deeper windows are fetched natively);
+    # capped at what one paged fetch can return (okx_rest_client.max_candles_per_fetch)
+    'MAX_RESAMPLE_BASE_CANDLES': 6000,
+    # Most requests a delta fetch may take to catch up after a downtime; further behind, the window is fetched afresh
+    'MAX_DELTA_REQUESTS': 100,
+    # Memory budget of the in-process candle cache (least recently used entries are evicted)
+    'CACHE_MAX_BYTES': 256 * 1024 * 1024,
+    # Live ticker snapshots kept in memory, and how long one stays valid without an update
+    'PRICE_CACHE_MAX_ENTRIES': 500,
+    'PRICE_CACHE_TTL_SECONDS': 60,
+    # OKX bars streamed over the WebSocket candle channels, so re-analyses need no REST calls
+    'LIVE_CANDLE_BARS': ['3m', '5m', '15m', '30m', '1H', '4H', '1D'],
+    # Most recent live candles kept per (symbol, bar)
+    'LIVE_CANDLE_BUFFER': 500,
+}
+
 WATCHLIST = [
     'BTC/USDT', 'ETH/USDT', 'SOL/USDT', 'XRP/USDT', 'DOGE/USDT',
     'ADA/USDT', 'AVAX/USDT', 'DOT/USDT', 'BNB/USDT', 'MATIC/USDT'
@@ -97,6 +156,7 @@ def get_config():
         'exchange': EXCHANGE_CONFIG,
         'telegram': TELEGRAM_CONFIG,
         'analysis': ANALYSIS_CONFIG,
+        'data': DATA_CONFIG,
         'watchlist': WATCHLIST,
         'output': OUTPUT_CONFIG
     }
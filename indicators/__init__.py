@@ -2,36 +2,71 @@
 This package contains individual modules for calculating various technical indicators.
 """
 import pandas as pd
+from typing import Iterable, Optional
 
-from .moving_averages import calculate_sma, calculate_ema
-from .rsi import calculate_rsi
-from .macd import calculate_macd
-from .bbands import calculate_bbands
-from .stoch import calculate_stoch
-from .atr import calculate_atr
-from .obv import calculate_obv
-from .adx import calculate_adx
+from .fused import apply_fused_indicators
+from .batch import apply_batch_indicators
+from .planner import DEFAULT_SPECS, plan_indicators, warmup_bars
+from .streaming import StreamingIndicators, IndicatorStateBook
 
-def apply_all_indicators(df: pd.DataFrame):
+# The per-indicator modules are thin wrappers around pandas_ta, which is only
+# needed by the 'pandas_ta' engine.
+try:
+    from .moving_averages import calculate_sma, calculate_ema
+    from .rsi import calculate_rsi
+    from .macd import calculate_macd
+    from .bbands import calculate_bbands
+    from .stoch import calculate_stoch
+    from .atr import calculate_atr
+    from .obv import calculate_obv
+    from .adx import calculate_adx
+    HAS_PANDAS_TA = True
+except ImportError:
+    HAS_PANDAS_TA = False
+
+INDICATOR_ENGINES = ('pandas_ta', 'fused')
+
+def _apply_pandas_ta_spec(df: pd.DataFrame, group: str, *params):
+    if group == 'SMA':
+        calculate_sma(df, lengths=list(params))
+    elif group == 'EMA':
+        calculate_ema(df, lengths=list(params))
+    elif group == 'RSI':
+        calculate_rsi(df, *params)
+    elif group == 'MACD':
+        calculate_macd(df, *params)
+    elif group == 'BBANDS':
+        calculate_bbands(df, *params)
+    elif group == 'STOCH':
+        calculate_stoch(df, *params)
+    elif group == 'ATR':
+        calculate_atr(df, *params)
+    elif group == 'OBV':
+        calculate_obv(df)
+    elif group == 'ADX':
+        calculate_adx(df, *params)
+
+def apply_all_indicators(df: pd.DataFrame, engine: str = 'pandas_ta', columns: Optional[Iterable[str]] = None):
     """
-    Applies all technical indicators to the given DataFrame.
-    This function calls the individual calculation function for each indicator.
+    Applies the technical indicators to the given DataFrame.
+    With the 'pandas_ta' engine this calls the individual calculation function for each
+    indicator; the 'fused' engine computes the same columns in one NumPy pass.
 
     :param df: The DataFrame with financial data (must include High, Low, Open, Close, Volume).
+    :param engine: 'pandas_ta' or 'fused'.
+    :param columns: Only compute the indicators producing these columns (see indicators.planner);
+                    every indicator is computed when omitted.
     """
-    # Note: The functions modify the DataFrame in-place.
+    if engine not in INDICATOR_ENGINES:
+        raise ValueError(f"Unknown indicator engine '{engine}', expected one of {INDICATOR_ENGINES}.")
+    specs = DEFAULT_SPECS if columns is None else plan_indicators(columns)
+    if engine == 'fused':
+        return apply_fused_indicators(df, specs)
+    if not HAS_PANDAS_TA:
+        raise ImportError("The 'pandas_ta' indicator engine requires the pandas_ta package.")
 
-    # Moving Averages
-    calculate_sma(df, lengths=[20, 50, 200])
-    calculate_ema(df, lengths=[20, 50, 100])
-
-    # Oscillators and other indicators
-    calculate_rsi(df)
-    calculate_macd(df)
-    calculate_bbands(df)
-    calculate_stoch(df)
-    calculate_atr(df)
-    calculate_obv(df)
-    calculate_adx(df)
+    # Note: The functions modify the DataFrame in-place.
+    for spec in specs:
+        _apply_pandas_ta_spec(df, *spec)
 
     return df
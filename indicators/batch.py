@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+from .fused import compute_selected
+from .planner import DEFAULT_SPECS, plan_indicators
+
+PRICE_COLUMNS = ('Open', 'High', 'Low', 'Close', 'Volume')
+
+def stack_frames(frames: Mapping[str, pd.DataFrame]) -> Tuple[List[str], Dict[str, np.ndarray]]:
+    """
+    Stacks the OHLCV columns of several symbols into (symbols x time) float64 matrices.
+    Rows are aligned on their last candle and shorter histories are left-padded with NaN,
+    so every symbol's indicators come out exactly as if it had been computed on its own.
+    """
+    symbols = list(frames)
+    width = max((len(frame) for frame in frames.values()), default=0)
+    matrices = {name: np.full((len(symbols), width), np.nan) for name in PRICE_COLUMNS}
+    for row, symbol in enumerate(symbols):
+        frame = frames[symbol]
+        for name in PRICE_COLUMNS:
+            matrices[name][row, width - len(frame):] = frame[name].to_numpy(dtype=np.float64)
+    return symbols, matrices
+
+def apply_batch_indicators(frames: Mapping[str, pd.DataFrame], columns: Optional[Iterable[str]] = None) -> Dict[str, pd.DataFrame]:
+    """
+    Computes the indicators of every symbol of one timeframe at once with the fused engine.
+    Each kernel runs once over the whole (symbols x time) matrix instead of once per symbol.
+
+    :param frames: symbol -> OHLCV DataFrame (Open, High, Low, Close, Volume columns).
+    :param columns: Only compute the indicators producing these columns; all of them when omitted.
+    :return: symbol -> DataFrame with the OHLCV and indicator columns, as apply_all_indicators
+             would return it. All frames are views into one shared block, so treat them as read-only.
+    """
+    symbols, matrices = stack_frames(frames)
+    specs = DEFAULT_SPECS if columns is None else plan_indicators(columns)
+    results = compute_selected(matrices['High'], matrices['Low'], matrices['Close'], matrices['Volume'], specs)
+
+    names = list(PRICE_COLUMNS) + list(results)
+    width = next(iter(matrices.values())).shape[1] if symbols else 0
+    # (symbols x columns x time): each symbol's slice is one column-major 2-D block for pandas.
+    block = np.empty((len(symbols), len(names), width))
+    for position, values in enumerate([*(matrices[name] for name in PRICE_COLUMNS), *results.values()]):
+        block[:, position, :] = values
+
+    return {
+        symbol: pd.DataFrame(block[row, :, width - len(frames[symbol]):].T, index=frames[symbol].index,
+                             columns=names, copy=False)
+        for row, symbol in enumerate(symbols)
+    }
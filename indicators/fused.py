@@ -0,0 +1,223 @@
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.signal import lfilter
+from typing import Callable, Dict, Iterable, List, Optional
+
+from . import jit
+from .planner import DEFAULT_SPECS, IndicatorSpec
+
+def _lag(values: np.ndarray) -> np.ndarray:
+    """The previous row along the time (last) axis, NaN for the first one."""
+    return np.concatenate((np.full(values.shape[:-1] + (1,), np.nan), values[..., :-1]), axis=-1)
+
+def _first_valid(values: np.ndarray) -> np.ndarray:
+    """Index of the first non-NaN value along the time axis (the length if there is none)."""
+    valid = ~np.isnan(values)
+    return np.where(valid.any(axis=-1), valid.argmax(axis=-1), values.shape[-1])
+
+def _smoothed(values: np.ndarray, length: int, alpha: float) -> np.ndarray:
+    """
+    Exponential smoothing seeded with the SMA of the first `length` valid values
+    (the TA-Lib / Wilder convention). Leading NaNs are skipped; the recursion itself
+    runs in C through lfilter, or in a compiled loop when the Numba kernels are on. A 2-D
+    input is smoothed row by row, so symbols whose history starts later (left-padded with
+    NaN) each get their own seed.
+    """
+    if jit.enabled() and values.size:
+        return jit.smoothed(values, length, alpha)
+    n = values.shape[-1]
+    first = _first_valid(values)
+    seed_end = first + length - 1
+    seeded = seed_end < n
+    out = np.full(values.shape, np.nan)
+    if not seeded.any():
+        return out
+    window = np.minimum(first[..., None] + np.arange(length), n - 1)
+    seed = np.take_along_axis(values, window, axis=-1).mean(axis=-1)
+
+    # Feed the recursion zeros up to the seed row and seed / alpha on it, so it lands on the
+    # seed there and continues from it; rows without enough data are masked out below.
+    steps = np.arange(n)
+    seed_row = np.where(seeded, seed_end, n)[..., None]
+    drive = np.where(steps > seed_row, values, 0.0)
+    np.put_along_axis(drive, np.minimum(seed_row, n - 1), np.where(seeded, seed / alpha, 0.0)[..., None], axis=-1)
+    smoothed = lfilter([alpha], [1, alpha - 1], drive, axis=-1)
+    return np.where(steps >= seed_row, smoothed, out)
+
+def ema(values: np.ndarray, length: int) -> np.ndarray:
+    return _smoothed(values, length, 2 / (length + 1))
+
+def rma(values: np.ndarray, length: int) -> np.ndarray:
+    """Wilder's moving average (alpha = 1 / length), as used by RSI, ATR and ADX."""
+    return _smoothed(values, length, 1 / length)
+
+def sma(values: np.ndarray, length: int) -> np.ndarray:
+    """Rolling mean from a cumulative sum; NaN until `length` valid values are available."""
+    n = values.shape[-1]
+    out = np.full(values.shape, np.nan)
+    if n < length:
+        return out
+    valid = ~np.isnan(values)
+    # Centre each row on its first value so the cumulative sum stays small for large prices.
+    first = np.minimum(_first_valid(values), n - 1)
+    base = np.take_along_axis(values, first[..., None], axis=-1)
+    base = np.where(np.isnan(base), 0.0, base)
+    zero = np.zeros(values.shape[:-1] + (1,))
+    csum = np.concatenate((zero, np.cumsum(np.where(valid, values - base, 0.0), axis=-1)), axis=-1)
+    count = np.concatenate((zero, np.cumsum(valid, axis=-1)), axis=-1)
+    full = count[..., length:] - count[..., :-length] == length
+    out[..., length - 1:] = np.where(full, (csum[..., length:] - csum[..., :-length]) / length + base, np.nan)
+    return out
+
+def _windows(values: np.ndarray, length: int) -> np.ndarray:
+    """Rolling windows over the time axis as a strided view (no copy); window i covers rows i..i + length - 1."""
+    return sliding_window_view(values, length, axis=-1)
+
+def _pad(values: np.ndarray, total: int) -> np.ndarray:
+    """Left-pads a rolling result with NaN so it lines up with the input rows."""
+    return np.concatenate((np.full(values.shape[:-1] + (total - values.shape[-1],), np.nan), values), axis=-1)
+
+def _true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray, shared: Dict) -> np.ndarray:
+    if 'true_range' not in shared:
+        prev_close = _lag(close)
+        true_range = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(prev_close - low)))
+        shared['true_range'] = np.where(np.isnan(prev_close), np.nan, true_range)
+    return shared['true_range']
+
+def _bbands(high, low, close, volume, shared, length: int, std: float) -> Dict[str, np.ndarray]:
+    n = close.shape[-1]
+    if n >= length:
+        windows = _windows(close, length)
+        mid = _pad(windows.mean(axis=-1), n)
+        dev = std * _pad(windows.std(axis=-1), n)
+    else:
+        mid = dev = np.full(close.shape, np.nan)
+    shared[('mean', length)] = mid
+    props = f'{length}_{std}'
+    lower, upper = mid - dev, mid + dev
+    band = upper - lower
+    band = np.where(band == 0, np.finfo(float).eps, band)
+    out = {f'BBL_{props}': lower, f'BBM_{props}': mid, f'BBU_{props}': upper}
+    with np.errstate(invalid='ignore', divide='ignore'):
+        out[f'BBB_{props}'] = 100 * band / mid
+        out[f'BBP_{props}'] = (close - lower) / band
+    return out
+
+def _sma(high, low, close, volume, shared, length: int) -> Dict[str, np.ndarray]:
+    mean = shared.get(('mean', length))
+    return {f'SMA_{length}': mean if mean is not None else sma(close, length)}
+
+def _ema(high, low, close, volume, shared, length: int) -> Dict[str, np.ndarray]:
+    if ('ema', length) not in shared:
+        shared[('ema', length)] = ema(close, length)
+    return {f'EMA_{length}': shared[('ema', length)]}
+
+def _rsi(high, low, close, volume, shared, length: int) -> Dict[str, np.ndarray]:
+    change = close - _lag(close)
+    gain = rma(np.where(change > 0, change, np.where(np.isnan(change), np.nan, 0.0)), length)
+    loss = rma(np.where(change < 0, -change, np.where(np.isnan(change), np.nan, 0.0)), length)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return {f'RSI_{length}': 100 * gain / (gain + loss)}
+
+def _macd(high, low, close, volume, shared, fast: int, slow: int, signal_length: int) -> Dict[str, np.ndarray]:
+    props = f'{fast}_{slow}_{signal_length}'
+    macd = _ema(high, low, close, volume, shared, fast)[f'EMA_{fast}'] - _ema(high, low, close, volume, shared, slow)[f'EMA_{slow}']
+    signal = ema(macd, signal_length)
+    return {f'MACD_{props}': macd, f'MACDh_{props}': macd - signal, f'MACDs_{props}': signal}
+
+def _stoch(high, low, close, volume, shared, k: int, d: int, smooth_k: int) -> Dict[str, np.ndarray]:
+    n = close.shape[-1]
+    props = f'{k}_{d}_{smooth_k}'
+    if n >= k:
+        lowest = _pad(_windows(low, k).min(axis=-1), n)
+        highest = _pad(_windows(high, k).max(axis=-1), n)
+        price_range = highest - lowest
+        raw_k = 100 * (close - lowest) / np.where(price_range == 0, np.finfo(float).eps, price_range)
+    else:
+        raw_k = np.full(close.shape, np.nan)
+    slow_k = sma(raw_k, smooth_k)
+    return {f'STOCHk_{props}': slow_k, f'STOCHd_{props}': sma(slow_k, d)}
+
+def _atr(high, low, close, volume, shared, length: int) -> Dict[str, np.ndarray]:
+    if ('atr', length) not in shared:
+        shared[('atr', length)] = rma(_true_range(high, low, close, shared), length)
+    return {f'ATRr_{length}': shared[('atr', length)]}
+
+def _obv(high, low, close, volume, shared) -> Dict[str, np.ndarray]:
+    if jit.enabled() and close.size:
+        return {'OBV': jit.obv(close, volume)}
+    prev_close = _lag(close)
+    direction = np.where(np.isnan(prev_close), 1.0, np.sign(close - prev_close))
+    obv = np.nancumsum(direction * volume, axis=-1)
+    return {'OBV': np.where(np.isnan(close), np.nan, obv)}
+
+def _adx(high, low, close, volume, shared, length: int) -> Dict[str, np.ndarray]:
+    atr = _atr(high, low, close, volume, shared, length)[f'ATRr_{length}']
+    up = high - _lag(high)
+    down = _lag(low) - low
+    missing = np.isnan(up) | np.isnan(down)
+    plus_dm = np.where(missing, np.nan, np.where((up > down) & (up > 0), up, 0.0))
+    minus_dm = np.where(missing, np.nan, np.where((down > up) & (down > 0), down, 0.0))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        dmp = 100 * rma(plus_dm, length) / atr
+        dmn = 100 * rma(minus_dm, length) / atr
+        dx = 100 * np.abs(dmp - dmn) / (dmp + dmn)
+    return {f'ADX_{length}': rma(dx, length), f'DMP_{length}': dmp, f'DMN_{length}': dmn}
+
+INDICATOR_GROUPS: Dict[str, Callable[..., Dict[str, np.ndarray]]] = {
+    'BBANDS': _bbands, 'SMA': _sma, 'EMA': _ema, 'RSI': _rsi, 'MACD': _macd,
+    'STOCH': _stoch, 'ATR': _atr, 'OBV': _obv, 'ADX': _adx,
+}
+
+def compute_selected(high: np.ndarray, low: np.ndarray, close: np.ndarray, volume: np.ndarray,
+                     specs: Iterable[IndicatorSpec]) -> Dict[str, np.ndarray]:
+    """
+    Computes only the given indicator specs over float64 arrays and returns them keyed by
+    the pandas_ta column names. Intermediate series (EMAs, the true range, ATR and the
+    Bollinger rolling mean) are shared between specs that need them.
+
+    Time runs along the last axis, so 2-D (symbols x time) inputs are computed for every
+    symbol at once; a symbol with a shorter history is left-padded with NaN.
+    """
+    shared: Dict = {}
+    out: Dict[str, np.ndarray] = {}
+    for group, *params in specs:
+        out.update(INDICATOR_GROUPS[group](high, low, close, volume, shared, *params))
+    return out
+
+def compute_indicators(high: np.ndarray, low: np.ndarray, close: np.ndarray, volume: np.ndarray,
+                       sma_lengths: List[int] = (20, 50, 200), ema_lengths: List[int] = (20, 50, 100),
+                       rsi_length: int = 14, macd_fast: int = 12, macd_slow: int = 26, macd_signal: int = 9,
+                       bb_length: int = 20, bb_std: float = 2.0, stoch_k: int = 14, stoch_d: int = 3,
+                       stoch_smooth_k: int = 3, atr_length: int = 14, adx_length: int = 14) -> Dict[str, np.ndarray]:
+    """
+    Computes the full indicator set in one pass over float64 arrays and returns it keyed
+    by the pandas_ta column names the analysis modules read. The true range is shared by
+    ATR and ADX, and the Bollinger window is shared with the SMA of the same length.
+    """
+    specs = [('BBANDS', bb_length, bb_std)]
+    specs += [('SMA', length) for length in sma_lengths]
+    specs += [('EMA', length) for length in ema_lengths]
+    specs += [('RSI', rsi_length), ('MACD', macd_fast, macd_slow, macd_signal),
+              ('STOCH', stoch_k, stoch_d, stoch_smooth_k), ('ATR', atr_length), ('OBV',), ('ADX', adx_length)]
+    return compute_selected(high, low, close, volume, specs)
+
+def apply_fused_indicators(df: pd.DataFrame, specs: Optional[Iterable[IndicatorSpec]] = None) -> pd.DataFrame:
+    """
+    Computes indicators with the fused NumPy engine and adds all columns to the
+    DataFrame in a single assignment.
+
+    :param df: The DataFrame with financial data (must include High, Low, Close, Volume).
+    :param specs: The indicator specs to compute (see indicators.planner); all of them by default.
+    """
+    columns = compute_selected(
+        df['High'].to_numpy(dtype=np.float64),
+        df['Low'].to_numpy(dtype=np.float64),
+        df['Close'].to_numpy(dtype=np.float64),
+        df['Volume'].to_numpy(dtype=np.float64),
+        DEFAULT_SPECS if specs is None else specs,
+    )
+    if columns:
+        df[list(columns)] = pd.DataFrame(columns, index=df.index)
+    return df
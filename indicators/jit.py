@@ -0,0 +1,114 @@
+"""
+Optional Numba kernels for the recursive indicator loops (EMA / Wilder smoothing and OBV).
+They are compiled when numba is installed and INDICATOR_JIT is on; otherwise the fused
+engine keeps its pure NumPy implementation. Compiled machine code is cached on disk
+(numba's cache=True), and warm_up() compiles or loads it in the background so the first
+analysis does not pay for the JIT.
+"""
+import logging
+import threading
+
+import numpy as np
+
+try:
+    import numba
+    HAS_NUMBA = True
+except ImportError:
+    numba = None
+    HAS_NUMBA = False
+
+logger = logging.getLogger(__name__)
+
+_enabled = HAS_NUMBA
+_warm = threading.Event()
+
+def _smoothed_rows(values, length, alpha):
+    """Row-wise EMA/RMA seeded with the mean of the first `length` valid values (see fused._smoothed)."""
+    rows, n = values.shape
+    out = np.full((rows, n), np.nan)
+    for row in range(rows):
+        first = 0
+        while first < n and np.isnan(values[row, first]):
+            first += 1
+        if first + length > n:
+            continue
+        seed = values[row, first:first + length].mean()
+        out[row, first + length - 1] = seed
+        previous = seed
+        for t in range(first + length, n):
+            previous = alpha * values[row, t] + (1 - alpha) * previous
+            out[row, t] = previous
+    return out
+
+def _obv_rows(close, volume):
+    """Row-wise on-balance volume; NaN where there is no close (see fused._obv)."""
+    rows, n = close.shape
+    out = np.full((rows, n), np.nan)
+    for row in range(rows):
+        total = 0.0
+        previous = np.nan
+        for t in range(n):
+            price = close[row, t]
+            if np.isnan(price):
+                previous = price
+                continue
+            if np.isnan(previous) or price > previous:
+                direction = 1.0
+            elif price < previous:
+                direction = -1.0
+            else:
+                direction = 0.0
+            if not np.isnan(volume[row, t]):
+                total += direction * volume[row, t]
+            out[row, t] = total
+            previous = price
+    return out
+
+if HAS_NUMBA:
+    _smoothed_kernel = numba.njit(cache=True, nogil=True)(_smoothed_rows)
+    _obv_kernel = numba.njit(cache=True, nogil=True)(_obv_rows)
+else:
+    _smoothed_kernel = _obv_kernel = None
+
+def enabled() -> bool:
+    """True when the compiled kernels are available, switched on, and finished compiling."""
+    return _enabled and _warm.is_set()
+
+def configure(use_jit: bool = True, background: bool = True) -> bool:
+    """
+    Switches the Numba kernels on or off and compiles them (or loads them from the disk
+    cache). With background=True this happens in a daemon thread and the NumPy path is used
+    until it is done. Returns whether the kernels will be used.
+    """
+    global _enabled
+    _enabled = use_jit and HAS_NUMBA
+    if use_jit and not HAS_NUMBA:
+        logger.info("numba is not installed; indicators use the NumPy kernels.")
+    if _enabled and not _warm.is_set():
+        if background:
+            threading.Thread(target=warm_up, name='indicator-jit-warm-up', daemon=True).start()
+        else:
+            warm_up()
+    return _enabled
+
+def warm_up():
+    """Compiles every kernel for the float64 signatures the fused engine uses."""
+    if not HAS_NUMBA:
+        return
+    sample = np.array([[np.nan, 1.0, 2.0, 3.0]])
+    _smoothed_kernel(sample, 2, 0.5)
+    _obv_kernel(sample, sample)
+    _warm.set()
+    logger.info("✅ Numba indicator kernels ready.")
+
+def smoothed(values: np.ndarray, length: int, alpha: float) -> np.ndarray:
+    """Compiled counterpart of fused._smoothed for 1-D or 2-D (symbols x time) input."""
+    rows = np.ascontiguousarray(values, dtype=np.float64).reshape(-1, values.shape[-1])
+    return _smoothed_kernel(rows, length, alpha).reshape(values.shape)
+
+def obv(close: np.ndarray, volume: np.ndarray) -> np.ndarray:
+    """Compiled counterpart of the fused OBV for 1-D or 2-D (symbols x time) input."""
+    shape = close.shape
+    close = np.ascontiguousarray(close, dtype=np.float64).reshape(-1, shape[-1])
+    volume = np.ascontiguousarray(volume, dtype=np.float64).reshape(-1, shape[-1])
+    return _obv_kernel(close, volume).reshape(shape)
@@ -0,0 +1,71 @@
+import re
+from typing import Callable, Dict, Iterable, List, Tuple
+
+# One indicator computation: the group name followed by its parameters, e.g. ('MACD', 12, 26, 9).
+IndicatorSpec = Tuple
+
+# Groups in the order they are computed: Bollinger Bands come first so an SMA of the
+# same length can reuse their rolling mean.
+GROUP_ORDER = ('BBANDS', 'SMA', 'EMA', 'RSI', 'MACD', 'STOCH', 'ATR', 'OBV', 'ADX')
+
+# The full set apply_all_indicators computes when no columns are requested.
+DEFAULT_SPECS: List[IndicatorSpec] = [
+    ('BBANDS', 20, 2.0),
+    ('SMA', 20), ('SMA', 50), ('SMA', 200),
+    ('EMA', 20), ('EMA', 50), ('EMA', 100),
+    ('RSI', 14),
+    ('MACD', 12, 26, 9),
+    ('STOCH', 14, 3, 3),
+    ('ATR', 14),
+    ('OBV',),
+    ('ADX', 14),
+]
+
+# pandas_ta column name -> (group, parameter types)
+_COLUMN_PATTERNS: List[Tuple[re.Pattern, str, Tuple[Callable, ...]]] = [
+    (re.compile(r'SMA_(\d+)'), 'SMA', (int,)),
+    (re.compile(r'EMA_(\d+)'), 'EMA', (int,)),
+    (re.compile(r'RSI_(\d+)'), 'RSI', (int,)),
+    (re.compile(r'MACD[hs]?_(\d+)_(\d+)_(\d+)'), 'MACD', (int, int, int)),
+    (re.compile(r'BB[LMUBP]_(\d+)_(\d+(?:\.\d+)?)'), 'BBANDS', (int, float)),
+    (re.compile(r'STOCH[kd]_(\d+)_(\d+)_(\d+)'), 'STOCH', (int, int, int)),
+    (re.compile(r'ATRr_(\d+)'), 'ATR', (int,)),
+    (re.compile(r'OBV'), 'OBV', ()),
+    (re.compile(r'(?:ADX|DMP|DMN)_(\d+)'), 'ADX', (int,)),
+]
+
+# Rows before the first valid value of each group, given its parameters.
+_WARMUP: Dict[str, Callable[..., int]] = {
+    'SMA': lambda length: length - 1,
+    'EMA': lambda length: length - 1,
+    'RSI': lambda length: length,
+    'MACD': lambda fast, slow, signal: slow + signal - 2,
+    'BBANDS': lambda length, std: length - 1,
+    'STOCH': lambda k, d, smooth_k: k + smooth_k + d - 3,
+    'ATR': lambda length: length,
+    'OBV': lambda: 0,
+    'ADX': lambda length: 2 * length - 1,
+}
+
+def parse_indicator_column(column: str) -> IndicatorSpec:
+    """
+    Maps a pandas_ta column name (e.g. 'MACDh_12_26_9') to the spec that produces it
+    (('MACD', 12, 26, 9)). Raises ValueError for a column no engine computes.
+    """
+    for pattern, group, types in _COLUMN_PATTERNS:
+        match = pattern.fullmatch(column)
+        if match:
+            return (group, *(cast(value) for cast, value in zip(types, match.groups())))
+    raise ValueError(f"Unknown indicator column '{column}'.")
+
+def plan_indicators(columns: Iterable[str]) -> List[IndicatorSpec]:
+    """
+    Returns the specs needed to produce every requested column, each computed once and in
+    GROUP_ORDER. Columns of a multi-output indicator (e.g. MACD and its signal) share a spec.
+    """
+    specs = {parse_indicator_column(column) for column in columns}
+    return sorted(specs, key=lambda spec: (GROUP_ORDER.index(spec[0]), spec[1:]))
+
+def warmup_bars(specs: Iterable[IndicatorSpec]) -> int:
+    """Number of leading rows the slowest of the given specs needs before it has a value."""
+    return max((_WARMUP[group](*params) for group, *params in specs), default=0)
@@ -0,0 +1,340 @@
+import math
+import os
+import pickle
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+import pandas as pd
+
+NAN = float('nan')
+
+# One candle as consumed by the streaming indicators: (high, low, close, volume).
+Bar = Tuple[float, float, float, float]
+
+class EMA:
+    """
+    Exponential moving average seeded with the SMA of the first `length` values,
+    matching the fused engine. update() commits a closed value; preview() returns the
+    value a still-open bar would give without changing the state.
+    """
+    def __init__(self, length: int, alpha: Optional[float] = None):
+        self.length = length
+        self.alpha = 2 / (length + 1) if alpha is None else alpha
+        self.count = 0
+        self.seed_sum = 0.0
+        self.value = NAN
+
+    def _next(self, x: float) -> Tuple[int, float, float]:
+        if math.isnan(x):
+            return self.count, self.seed_sum, self.value
+        if self.count < self.length:
+            seed_sum = self.seed_sum + x
+            count = self.count + 1
+            return count, seed_sum, seed_sum / self.length if count == self.length else NAN
+        return self.count, self.seed_sum, self.alpha * x + (1 - self.alpha) * self.value
+
+    def update(self, x: float) -> float:
+        self.count, self.seed_sum, self.value = self._next(x)
+        return self.value
+
+    def preview(self, x: float) -> float:
+        return self._next(x)[2]
+
+class RMA(EMA):
+    """Wilder's moving average (alpha = 1 / length)."""
+    def __init__(self, length: int):
+        super().__init__(length, alpha=1 / length)
+
+class RollingWindow:
+    """
+    Last `length` values with running sums, for O(1) rolling mean and (population)
+    standard deviation. Values are stored relative to the first one seen to keep the
+    sum of squares well conditioned for large prices.
+    """
+    def __init__(self, length: int):
+        self.length = length
+        self.values = deque(maxlen=length)
+        self.reference = None
+        self.total = 0.0
+        self.total_sq = 0.0
+
+    def _sums_with(self, x: float) -> Tuple[int, float, float]:
+        d = x - (x if self.reference is None else self.reference)
+        total, total_sq, count = self.total + d, self.total_sq + d * d, len(self.values) + 1
+        if len(self.values) == self.length:
+            oldest = self.values[0]
+            total, total_sq, count = total - oldest, total_sq - oldest * oldest, self.length
+        return count, total, total_sq
+
+    def _stats(self, count: int, total: float, total_sq: float, x: float) -> Tuple[float, float]:
+        if count < self.length:
+            return NAN, NAN
+        reference = x if self.reference is None else self.reference
+        mean = total / count
+        return mean + reference, math.sqrt(max(total_sq / count - mean * mean, 0.0))
+
+    def update(self, x: float) -> Tuple[float, float]:
+        if self.reference is None:
+            self.reference = x
+        count, self.total, self.total_sq = self._sums_with(x)
+        self.values.append(x - self.reference)
+        return self._stats(count, self.total, self.total_sq, x)
+
+    def preview(self, x: float) -> Tuple[float, float]:
+        return self._stats(*self._sums_with(x), x)
+
+class RollingExtreme:
+    """Rolling min (or max) over `length` values with a monotonic deque: O(1) amortized."""
+    def __init__(self, length: int, mode: str = 'min'):
+        self.length = length
+        self.sign = 1 if mode == 'min' else -1
+        self.index = 0
+        self.candidates = deque()  # (index, signed value), increasing signed values
+
+    def _expired(self, index: int) -> bool:
+        return index < self.index - self.length
+
+    def update(self, x: float) -> float:
+        value = self.sign * x
+        while self.candidates and self.candidates[-1][1] >= value:
+            self.candidates.pop()
+        self.candidates.append((self.index, value))
+        self.index += 1
+        while self._expired(self.candidates[0][0]):
+            self.candidates.popleft()
+        return self.sign * self.candidates[0][1] if self.index >= self.length else NAN
+
+    def preview(self, x: float) -> float:
+        if self.index + 1 < self.length:
+            return NAN
+        value = self.sign * x
+        # The oldest index still in the window once x is added is self.index + 1 - length.
+        remaining = (v for i, v in self.candidates if i > self.index - self.length)
+        best = next(remaining, value)
+        return self.sign * min(best, value)
+
+class StreamingIndicators:
+    """
+    Incremental counterpart of indicators.fused.compute_indicators for one series.
+    update() consumes a closed candle in constant time and returns the latest value of
+    every column; preview() evaluates a still-open candle without changing the state.
+    """
+    def __init__(self, sma_lengths=(20, 50, 200), ema_lengths=(20, 50, 100), rsi_length: int = 14,
+                 macd_fast: int = 12, macd_slow: int = 26, macd_signal: int = 9, bb_length: int = 20,
+                 bb_std: float = 2.0, stoch_k: int = 14, stoch_d: int = 3, stoch_smooth_k: int = 3,
+                 atr_length: int = 14, adx_length: int = 14):
+        self.sma = {length: RollingWindow(length) for length in sma_lengths}
+        self.ema = {length: EMA(length) for length in ema_lengths}
+        self.rsi_length = rsi_length
+        self.rsi_gain, self.rsi_loss = RMA(rsi_length), RMA(rsi_length)
+        self.macd_props = f'{macd_fast}_{macd_slow}_{macd_signal}'
+        self.macd_fast, self.macd_slow, self.macd_signal = EMA(macd_fast), EMA(macd_slow), EMA(macd_signal)
+        self.bb_length, self.bb_std = bb_length, bb_std
+        self.bb = self.sma.get(bb_length) or RollingWindow(bb_length)
+        self.stoch_props = f'{stoch_k}_{stoch_d}_{stoch_smooth_k}'
+        self.stoch_low, self.stoch_high = RollingExtreme(stoch_k, 'min'), RollingExtreme(stoch_k, 'max')
+        self.stoch_smooth, self.stoch_signal = RollingWindow(stoch_smooth_k), RollingWindow(stoch_d)
+        self.atr_length, self.adx_length = atr_length, adx_length
+        self.atr = RMA(atr_length)
+        self.adx_atr = self.atr if adx_length == atr_length else RMA(adx_length)
+        self.plus_dm, self.minus_dm, self.adx = RMA(adx_length), RMA(adx_length), RMA(adx_length)
+        self.obv = 0.0
+        self.prev: Optional[Bar] = None
+        self.bars = 0
+        self.latest: Dict[str, float] = {}
+
+    def _step(self, bar: Bar, commit: bool) -> Dict[str, float]:
+        high, low, close, volume = bar
+        step = (lambda indicator, *x: indicator.update(*x)) if commit else (lambda indicator, *x: indicator.preview(*x))
+        out = {}
+
+        for length, window in self.sma.items():
+            out[f'SMA_{length}'] = step(window, close)[0]
+        for length, average in self.ema.items():
+            out[f'EMA_{length}'] = step(average, close)
+
+        prev_close = self.prev[2] if self.prev else NAN
+        change = close - prev_close
+        gain = step(self.rsi_gain, max(change, 0.0) if self.prev else NAN)
+        loss = step(self.rsi_loss, max(-change, 0.0) if self.prev else NAN)
+        out[f'RSI_{self.rsi_length}'] = 100 * gain / (gain + loss) if gain + loss else NAN
+
+        macd = step(self.macd_fast, close) - step(self.macd_slow, close)
+        signal = step(self.macd_signal, macd)
+        out[f'MACD_{self.macd_props}'] = macd
+        out[f'MACDh_{self.macd_props}'] = macd - signal
+        out[f'MACDs_{self.macd_props}'] = signal
+
+        if self.bb_length in self.sma:
+            # Shared window: re-read its standard deviation without stepping it twice.
+            mid, std = self.bb.preview(close) if not commit else self._bb_after_update(close)
+        else:
+            mid, std = step(self.bb, close)
+        bb_props = f'{self.bb_length}_{self.bb_std}'
+        lower, upper = mid - self.bb_std * std, mid + self.bb_std * std
+        band = (upper - lower) or 2.220446049250313e-16
+        out[f'BBL_{bb_props}'], out[f'BBM_{bb_props}'], out[f'BBU_{bb_props}'] = lower, mid, upper
+        out[f'BBB_{bb_props}'] = 100 * band / mid if mid else NAN
+        out[f'BBP_{bb_props}'] = (close - lower) / band
+
+        lowest, highest = step(self.stoch_low, low), step(self.stoch_high, high)
+        price_range = (highest - lowest) or 2.220446049250313e-16
+        raw_k = 100 * (close - lowest) / price_range
+        slow_k = step(self.stoch_smooth, raw_k)[0] if not math.isnan(raw_k) else NAN
+        slow_d = step(self.stoch_signal, slow_k)[0] if not math.isnan(slow_k) else NAN
+        out[f'STOCHk_{self.stoch_props}'], out[f'STOCHd_{self.stoch_props}'] = slow_k, slow_d
+
+        if self.prev:
+            true_range = max(high - low, abs(high - prev_close), abs(prev_close - low))
+            up, down = high - self.prev[0], self.prev[1] - low
+            plus = up if up > down and up > 0 else 0.0
+            minus = down if down > up and down > 0 else 0.0
+        else:
+            true_range = plus = minus = NAN
+        atr = step(self.atr, true_range)
+        adx_atr = atr if self.adx_atr is self.atr else step(self.adx_atr, true_range)
+        out[f'ATRr_{self.atr_length}'] = atr
+
+        obv = self.obv + (volume if not self.prev or close > prev_close else -volume if close < prev_close else 0.0)
+        out['OBV'] = obv
+
+        plus_avg, minus_avg = step(self.plus_dm, plus), step(self.minus_dm, minus)
+        dmp = 100 * plus_avg / adx_atr if adx_atr else NAN
+        dmn = 100 * minus_avg / adx_atr if adx_atr else NAN
+        dx = 100 * abs(dmp - dmn) / (dmp + dmn) if dmp + dmn else NAN
+        out[f'ADX_{self.adx_length}'] = step(self.adx, dx)
+        out[f'DMP_{self.adx_length}'], out[f'DMN_{self.adx_length}'] = dmp, dmn
+
+        if commit:
+            self.obv = obv
+            self.prev = bar
+            self.bars += 1
+            self.latest = out
+        return out
+
+    def _bb_after_update(self, close: float) -> Tuple[float, float]:
+        # The SMA loop has already pushed `close` into the shared window.
+        window = self.bb
+        return window._stats(len(window.values), window.total, window.total_sq, close)
+
+    def update(self, bar: Bar) -> Dict[str, float]:
+        """Consumes one closed candle and returns the latest value of every indicator column."""
+        return self._step(bar, commit=True)
+
+    def preview(self, bar: Bar) -> Dict[str, float]:
+        """Returns the indicator values for a still-open candle without consuming it."""
+        return self._step(bar, commit=False)
+
+    @property
+    def columns(self) -> List[str]:
+        """The indicator columns update() returns."""
+        return list(self.preview((0.0, 0.0, 0.0, 0.0)))
+
+def _bars(df: pd.DataFrame):
+    return df[['High', 'Low', 'Close', 'Volume']].itertuples(index=False, name=None)
+
+class IndicatorStateBook:
+    """
+    StreamingIndicators per (symbol, timeframe), remembering the timestamp of the last
+    consumed candle so only newly closed candles are fed in. States can be checkpointed
+    to `checkpoint_dir` and restored after a restart.
+    """
+    def __init__(self, checkpoint_dir: Optional[str] = None):
+        self.checkpoint_dir = Path(checkpoint_dir) if checkpoint_dir else None
+        self._states: Dict[Tuple[str, str], Tuple[StreamingIndicators, Optional[pd.Timestamp]]] = {}
+        # (symbol, timeframe) -> state and the Close plus indicator rows of the candles it consumed
+        self._frames: Dict[Tuple[str, str], Tuple[StreamingIndicators, pd.DataFrame]] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, symbol: str, timeframe: str) -> Path:
+        return self.checkpoint_dir / f"{symbol.replace('/', '-')}_{timeframe}.state"
+
+    def sync(self, symbol: str, timeframe: str, df: pd.DataFrame, last_closed: bool = True) -> Dict[str, float]:
+        """
+        Feeds the candles of `df` (High/Low/Close/Volume, indexed by time) that are newer than
+        the last consumed one and returns the latest indicator values. If last_closed is False
+        the final row is treated as a live bar and only previewed.
+        """
+        key = (symbol, timeframe)
+        with self._lock:
+            state, last_ts = self._states.get(key) or (self.load(symbol, timeframe) or (StreamingIndicators(), None))
+            closed = df if last_closed else df.iloc[:-1]
+            if last_ts is not None:
+                closed = closed[closed.index > last_ts]
+            latest = state.latest
+            for bar in _bars(closed):
+                latest = state.update(bar)
+            if len(closed):
+                last_ts = closed.index[-1]
+            self._states[key] = (state, last_ts)
+            if not last_closed and len(df) and (last_ts is None or df.index[-1] > last_ts):
+                latest = state.preview(tuple(df[['High', 'Low', 'Close', 'Volume']].iloc[-1]))
+            return latest
+
+    @staticmethod
+    def _lines_up(history: pd.DataFrame, closed: pd.DataFrame) -> bool:
+        """True if `closed` starts inside `history` and agrees with every candle they share."""
+        if history.empty or closed.empty or closed.index[0] < history.index[0]:
+            return False
+        shared = closed.index[closed.index <= history.index[-1]]
+        if not shared.isin(history.index).all():
+            return False
+        return np.array_equal(history.loc[shared, 'Close'].to_numpy(), closed.loc[shared, 'Close'].to_numpy())
+
+    def frame(self, symbol: str, timeframe: str, df: pd.DataFrame, last_closed: bool = True) -> pd.DataFrame:
+        """
+        Returns `df` with every indicator column, feeding only the candles that closed since
+        the previous call for (symbol, timeframe). If last_closed is False the final row is a
+        live bar and is only previewed.
+
+        The indicators run on over every candle consumed since the first call instead of
+        restarting where `df` starts, so once the window has moved on the recursive ones
+        (EMA, RSI, ATR, ADX) drift slightly from a full recompute of `df` and OBV is offset
+        by a constant. The series starts over whenever `df` no longer lines up with the
+        consumed candles (it starts earlier, or a stored close was corrected).
+        """
+        key = (symbol, timeframe)
+        closed = df if last_closed else df.iloc[:-1]
+        with self._lock:
+            state, history = self._frames.get(key) or (None, None)
+            if state is None or not self._lines_up(history, closed):
+                state = StreamingIndicators()
+                history = pd.DataFrame(columns=['Close', *state.columns], dtype=float)
+            new = closed if history.empty else closed[closed.index > history.index[-1]]
+            rows = [state.update(bar) for bar in _bars(new)]
+            if rows:
+                added = pd.DataFrame(rows, index=new.index, columns=state.columns)
+                added.insert(0, 'Close', new['Close'])
+                if not history.empty:
+                    # Rows before the window are never needed again
+                    added = pd.concat([history[history.index >= closed.index[0]], added])
+                history = added
+            self._frames[key] = (state, history)
+
+            indicators = history.drop(columns='Close').reindex(df.index)
+            if not last_closed and len(df) and (history.empty or df.index[-1] > history.index[-1]):
+                preview = state.preview(next(_bars(df.iloc[-1:])))
+                indicators.iloc[-1] = [preview[column] for column in indicators.columns]
+        return pd.concat([df, indicators], axis=1)
+
+    def save(self, symbol: str, timeframe: str):
+        """Atomically writes the state of (symbol, timeframe) to the checkpoint directory."""
+        if self.checkpoint_dir is None or (symbol, timeframe) not in self._states:
+            return
+        self.checkpoint_dir.mkdir(parents=True, exist_ok=True)
+        path = self._path(symbol, timeframe)
+        tmp_path = path.with_suffix('.tmp')
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(self._states[(symbol, timeframe)], f)
+        os.replace(tmp_path, path)
+
+    def load(self, symbol: str, timeframe: str) -> Optional[Tuple[StreamingIndicators, Optional[pd.Timestamp]]]:
+        """Reads a checkpointed state, or returns None if there is none."""
+        if self.checkpoint_dir is None or not self._path(symbol, timeframe).exists():
+            return None
+        with open(self._path(symbol, timeframe), 'rb') as f:
+            return pickle.load(f)
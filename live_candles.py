@@ -0,0 +1,92 @@
+import threading
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from candle_store import CANDLE_DTYPE
+
+class CandleRingBuffer:
+    """
+    Fixed-size ring buffer of the most recent candles of one (symbol, bar), fed by
+    the WebSocket candle channel. Updates to the bar in progress replace it in place;
+    a new bar is appended. The buffer only ever holds a gap-free run of bars: if a bar
+    is missed (e.g. during a reconnect) the older ones are dropped.
+    """
+    def __init__(self, bar_ms: int, capacity: int = 500):
+        self.bar_ms = bar_ms
+        self.capacity = capacity
+        self._candles = np.empty(capacity, dtype=CANDLE_DTYPE)
+        self._confirmed = np.zeros(capacity, dtype=bool)
+        self._start = 0
+        self._count = 0
+
+    def _last_index(self) -> int:
+        return (self._start + self._count - 1) % self.capacity
+
+    def update(self, candle: Tuple[int, float, float, float, float, float], confirmed: bool):
+        """Applies one pushed candle (timestamp, open, high, low, close, volume)."""
+        timestamp = candle[0]
+        if self._count:
+            last_ts = int(self._candles['timestamp'][self._last_index()])
+            if timestamp < last_ts:
+                return
+            if timestamp == last_ts:
+                self._candles[self._last_index()] = candle
+                self._confirmed[self._last_index()] |= confirmed
+                return
+            if timestamp != last_ts + self.bar_ms:
+                self._start, self._count = 0, 0
+
+        if self._count < self.capacity:
+            index = (self._start + self._count) % self.capacity
+            self._count += 1
+        else:
+            index = self._start
+            self._start = (self._start + 1) % self.capacity
+        self._candles[index] = candle
+        self._confirmed[index] = confirmed
+
+    def snapshot(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns a copy of the buffered candles in time order plus their confirmed mask."""
+        order = (self._start + np.arange(self._count)) % self.capacity
+        return self._candles[order], self._confirmed[order]
+
+    def __len__(self) -> int:
+        return self._count
+
+class LiveCandleBook:
+    """
+    Thread-safe collection of CandleRingBuffers keyed by (symbol, bar).
+    `bar_ms` maps each tracked OKX bar (e.g. '1m', '1H') to its length in milliseconds.
+    """
+    def __init__(self, bar_ms: Dict[str, int], capacity: int = 500):
+        self.bar_ms = bar_ms
+        self.capacity = capacity
+        self._buffers: Dict[Tuple[str, str], CandleRingBuffer] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def bars(self):
+        return list(self.bar_ms)
+
+    def update(self, symbol: str, bar: str, candle: Tuple[int, float, float, float, float, float], confirmed: bool):
+        """Applies one pushed candle; bars that are not tracked are ignored."""
+        if bar not in self.bar_ms:
+            return
+        with self._lock:
+            buffer = self._buffers.get((symbol, bar))
+            if buffer is None:
+                buffer = self._buffers[(symbol, bar)] = CandleRingBuffer(self.bar_ms[bar], self.capacity)
+            buffer.update(candle, confirmed)
+
+    def snapshot(self, symbol: str, bar: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """Returns (candles, confirmed) for (symbol, bar), or None if nothing was received yet."""
+        with self._lock:
+            buffer = self._buffers.get((symbol, bar))
+            if buffer is None or len(buffer) == 0:
+                return None
+            return buffer.snapshot()
+
+    def clear(self):
+        with self._lock:
+            self._buffers.clear()
@@ -2,7 +2,8 @@ import pandas as pd
 import ccxt
 from datetime import datetime, timedelta
 import warnings
-from typing import Dict, List
+from functools import partial
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 from analysis.technical_score import TechnicalIndicators
 from analysis.trends import TrendAnalysis
@@ -13,21 +14,70 @@ from analysis.fibonacci import FibonacciAnalysis
 from analysis.classic_patterns import ClassicPatterns
 from trade_management import TradeManagement
 from okx_data import OKXDataFetcher
-from indicators import apply_all_indicators
+from market_data import PRICE_COLUMNS, MarketData
+from module_executor import (GraphTask, SharedMarketData, SharedSpec, attach_market_data, get_executor, run_module,
+                             run_module_shared, run_task_graph)
+from indicators import (IndicatorStateBook, StreamingIndicators, apply_all_indicators, apply_batch_indicators,
+                        plan_indicators, warmup_bars)
 
 warnings.filterwarnings('ignore')
 
+class AnalysisSummary:
+    """
+    What ranking and the reports read from a finished analysis, without the candles,
+    so it is cheap to return from a worker process.
+    """
+    __slots__ = ('symbol', 'timeframe', 'final_recommendation', 'analysis_results')
+
+    def __init__(self, symbol: str, timeframe: str, final_recommendation: dict, analysis_results: dict):
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.final_recommendation = final_recommendation
+        self.analysis_results = analysis_results
+
 class ComprehensiveTradingBot:
+    # name -> (module class, analysis method); ANALYSIS_CONFIG['ENABLED_MODULES'] selects a subset.
+    ANALYSIS_MODULES = {
+        'indicators': (TechnicalIndicators, 'get_comprehensive_analysis'),
+        'trends': (TrendAnalysis, 'get_comprehensive_trends_analysis'),
+        'trend_lines': (TrendLineAnalysis, 'get_comprehensive_trend_lines_analysis'),
+        'channels': (PriceChannels, 'get_comprehensive_channel_analysis'),
+        'support_resistance': (SupportResistanceAnalysis, 'get_comprehensive_sr_analysis'),
+        'fibonacci': (FibonacciAnalysis, 'get_comprehensive_fibonacci_analysis'),
+        'patterns': (ClassicPatterns, 'get_comprehensive_patterns_analysis')
+    }
+    # Module results each decision stage reads; a stage starts as soon as these are in.
+    FINAL_RECOMMENDATION_INPUTS = ('indicators', 'trends', 'trend_lines', 'channels', 'support_resistance', 'fibonacci', 'patterns')
+    TRADE_PLAN_INPUTS = ('final_recommendation', 'support_resistance', 'patterns')
+
     def __init__(self, symbol: str, timeframe: str, config: dict, okx_fetcher: OKXDataFetcher):
         self.symbol = symbol.upper()
         self.timeframe = timeframe
         self.config = config
         self.okx_fetcher = okx_fetcher
+        # Live price snapshot used instead of the fetcher's cache when there is no fetcher (worker processes)
+        self.live_price = None
         self.df = None
         self.df_with_indicators = None
+        # Read-only view of df_with_indicators handed to every analysis module
+        self.market_data = None
         self.analysis_results = {}
         self.final_recommendation = {}
 
+    def _enabled_modules(self) -> Dict[str, Tuple[type, str]]:
+        enabled = self.config.get('analysis', {}).get('ENABLED_MODULES')
+        if enabled is None:
+            return dict(self.ANALYSIS_MODULES)
+        return {name: module for name, module in self.ANALYSIS_MODULES.items() if name in enabled}
+
+    def required_indicator_columns(self) -> Set[str]:
+        """The union of the indicator columns the enabled analysis modules declare."""
+        analysis_config = self.config.get('analysis', {})
+        columns = set()
+        for module_class, _ in self._enabled_modules().values():
+            columns.update(module_class.required_indicators(analysis_config))
+        return columns
+
     def _get_max_lookback_days(self) -> int:
         """
         Calculates the maximum lookback period in days required by any analysis module
@@ -45,7 +95,8 @@ class ComprehensiveTradingBot:
             analysis_config.get('TREND_LONG_PERIOD', 100) # Trend analysis also has a lookback
         ]
 
-        max_lookback_candles = max(lookbacks)
+        # The slowest planned indicator needs this many extra candles before its first value
+        max_lookback_candles = max(lookbacks) + warmup_bars(plan_indicators(self.required_indicator_columns()))
 
         # Convert max lookback in candles to days
         # This is an approximation, but it's better than a fixed period
@@ -61,45 +112,109 @@ class ComprehensiveTradingBot:
         else: # Default for weekly, etc.
             candles_per_day = 1.0/7.0
 
-        # Add a buffer of 10%
-        required_days = (max_lookback_candles / candles_per_day) * 1.1
+        required_days = max_lookback_candles / candles_per_day
 
         # Return integer number of days, with a minimum of 30
         return max(30, int(required_days))
 
-    def fetch_data(self) -> bool:
+    @staticmethod
+    def okx_bar(timeframe: str) -> str:
+        """The OKX bar string of a timeframe ('4h' -> '4H', '1d' -> '1D')."""
+        return timeframe.replace('d', 'D').replace('h', 'H')
+
+    def get_fetch_request(self) -> Tuple[str, str, int]:
+        """Returns the (OKX symbol, OKX bar, days) window this bot needs from OKXDataFetcher."""
         okx_symbol = self.symbol.replace('/', '-')
-        api_timeframe = self.timeframe.replace('d', 'D').replace('h', 'H')
+        api_timeframe = self.okx_bar(self.timeframe)
+        return okx_symbol, api_timeframe, self._get_max_lookback_days()
 
-        days_to_fetch = self._get_max_lookback_days()
+    def fetch_data(self) -> bool:
+        okx_symbol, api_timeframe, days_to_fetch = self.get_fetch_request()
 
         print(f"Fetching historical data for {okx_symbol} on timeframe {api_timeframe} ({days_to_fetch} days) via OKXDataFetcher...")
 
-        historical_data = self.okx_fetcher.fetch_historical_data(symbol=okx_symbol, timeframe=api_timeframe, days_to_fetch=days_to_fetch)
+        df = self.okx_fetcher.fetch_historical_frame(symbol=okx_symbol, timeframe=api_timeframe, days_to_fetch=days_to_fetch)
 
-        if not historical_data:
-            print(f"Error: Could not fetch historical data for {okx_symbol} on {timeframe}.")
+        if df.empty:
+            print(f"Error: Could not fetch historical data for {okx_symbol} on {api_timeframe}.")
             return False
 
-        df = pd.DataFrame(historical_data)
-        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-        df.set_index('timestamp', inplace=True)
         self.df = df.dropna()
         return True
 
+    def _price_frame(self) -> pd.DataFrame:
+        """The fetched candles with the column names the indicator modules expect."""
+        return self.df.rename(columns={"high": "High", "low": "Low", "open": "Open", "close": "Close", "volume": "Volume"}, errors='ignore')
+
     def _prepare_data_with_indicators(self):
         """
-        Calculates all necessary technical indicators once by calling the refactored indicator modules.
+        Calculates the indicators the enabled analysis modules need, once, by calling the
+        refactored indicator modules.
         """
         if self.df is None: return
 
-        # Create a copy to hold the indicators
-        self.df_with_indicators = self.df.copy()
-        # Rename columns for compatibility with indicator calculations
-        self.df_with_indicators.rename(columns={"high": "High", "low": "Low", "open": "Open", "close": "Close", "volume": "Volume"}, inplace=True, errors='ignore')
+        # Apply only the indicators the enabled modules declared
+        engine = self.config.get('analysis', {}).get('INDICATOR_ENGINE', 'pandas_ta')
+        self._set_indicator_frame(apply_all_indicators(self._price_frame(), engine=engine,
+                                                       columns=self.required_indicator_columns()))
+
+    def _prepare_streamed_indicators(self, state_book: IndicatorStateBook):
+        """Extends the indicators `state_book` keeps for this bot by the candles closed since the last scan."""
+        frame = self._price_frame()
+        bar_open, _ = self.okx_fetcher.bar_bounds(self.okx_bar(self.timeframe))
+        last_closed = frame.index[-1] < pd.Timestamp(bar_open, unit='ms')
+        self._set_indicator_frame(state_book.frame(self.symbol, self.timeframe, frame, last_closed=last_closed))
+
+    def _set_indicator_frame(self, frame: pd.DataFrame):
+        """Freezes the indicator frame into the read-only MarketData the modules share."""
+        self._set_market_data(MarketData.from_frame(frame))
+
+    def _set_market_data(self, data: MarketData):
+        self.market_data = data
+        self.df_with_indicators = data.frame
+
+    @classmethod
+    def from_market_data(cls, symbol: str, timeframe: str, config: dict, data: MarketData,
+                         live_price: Optional[dict] = None) -> 'ComprehensiveTradingBot':
+        """A bot over already prepared candles and indicators, with no fetcher attached."""
+        bot = cls(symbol=symbol, timeframe=timeframe, config=config, okx_fetcher=None)
+        bot.live_price = live_price
+        # The raw candles in the lowercase layout fetch_data produces
+        bot.df = data.frame[list(PRICE_COLUMNS)].rename(columns=str.lower)
+        bot._set_market_data(data)
+        return bot
+
+    def summary(self) -> AnalysisSummary:
+        return AnalysisSummary(self.symbol, self.timeframe, self.final_recommendation, self.analysis_results)
+
+    @classmethod
+    def prepare_batch(cls, bots: List['ComprehensiveTradingBot'], state_book: Optional[IndicatorStateBook] = None):
+        """
+        Calculates the indicators of many fetched bots together: bots on the same timeframe
+        using the fused engine share one batched computation over a (symbols x time) matrix.
+        Bots on the 'pandas_ta' engine are prepared one by one as usual.
 
-        # Apply all indicators from the new modular structure
-        self.df_with_indicators = apply_all_indicators(self.df_with_indicators)
+        With a state_book, fused-engine bots instead extend the indicators kept from their
+        previous scan by only the newly closed candles (see IndicatorStateBook.frame).
+        """
+        streamed_columns = set(StreamingIndicators().columns)
+        groups: Dict[str, List['ComprehensiveTradingBot']] = {}
+        for bot in bots:
+            if bot.df is None:
+                continue
+            if bot.config.get('analysis', {}).get('INDICATOR_ENGINE', 'pandas_ta') != 'fused':
+                bot._prepare_data_with_indicators()
+            elif state_book is not None and bot.okx_fetcher is not None and not bot.df.empty \
+                    and bot.required_indicator_columns() <= streamed_columns:
+                bot._prepare_streamed_indicators(state_book)
+            else:
+                groups.setdefault(bot.timeframe, []).append(bot)
+
+        for group in groups.values():
+            columns = set().union(*(bot.required_indicator_columns() for bot in group))
+            frames = apply_batch_indicators({index: bot._price_frame() for index, bot in enumerate(group)}, columns=columns)
+            for index, bot in enumerate(group):
+                bot._set_indicator_frame(frames[index])
 
     def run_all_analyses(self):
         # Ensure we have the dataframe with indicators before running analyses
@@ -107,23 +222,38 @@ class ComprehensiveTradingBot:
             self.analysis_results = {'error': "Indicator dataframe not prepared."}
             return
 
-        modules = {
-            'indicators': (TechnicalIndicators, 'get_comprehensive_analysis'),
-            'trends': (TrendAnalysis, 'get_comprehensive_trends_analysis'),
-            'trend_lines': (TrendLineAnalysis, 'get_comprehensive_trend_lines_analysis'),
-            'channels': (PriceChannels, 'get_comprehensive_channels_analysis'),
-            'support_resistance': (SupportResistanceAnalysis, 'get_comprehensive_sr_analysis'),
-            'fibonacci': (FibonacciAnalysis, 'get_comprehensive_fibonacci_analysis'),
-            'patterns': (ClassicPatterns, 'get_comprehensive_patterns_analysis')
-        }
+        self._run_analysis_graph(include_decisions=False)
+
+    def _store_result(self, name: str, result: Any):
+        if name in self.ANALYSIS_MODULES:
+            self.analysis_results[name] = result
+
+    def _run_analysis_graph(self, include_decisions: bool):
+        """
+        Runs the enabled modules with the configured executor ('serial', 'thread' or
+        'process') and, if requested, the recommendation and trade plan as soon as their
+        inputs are ready. A failing module only records an error for itself.
+        """
         analysis_config = self.config.get('analysis', {})
-        for name, (module_class, method_name) in modules.items():
-            try:
+        mode = analysis_config.get('MODULE_EXECUTOR', 'serial')
+        executor = get_executor(mode, analysis_config.get('MODULE_WORKERS'))
+        shared = SharedMarketData(self.market_data) if mode == 'process' else None
+        try:
+            tasks = {}
+            for name, (module_class, method_name) in self._enabled_modules().items():
                 # Pass the timeframe to the constructor of the analysis modules
-                instance = module_class(self.df_with_indicators, config=analysis_config, timeframe=self.timeframe)
-                self.analysis_results[name] = getattr(instance, method_name)()
-            except Exception as e:
-                self.analysis_results[name] = {'error': str(e)}
+                if shared is not None:
+                    func = partial(run_module_shared, shared.spec, module_class, method_name, analysis_config, self.timeframe)
+                else:
+                    func = partial(run_module, self.market_data, module_class, method_name, analysis_config, self.timeframe)
+                tasks[name] = GraphTask(func)
+            if include_decisions:
+                tasks['final_recommendation'] = GraphTask(self.calculate_final_recommendation, self.FINAL_RECOMMENDATION_INPUTS, local=True)
+                tasks['trade_management'] = GraphTask(self.run_trade_management_analysis, self.TRADE_PLAN_INPUTS, local=True)
+            run_task_graph(tasks, executor, on_result=self._store_result)
+        finally:
+            if shared is not None:
+                shared.close()
 
     def run_trade_management_analysis(self):
         try:
@@ -143,7 +273,7 @@ class ComprehensiveTradingBot:
         else: main_action, confidence = "بيع قوي 🔻", 95
 
         okx_symbol = self.symbol.replace('/', '-')
-        live_price_data = self.okx_fetcher.get_cached_price(okx_symbol)
+        live_price_data = self.okx_fetcher.get_cached_price(okx_symbol) if self.okx_fetcher is not None else self.live_price
         current_price = live_price_data['price'] if live_price_data else self.df['Close'].iloc[-1] if 'Close' in self.df.columns else self.df['close'].iloc[-1]
 
         # --- Resolve Contradictions ---
@@ -190,14 +320,37 @@ class ComprehensiveTradingBot:
         Runs the full analysis pipeline for the configured symbol and timeframe.
         """
         print(f"🚀 Running analysis for {self.symbol}...")
-        if not self.fetch_data():
-            raise ConnectionError(f"Failed to fetch data for {self.symbol}")
+        # Bots prepared by prepare_batch already hold their candles and indicators
+        if self.df_with_indicators is None:
+            if not self.fetch_data():
+                raise ConnectionError(f"Failed to fetch data for {self.symbol}")
 
-        # Prepare the data with all indicators
-        self._prepare_data_with_indicators()
+            # Prepare the data with all indicators
+            self._prepare_data_with_indicators()
 
-        # Run all analysis modules on the prepared data
-        self.run_all_analyses()
-        self.calculate_final_recommendation()
-        self.run_trade_management_analysis()
+        # Run all analysis modules on the prepared data, then the recommendation and trade plan
+        if self.df_with_indicators is None:
+            self.analysis_results = {'error': "Indicator dataframe not prepared."}
+            return
+        self._run_analysis_graph(include_decisions=True)
         print(f"✅ Analysis complete for {self.symbol}.")
+
+def warm_analysis_worker():
+    """
+    Process-pool initializer. Unpickling it imports this module, so pandas, scipy and every
+    analysis module are loaded once when the worker starts rather than by its first task.
+    """
+
+def analyse_shared_candles(spec: SharedSpec, symbol: str, timeframe: str, config: dict,
+                           live_price: Optional[dict] = None) -> AnalysisSummary:
+    """
+    Process-pool entry point: runs the complete analysis of one (symbol, timeframe) on the
+    shared-memory candles described by `spec` and returns only its summary. The modules run
+    serially inside the worker; the pool already spreads the analyses over the cores.
+    """
+    config = {**config, 'analysis': {**config.get('analysis', {}), 'MODULE_EXECUTOR': 'serial'}}
+    with attach_market_data(spec) as data:
+        bot = ComprehensiveTradingBot.from_market_data(symbol, timeframe, config, data, live_price)
+        bot.run_complete_analysis()
+        bot.final_recommendation['timeframe'] = timeframe
+        return bot.summary()
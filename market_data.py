@@ -0,0 +1,68 @@
+from typing import Dict, Iterator, Mapping, Union
+
+import numpy as np
+import pandas as pd
+
+PRICE_COLUMNS = ('Open', 'High', 'Low', 'Close', 'Volume')
+
+def _read_only(values: np.ndarray) -> np.ndarray:
+    """A read-only view of an array; the caller's array keeps its own flags."""
+    view = values.view()
+    view.flags.writeable = False
+    return view
+
+class MarketData:
+    """
+    Read-only, array-backed view of one (symbol, timeframe) candle window: the OHLCV
+    columns plus a map of indicator columns, all sharing the buffers they were built from.
+    Analysis modules receive the same instance instead of copying the frame. Every array
+    is flagged read-only, so a module that tries to write through it gets a ValueError
+    rather than silently changing what the other modules see.
+    """
+    def __init__(self, index: pd.Index, columns: Mapping[str, np.ndarray]):
+        self.index = index
+        self._columns: Dict[str, np.ndarray] = {name: _read_only(np.asarray(values)) for name, values in columns.items()}
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> 'MarketData':
+        """Wraps a DataFrame's columns without copying them (for single-dtype blocks)."""
+        return cls(df.index, {name: df[name].to_numpy() for name in df.columns})
+
+    @property
+    def columns(self):
+        return list(self._columns)
+
+    @property
+    def indicator_columns(self) -> Dict[str, np.ndarray]:
+        """Every column that is not one of the raw OHLCV columns."""
+        return {name: values for name, values in self._columns.items() if name not in PRICE_COLUMNS}
+
+    @property
+    def frame(self) -> pd.DataFrame:
+        """
+        A new shallow DataFrame over the same read-only arrays on every call. Writing a
+        value into it raises, while adding or dropping a column only changes the caller's
+        frame, so neither reaches the other modules.
+        """
+        return pd.DataFrame(self._columns, index=self.index, copy=False)
+
+    def tail(self, rows: int) -> 'MarketData':
+        """The last `rows` candles as views of the same arrays."""
+        start = max(len(self) - rows, 0)
+        return MarketData(self.index[start:], {name: values[start:] for name, values in self._columns.items()})
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self._columns[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._columns
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._columns)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+def as_frame(data: Union[pd.DataFrame, MarketData]) -> pd.DataFrame:
+    """The DataFrame an analysis module works on: a shallow frame over MarketData's arrays, or the frame itself, never a copy."""
+    return data.frame if isinstance(data, MarketData) else data
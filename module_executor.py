@@ -0,0 +1,165 @@
+import logging
+import multiprocessing
+import threading
+from contextlib import contextmanager
+from concurrent.futures import Executor, FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from market_data import MarketData
+
+logger = logging.getLogger(__name__)
+
+EXECUTOR_MODES = ('serial', 'thread', 'process')
+
+class GraphTask:
+    """
+    One node of an analysis run: `func` is called once every task named in `deps` has
+    finished. Local tasks run in the calling thread (they update the bot itself); the
+    others go to the executor, and a failure there is recorded as {'error': ...}.
+    """
+    def __init__(self, func: Callable[[], Any], deps: Iterable[str] = (), local: bool = False):
+        self.func = func
+        self.deps = tuple(deps)
+        self.local = local
+
+def run_task_graph(tasks: Dict[str, GraphTask], executor: Optional[Executor] = None,
+                   on_result: Optional[Callable[[str, Any], None]] = None) -> Dict[str, Any]:
+    """
+    Runs the tasks in dependency order, starting each as soon as its inputs are ready.
+    Without an executor everything runs serially in the calling thread. Dependencies on
+    names that are not in `tasks` (e.g. a disabled module) count as satisfied.
+    """
+    results: Dict[str, Any] = {}
+    pending = dict(tasks)
+    running: Dict[Any, str] = {}
+
+    def finish(name: str, result: Any):
+        results[name] = result
+        if on_result is not None:
+            on_result(name, result)
+
+    while pending or running:
+        ready = [name for name, task in pending.items()
+                 if all(dep in results or dep not in tasks for dep in task.deps)]
+        ran_inline = False
+        for name in ready:
+            task = pending.pop(name)
+            if executor is None or task.local:
+                finish(name, task.func())
+                ran_inline = True
+            else:
+                running[executor.submit(task.func)] = name
+        if ran_inline:
+            continue
+        if not running:
+            raise ValueError(f"Analysis tasks have circular dependencies: {sorted(pending)}")
+        done, _ = wait(running, return_when=FIRST_COMPLETED)
+        for future in done:
+            name = running.pop(future)
+            try:
+                finish(name, future.result())
+            except Exception as e:
+                finish(name, {'error': str(e)})
+    return results
+
+def run_module(data: MarketData, module_class: type, method_name: str, config: dict, timeframe: str) -> Any:
+    """Runs one analysis module; its errors are returned as {'error': ...} so they stay isolated."""
+    try:
+        instance = module_class(data, config=config, timeframe=timeframe)
+        return getattr(instance, method_name)()
+    except Exception as e:
+        return {'error': str(e)}
+
+# (shared memory block name, column names, index)
+SharedSpec = Tuple[str, List[str], pd.Index]
+
+class SharedMarketData:
+    """
+    Copies a MarketData's columns once into a shared-memory block so process workers can
+    map the same candles read-only instead of receiving a pickled frame per module.
+    Call close() (or use it as a context manager) once every worker is done.
+    """
+    def __init__(self, data: MarketData):
+        columns = data.columns
+        shape = (len(columns), len(data))
+        self._shm = shared_memory.SharedMemory(create=True, size=max(int(np.prod(shape)) * 8, 1))
+        block = np.ndarray(shape, dtype=np.float64, buffer=self._shm.buf)
+        for row, name in enumerate(columns):
+            block[row] = data[name]
+        del block
+        self.spec: SharedSpec = (self._shm.name, columns, data.index)
+
+    def close(self):
+        self._shm.close()
+        self._shm.unlink()
+
+    def __enter__(self) -> 'SharedMarketData':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    try:
+        # The parent owns the block; workers must not unlink it when they exit
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:  # Python < 3.13
+        return shared_memory.SharedMemory(name=name)
+
+@contextmanager
+def attach_market_data(spec: SharedSpec) -> Iterator[MarketData]:
+    """Maps the shared-memory candles described by `spec` as a MarketData for the duration of the block."""
+    name, columns, index = spec
+    shm = _attach(name)
+    block = np.ndarray((len(columns), len(index)), dtype=np.float64, buffer=shm.buf)
+    data = MarketData(index, {column: block[row] for row, column in enumerate(columns)})
+    try:
+        yield data
+    finally:
+        del data, block
+        try:
+            shm.close()
+        except BufferError:
+            # A result still references the mapping; it is released with the result
+            pass
+
+def run_module_shared(spec: SharedSpec, module_class: type, method_name: str, config: dict, timeframe: str) -> Any:
+    """Process-pool entry point: runs a module on the shared-memory candles described by `spec`."""
+    with attach_market_data(spec) as data:
+        return run_module(data, module_class, method_name, config, timeframe)
+
+_executors: Dict[Tuple, Executor] = {}
+_executors_lock = threading.Lock()
+
+def get_executor(mode: str, max_workers: Optional[int] = None,
+                 initializer: Optional[Callable] = None, initargs: Tuple = ()) -> Optional[Executor]:
+    """
+    Returns the shared pool for a mode ('serial' gives None). Pools are created once and
+    reused by every bot, so process workers are only started (and run `initializer`) on
+    the first analysis.
+    """
+    if mode not in EXECUTOR_MODES:
+        raise ValueError(f"Unknown module executor '{mode}', expected one of {EXECUTOR_MODES}.")
+    if mode == 'serial':
+        return None
+    with _executors_lock:
+        key = (mode, max_workers, initializer, initargs)
+        if key not in _executors:
+            if mode == 'thread':
+                _executors[key] = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='analysis-module',
+                                                     initializer=initializer, initargs=initargs)
+            else:
+                # spawn: forking a process that runs WebSocket and fetcher threads is unsafe
+                _executors[key] = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn'),
+                                                      initializer=initializer, initargs=initargs)
+        return _executors[key]
+
+def shutdown_executors():
+    with _executors_lock:
+        for executor in _executors.values():
+            executor.shutdown(wait=False, cancel_futures=True)
+        _executors.clear()
@@ -1,16 +1,22 @@
 #!/usr/bin/env python3
 import asyncio
-import requests
 import json
+import numpy as np
 import pandas as pd
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 import logging
 from pathlib import Path
 import time
 import threading
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ThreadPoolExecutor, Future
 from okx_websocket_client import OKXWebSocketClient
+from okx_rest_client import MAX_PAGE_REQUESTS, OKXRestClient, max_candles_per_fetch, requests_for_candles
+from candle_store import CandleStore, CANDLE_DTYPE, slice_by_time
+from resampler import can_resample, resample_candles, last_complete_open
+from bounded_cache import BoundedCache
+from live_candles import LiveCandleBook
+from replay_source import ReplayClock, ReplayRestClient, ReplayTickerStream, load_recordings, recording_end_ms
 
 # Based on the analysis of logs, some timeframes are not supported for all pairs.
 # This list can be expanded or fetched dynamically in a future improvement.
@@ -62,17 +68,63 @@ class OKXDataFetcher:
     Fetches historical and REST-based data from OKX.
     Manages the WebSocket client for live data.
     """
-    def __init__(self, data_dir: str = 'okx_data'):
+    def __init__(self, data_dir: str = 'okx_data', config: dict = None):
+        if config is None: config = {}
+        self.config = config
         self.base_url = 'https://www.okx.com'
         self.data_dir = Path(data_dir)
-        self.price_cache = {}
-        self.historical_cache = {}
+        # 'okx' talks to www.okx.com; 'replay' serves recorded files from REPLAY_DIR on a simulated clock.
+        self.data_source = config.get('DATA_SOURCE', 'okx')
+        self.clock = time.time
+        if self.data_source == 'replay':
+            self.replay_dir = Path(config.get('REPLAY_DIR', data_dir))
+            self._recordings = load_recordings(self.replay_dir)
+            self.clock = ReplayClock(recording_end_ms(self._recordings), config.get('REPLAY_SPEED', 1.0))
+        # Build coarser bars locally from a finer cached bar instead of downloading them.
+        self.resample_locally = config.get('RESAMPLE_LOCALLY', True)
+        # Capped at what one paged fetch can return, so a widened base window is never cut short
+        self.max_resample_base_candles = min(config.get('MAX_RESAMPLE_BASE_CANDLES', 6000), max_candles_per_fetch())
+        self._derived = set()
+        # A delta fetch that would take more requests than this (a long downtime) is replaced by a fresh window
+        self.max_delta_requests = config.get('MAX_DELTA_REQUESTS', 100)
+        # Candle arrays per (symbol, timeframe), bounded by a memory budget; each entry
+        # expires when its last candle closes. Ticker snapshots expire after a short TTL.
+        self.historical_cache = BoundedCache(max_bytes=config.get('CACHE_MAX_BYTES', 256 * 1024 * 1024), clock=self.clock)
+        self.price_cache = BoundedCache(max_entries=config.get('PRICE_CACHE_MAX_ENTRIES', 500),
+                                        default_ttl=config.get('PRICE_CACHE_TTL_SECONDS', 60), clock=self.clock)
+        self._history_start = {}
+        self._confirmed_until: Dict[Tuple[str, str], int] = {}
+        self._inflight: Dict[Tuple[str, str], Future] = {}
+        self._inflight_lock = threading.Lock()
+        self.fetch_stats = {'calls': 0, 'cache_hits': 0, 'live_merges': 0, 'resampled': 0, 'fetches': 0, 'coalesced': 0}
         self._stop_event = threading.Event()
 
-        self.websocket_client = OKXWebSocketClient(
-            price_cache=self.price_cache,
-            stop_event=self._stop_event
+        # Recent candles pushed over the WebSocket; merged into the history on every get_candles.
+        live_bars = config.get('LIVE_CANDLE_BARS', [])
+        self.live_candles = LiveCandleBook(
+            bar_ms={bar: self._timeframe_to_minutes(bar) * 60 * 1000 for bar in live_bars},
+            capacity=config.get('LIVE_CANDLE_BUFFER', 500)
         )
+
+        if self.data_source == 'replay':
+            # Keep replayed history apart from the live candle store.
+            self.candle_store = CandleStore(self.data_dir / 'replay_candles')
+            self.rest_client = ReplayRestClient(self._recordings, self.clock, self._bar_spec)
+            self.websocket_client = ReplayTickerStream(
+                price_cache=self.price_cache,
+                stop_event=self._stop_event,
+                recordings=self._recordings,
+                clock=self.clock,
+                snapshot_path=self.replay_dir / 'current_prices.json'
+            )
+        else:
+            self.candle_store = CandleStore(self.data_dir / 'candles')
+            self.rest_client = OKXRestClient(self.base_url)
+            self.websocket_client = OKXWebSocketClient(
+                price_cache=self.price_cache,
+                stop_event=self._stop_event,
+                live_candles=self.live_candles
+            )
         self.default_symbols = [
             'BTC-USDT', 'ETH-USDT', 'BNB-USDT', 'XRP-USDT',
             'ADA-USDT', 'SOL-USDT', 'DOT-USDT', 'DOGE-USDT',
@@ -110,82 +162,472 @@ class OKXDataFetcher:
         logger.warning(f"Unknown timeframe format '{timeframe}', defaulting to 1440 minutes (1 day).")
         return 1440
 
-    def fetch_historical_data(self, symbol: str = 'BTC-USDT', timeframe: str = '1D', days_to_fetch: int = 365) -> List[Dict]:
+    def _candles_to_records(self, candles: np.ndarray) -> List[Dict]:
+        """Converts a candle array into the list-of-dicts format returned to callers."""
+        return [
+            {
+                'timestamp': int(c['timestamp']), 'open': float(c['open']), 'high': float(c['high']),
+                'low': float(c['low']), 'close': float(c['close']), 'volume': float(c['volume']),
+                'date': datetime.fromtimestamp(int(c['timestamp']) / 1000).isoformat()
+            }
+            for c in candles
+        ]
+
+    def _bar_offset_ms(self, timeframe: str) -> int:
+        """OKX opens daily bars on Hong Kong time (UTC+8); other bars are UTC-aligned."""
+        return 8 * 60 * 60 * 1000 if 'D' in timeframe and 'utc' not in timeframe else 0
+
+    def _bar_spec(self, timeframe: str) -> Tuple[int, int]:
+        """Returns (bar length, bar offset) in ms for an OKX bar string."""
+        return self._timeframe_to_minutes(timeframe) * 60 * 1000, self._bar_offset_ms(timeframe)
+
+    def _current_bar_open(self, timeframe: str, now_ms: int) -> int:
+        """Returns the open timestamp (ms) of the bar that is currently in progress."""
+        tf_ms = self._timeframe_to_minutes(timeframe) * 60 * 1000
+        offset = self._bar_offset_ms(timeframe)
+        return (now_ms + offset) // tf_ms * tf_ms - offset
+
+    def bar_bounds(self, timeframe: str, now_ms: Optional[int] = None) -> Tuple[int, int]:
+        """Returns the (open, close) timestamps in ms of the OKX bar in progress at now_ms (default: the fetcher's clock)."""
+        if now_ms is None:
+            now_ms = int(self.clock() * 1000)
+        bar_open = self._current_bar_open(timeframe, now_ms)
+        return bar_open, bar_open + self._timeframe_to_minutes(timeframe) * 60 * 1000
+
+    def _is_current(self, cache_key: Tuple[str, str], now_ms: int) -> bool:
         """
-        Fetches historical data, checking cache first.
-        This version uses a more robust while loop to ensure all required data is fetched.
+        True if the most recently closed bar is already known in its confirmed (final) form.
+        A candle that was still in progress when fetched does not count, even once its bar closed.
         """
-        cache_key = (symbol, timeframe, days_to_fetch)
-        if cache_key in self.historical_cache:
-            logger.info(f"✅ Found historical data for {cache_key} in cache.")
-            return self.historical_cache[cache_key]
+        confirmed_until = self._confirmed_until.get(cache_key)
+        if confirmed_until is None:
+            return False
+        timeframe = cache_key[1]
+        tf_ms = self._timeframe_to_minutes(timeframe) * 60 * 1000
+        return confirmed_until >= self._current_bar_open(timeframe, now_ms) - tf_ms
 
-        try:
-            logger.info(f"📊 Fetching historical data for {symbol} ({timeframe}) for {days_to_fetch} days from network...")
-            all_candles = []
-            current_before_ts = None
-            endpoint_url = f"{self.base_url}/api/v5/market/candles"
-            # Use the maximum limit allowed by the API to be more efficient
-            limit_per_request = 300
-
-            tf_minutes = self._timeframe_to_minutes(timeframe)
-            if tf_minutes <= 0: tf_minutes = 1440
-            total_candles_needed = (days_to_fetch * 24 * 60) / tf_minutes
-
-            max_requests = 20 # Safety break to prevent infinite loops
-
-            while len(all_candles) < total_candles_needed and max_requests > 0:
-                params = {'instId': symbol, 'bar': timeframe, 'limit': str(limit_per_request)}
-                if current_before_ts:
-                    params['before'] = current_before_ts
-
-                response = requests.get(endpoint_url, params=params, headers={'User-Agent': 'Mozilla/5.0'}, timeout=15)
-                max_requests -= 1
-
-                if response.status_code == 200:
-                    data = response.json()
-                    if data.get('code') == '0':
-                        candles_data = data.get('data', [])
-                        if not candles_data:
-                            logger.info(f"⏹️ No more historical data returned from API for {symbol}. Fetched {len(all_candles)} candles.")
-                            break
-
-                        all_candles.extend(candles_data)
-                        current_before_ts = candles_data[-1][0]
-                        time.sleep(0.3) # Respect rate limits
-                    else:
-                        raise Exception(f"API Error: {data.get('msg', 'Unknown error')}")
+    def _mark_confirmed(self, cache_key: Tuple[str, str], candles: np.ndarray, confirmed: np.ndarray):
+        if confirmed.any():
+            last_confirmed = int(candles['timestamp'][confirmed][-1])
+            self._confirmed_until[cache_key] = max(last_confirmed, self._confirmed_until.get(cache_key, last_confirmed))
+
+    def _save_to_store(self, symbol: str, timeframe: str, candles: np.ndarray, confirmed: np.ndarray):
+        """
+        Persists the confirmed (closed) candles. In-progress candles are never stored,
+        which keeps the store append-only. The store never contains a gap: candles that
+        do not connect to the stored history only replace it if they reach back at least
+        as far, otherwise they are not stored.
+        """
+        closed = candles[confirmed]
+        if len(closed) == 0:
+            return
+        stored = self.candle_store.load(symbol, timeframe)
+        tf_ms = self._timeframe_to_minutes(timeframe) * 60 * 1000
+        first_ts = closed['timestamp'][0]
+        if len(stored) and stored['timestamp'][0] <= first_ts <= stored['timestamp'][-1] + tf_ms:
+            self.candle_store.append(symbol, timeframe, closed)
+        elif len(stored) == 0 or first_ts <= stored['timestamp'][0]:
+            self.candle_store.rewrite(symbol, timeframe, closed)
+        else:
+            logger.warning(f"⚠️ Fetched {symbol} ({timeframe}) candles do not connect to the stored history; "
+                           f"keeping the {len(stored)} stored candles.")
+
+    def _parse_candles(self, raw_candles: List[List[str]]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Parses raw OKX candle rows into a sorted, de-duplicated candle array
+        plus a boolean mask of which candles are confirmed (closed).
+        The string payload is converted column by column; no per-row Python objects are built.
+        """
+        if not raw_candles:
+            return np.empty(0, dtype=CANDLE_DTYPE), np.empty(0, dtype=bool)
+
+        rows = np.array(raw_candles, dtype=str)
+        # np.unique sorts the timestamps; return_index keeps the first occurrence of duplicates.
+        timestamps, first_idx = np.unique(rows[:, 0].astype(np.int64), return_index=True)
+        rows = rows[first_idx]
+
+        candles = np.empty(len(rows), dtype=CANDLE_DTYPE)
+        candles['timestamp'] = timestamps
+        for column, name in enumerate(('open', 'high', 'low', 'close', 'volume'), start=1):
+            candles[name] = rows[:, column].astype(np.float64)
+        # OKX marks the still-open candle with confirm='0' (9th field).
+        confirmed = rows[:, 8] == '1' if rows.shape[1] >= 9 else np.ones(len(rows), dtype=bool)
+        return candles, confirmed
+
+    def _candles_to_frame(self, candles: np.ndarray) -> pd.DataFrame:
+        """Builds an OHLCV DataFrame indexed by candle open time straight from the candle columns."""
+        index = pd.DatetimeIndex(pd.to_datetime(candles['timestamp'], unit='ms'), name='timestamp')
+        return pd.DataFrame({name: candles[name] for name in ('open', 'high', 'low', 'close', 'volume')}, index=index)
+
+    def _merge_candles(self, older: np.ndarray, newer: np.ndarray, timeframe: str) -> np.ndarray:
+        """
+        Joins two sorted candle arrays; rows from `newer` win on overlapping timestamps.
+        If `newer` does not connect to `older`, only `newer` is kept so no series has a gap.
+        """
+        if len(newer) == 0:
+            return np.asarray(older)
+        tf_ms = self._timeframe_to_minutes(timeframe) * 60 * 1000
+        if len(older) and newer['timestamp'][0] > older['timestamp'][-1] + tf_ms:
+            logger.warning(f"⚠️ New {timeframe} candles leave a gap after the cached ones; dropping the older candles.")
+            return np.asarray(newer)
+        keep = older[older['timestamp'] < newer['timestamp'][0]]
+        return np.concatenate([keep, newer])
+
+    def _covers(self, candles: np.ndarray, cache_key: Tuple[str, str], since_ts: int) -> bool:
+        """True if the candles reach back to since_ts (within one bar) or to the start of the market's history."""
+        first_ts = int(candles['timestamp'][0])
+        tf_ms = self._timeframe_to_minutes(cache_key[1]) * 60 * 1000
+        return first_ts - since_ts <= tf_ms or self._history_start.get(cache_key) == first_ts
+
+    def _load_from_store(self, cache_key: Tuple[str, str]) -> np.ndarray:
+        """Memory-maps the stored candles for a key; every stored candle is a confirmed one."""
+        candles = self.candle_store.load(*cache_key)
+        if len(candles):
+            self._confirmed_until.setdefault(cache_key, int(candles['timestamp'][-1]))
+        return candles
+
+    def _plan_fetch(self, symbol: str, timeframe: str, candles: np.ndarray, since_ts: int, now_ms: int) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Works out which network requests bring `candles` up to the requested window:
+        a full download when nothing is known, otherwise a backfill of the missing older
+        range and/or a delta fetch of the candles newer than the last known one.
+        Each job is (kind, keyword arguments for OKXRestClient.fetch_candle_pages).
+        """
+        tf_ms = self._timeframe_to_minutes(timeframe) * 60 * 1000
+        if len(candles) == 0:
+            total_candles_needed = (now_ms - since_ts) / tf_ms
+            return [('full', {'inst_id': symbol, 'bar': timeframe, 'max_candles': total_candles_needed})]
+
+        jobs = []
+        newer_than = self._confirmed_until.get((symbol, timeframe), int(candles['timestamp'][-1]))
+        max_requests = max(MAX_PAGE_REQUESTS, requests_for_candles((now_ms - newer_than) // tf_ms + 1) + 1)
+        if not self._is_current((symbol, timeframe), now_ms) and max_requests > self.max_delta_requests:
+            # Offline for too long to bridge the gap: fetch the window afresh (the store keeps its history)
+            total_candles_needed = (now_ms - since_ts) / tf_ms
+            return [('full', {'inst_id': symbol, 'bar': timeframe, 'max_candles': total_candles_needed})]
+        if not self._covers(candles, (symbol, timeframe), since_ts):
+            first_ts = int(candles['timestamp'][0])
+            jobs.append(('backfill', {'inst_id': symbol, 'bar': timeframe, 'older_than': first_ts,
+                                      'max_candles': (first_ts - since_ts) / tf_ms}))
+        if not self._is_current((symbol, timeframe), now_ms):
+            # Re-request from the last confirmed candle so a stale in-progress candle gets replaced;
+            # enough pages are allowed to reach it after a downtime.
+            jobs.append(('delta', {'inst_id': symbol, 'bar': timeframe, 'newer_than': newer_than, 'max_requests': max_requests}))
+        return jobs
+
+    def _apply_fetch(self, symbol: str, timeframe: str, candles: np.ndarray, kind: str,
+                     raw_candles: List[List[str]], exhausted: bool) -> np.ndarray:
+        """Merges the rows returned for one planned job into the candles and the candle store."""
+        fetched, confirmed = self._parse_candles(raw_candles)
+        if kind != 'backfill':
+            self._mark_confirmed((symbol, timeframe), fetched, confirmed)
+        if kind == 'full':
+            if exhausted and len(fetched):
+                # Short history (e.g. a recent listing): the window can't reach further back.
+                self._history_start[(symbol, timeframe)] = int(fetched['timestamp'][0])
+            self._save_to_store(symbol, timeframe, fetched, confirmed)
+            logger.info(f"✅ Fetched and cached {len(fetched)} unique candles for {symbol} ({timeframe})")
+            return fetched
+
+        if kind == 'backfill':
+            first_ts = int(candles['timestamp'][0])
+            keep = fetched['timestamp'] < first_ts
+            older, confirmed = fetched[keep], confirmed[keep]
+            if exhausted:
+                # The exchange has no history before this point; don't ask again.
+                self._history_start[(symbol, timeframe)] = int(older['timestamp'][0]) if len(older) else first_ts
+            if len(older) == 0:
+                return candles
+            self.candle_store.merge(symbol, timeframe, older[confirmed])
+            logger.info(f"⏪ Backfilled {len(older)} older candles for {symbol} ({timeframe})")
+            return np.concatenate([older, candles])
+
+        self._save_to_store(symbol, timeframe, fetched, confirmed)
+        merged = self._merge_candles(candles, fetched, timeframe)
+        logger.info(f"✅ Merged {len(fetched)} new candles into {len(merged)} cached candles for {symbol} ({timeframe})")
+        return merged
+
+    def _apply_fetches(self, symbol: str, timeframe: str, candles: np.ndarray,
+                       jobs: List[Tuple[str, Dict[str, Any]]], results: List[Any]) -> np.ndarray:
+        """Applies every successful job result; failed jobs are logged and leave the candles unchanged."""
+        for (kind, _), result in zip(jobs, results):
+            if isinstance(result, Exception):
+                logger.error(f"❌ Error fetching historical data for {symbol} ({timeframe}, {kind}): {result}")
+                continue
+            raw_candles, exhausted = result
+            candles = self._apply_fetch(symbol, timeframe, candles, kind, raw_candles, exhausted)
+        return candles
+
+    def _derive_window(self, symbol: str, timeframe: str, since_ts: int, now_ms: int) -> Optional[np.ndarray]:
+        """
+        Builds the window for `timeframe` by resampling a finer, natively fetched bar of the
+        same symbol that is cached, current and reaches back far enough. The result is cached
+        under (symbol, timeframe). Returns None if no suitable bar is cached.
+        """
+        if not self.resample_locally:
+            return None
+        target_ms = self._timeframe_to_minutes(timeframe) * 60 * 1000
+        target_offset = self._bar_offset_ms(timeframe)
+        first_target_open = (since_ts + target_offset) // target_ms * target_ms - target_offset
+
+        sources = [(key, candles) for key, candles in list(self.historical_cache.items())
+                   if key[0] == symbol and key[1] != timeframe and key not in self._derived]
+        # Prefer the coarsest usable source: fewer rows to aggregate.
+        sources.sort(key=lambda item: self._timeframe_to_minutes(item[0][1]), reverse=True)
+        for source_key, source in sources:
+            source_ms = self._timeframe_to_minutes(source_key[1]) * 60 * 1000
+            if not can_resample(source_ms, self._bar_offset_ms(source_key[1]), target_ms, target_offset):
+                continue
+            if len(source) == 0 or not self._is_current(source_key, now_ms):
+                continue
+            if int(source['timestamp'][0]) > first_target_open and self._history_start.get(source_key) != int(source['timestamp'][0]):
+                continue
+
+            resampled = resample_candles(slice_by_time(source, start_ts=first_target_open), source_ms, target_ms, target_offset)
+            if len(resampled) == 0:
+                continue
+            cache_key = (symbol, timeframe)
+            self._confirmed_until[cache_key] = last_complete_open(resampled, target_ms, self._confirmed_until[source_key], source_ms)
+            self._derived.add(cache_key)
+            self._cache_candles(cache_key, resampled, now_ms)
+            return slice_by_time(resampled, start_ts=since_ts)
+        return None
+
+    def _resample_plan(self, requests: List[Tuple[str, str, int]]) -> List[Tuple[str, str, int]]:
+        """
+        Rewrites a batch of requests so that, per symbol, bars that can be built from the
+        finest requested bar are not downloaded. The finest bar's window is widened to cover
+        them instead, unless that would exceed max_resample_base_candles (history depth); such
+        bars fall back to a native download.
+        """
+        day_ms = 24 * 60 * 60 * 1000
+        windows_by_symbol: Dict[str, Dict[str, int]] = {}
+        for symbol, timeframe, days_to_fetch in requests:
+            windows = windows_by_symbol.setdefault(symbol, {})
+            windows[timeframe] = max(days_to_fetch, windows.get(timeframe, 0))
+
+        planned = []
+        for symbol, windows in windows_by_symbol.items():
+            base_tf = min(windows, key=self._timeframe_to_minutes)
+            base_ms = self._timeframe_to_minutes(base_tf) * 60 * 1000
+            base_days = windows[base_tf]
+            for timeframe, days_to_fetch in windows.items():
+                if timeframe == base_tf:
+                    continue
+                target_ms = self._timeframe_to_minutes(timeframe) * 60 * 1000
+                # One extra target bar so the first bar of the window is complete.
+                needed_days = -(-(days_to_fetch * day_ms + target_ms) // day_ms)
+                if can_resample(base_ms, self._bar_offset_ms(base_tf), target_ms, self._bar_offset_ms(timeframe)) and \
+                        max(base_days, needed_days) * day_ms / base_ms <= self.max_resample_base_candles:
+                    base_days = max(base_days, needed_days)
                 else:
-                    raise Exception(f"HTTP Error: {response.status_code} - {response.text}")
-
-            if max_requests == 0:
-                logger.warning(f"⚠️ Hit max request limit for {symbol}. The data might be incomplete.")
-
-            historical_data = []
-            seen_timestamps = set()
-            for candle in all_candles:
-                timestamp = int(candle[0])
-                if timestamp not in seen_timestamps:
-                    historical_data.append({
-                        'timestamp': timestamp, 'open': float(candle[1]), 'high': float(candle[2]),
-                        'low': float(candle[3]), 'close': float(candle[4]), 'volume': float(candle[5]),
-                        'date': datetime.fromtimestamp(timestamp / 1000).isoformat()
-                    })
-                    seen_timestamps.add(timestamp)
-
-            historical_data.sort(key=lambda x: x['timestamp'])
-            self.historical_cache[cache_key] = historical_data
-            logger.info(f"✅ Fetched and cached {len(historical_data)} unique candles for {symbol}")
-            return historical_data
-        except Exception as e:
-            logger.error(f"❌ Error fetching historical data for {symbol}: {e}")
-            return []
+                    planned.append((symbol, timeframe, days_to_fetch))
+            planned.append((symbol, base_tf, base_days))
+        return planned
+
+    def _cache_candles(self, cache_key: Tuple[str, str], candles: np.ndarray, now_ms: int):
+        """Caches a candle array until the bar in progress closes; after that a delta fetch is due anyway."""
+        timeframe = cache_key[1]
+        bar_close_ms = self._current_bar_open(timeframe, now_ms) + self._timeframe_to_minutes(timeframe) * 60 * 1000
+        self.historical_cache.set(cache_key, candles, expires_at=bar_close_ms / 1000)
+
+    def get_cache_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Returns hit/miss/eviction/expiration counters and sizes of the candle and price caches."""
+        return {'historical': self.historical_cache.get_stats(), 'prices': self.price_cache.get_stats()}
+
+    def _merge_live_candles(self, cache_key: Tuple[str, str], now_ms: int):
+        """
+        Merges the candles pushed over the WebSocket for this key into the cached (or stored)
+        history, so a key with a live subscription stays current without REST calls.
+        Live candles are only used if they connect to the history without a gap.
+        """
+        snapshot = self.live_candles.snapshot(*cache_key)
+        if snapshot is None:
+            return
+        live, confirmed = snapshot
+        candles = self.historical_cache.get(cache_key)
+        if candles is None:
+            candles = self._load_from_store(cache_key)
+        if len(candles) == 0:
+            return
+        tf_ms = self._timeframe_to_minutes(cache_key[1]) * 60 * 1000
+        last_ts = int(candles['timestamp'][-1])
+        if live['timestamp'][0] > last_ts + tf_ms or live['timestamp'][-1] < last_ts:
+            return
+        if live['timestamp'][-1] == last_ts and candles[-1] == live[-1] and \
+                (not confirmed.any() or self._confirmed_until.get(cache_key, -1) >= int(live['timestamp'][confirmed][-1])):
+            return
+
+        self._mark_confirmed(cache_key, live, confirmed)
+        self._save_to_store(cache_key[0], cache_key[1], live, confirmed)
+        self._derived.discard(cache_key)
+        self._cache_candles(cache_key, self._merge_candles(candles, live, cache_key[1]), now_ms)
+        with self._inflight_lock:
+            self.fetch_stats['live_merges'] += 1
+
+    def _cached_window(self, cache_key: Tuple[str, str], since_ts: int, now_ms: int) -> Optional[np.ndarray]:
+        """Returns a view of the cached candles if they are current and cover since_ts."""
+        candles = self.historical_cache.get(cache_key)
+        if candles is not None and self._is_current(cache_key, now_ms) and self._covers(candles, cache_key, since_ts):
+            return slice_by_time(candles, start_ts=since_ts)
+        return None
+
+    def get_candles(self, symbol: str = 'BTC-USDT', timeframe: str = '1D', days_to_fetch: int = 365) -> np.ndarray:
+        """
+        Returns the candles of the last `days_to_fetch` days as a sorted CANDLE_DTYPE array.
+        The cache holds the widest range fetched so far per (symbol, timeframe); narrower
+        requests are answered with a view into it. Only a missing older range is backfilled,
+        and only the candles newer than the last known one are requested (delta mode).
+
+        Concurrent calls for the same (symbol, timeframe) are coalesced: while one thread
+        is fetching, the others wait for it and then read its result from the cache.
+        """
+        cache_key = (symbol, timeframe)
+        with self._inflight_lock:
+            self.fetch_stats['calls'] += 1
+
+        while True:
+            now_ms = int(self.clock() * 1000)
+            since_ts = now_ms - days_to_fetch * 24 * 60 * 60 * 1000
+            self._merge_live_candles(cache_key, now_ms)
+            window = self._cached_window(cache_key, since_ts, now_ms)
+            if window is not None:
+                logger.info(f"✅ Found historical data for {cache_key} in cache.")
+                with self._inflight_lock:
+                    self.fetch_stats['cache_hits'] += 1
+                return window
+
+            window = self._derive_window(symbol, timeframe, since_ts, now_ms)
+            if window is not None:
+                logger.info(f"🧮 Resampled {len(window)} {timeframe} candles for {symbol} from a finer cached bar.")
+                with self._inflight_lock:
+                    self.fetch_stats['resampled'] += 1
+                return window
+
+            with self._inflight_lock:
+                inflight = self._inflight.get(cache_key)
+                if inflight is None:
+                    inflight = Future()
+                    self._inflight[cache_key] = inflight
+                    self.fetch_stats['fetches'] += 1
+                    is_leader = True
+                else:
+                    self.fetch_stats['coalesced'] += 1
+                    is_leader = False
+
+            if not is_leader:
+                logger.info(f"⏳ Waiting for the in-flight fetch of {cache_key}...")
+                inflight.result()
+                # The leader may have fetched a narrower window; re-check the cache.
+                continue
+
+            try:
+                return self._load_candles(symbol, timeframe, days_to_fetch)
+            finally:
+                with self._inflight_lock:
+                    del self._inflight[cache_key]
+                inflight.set_result(None)
+
+    def get_fetch_stats(self) -> Dict[str, int]:
+        """Returns counters for get_candles calls, cache hits, live merges, resampled windows, leader fetches and coalesced waits."""
+        with self._inflight_lock:
+            return dict(self.fetch_stats)
+
+    def _load_candles(self, symbol: str, timeframe: str, days_to_fetch: int) -> np.ndarray:
+        """Loads candles from the cache or the candle store and fills any gaps from the network."""
+        cache_key = (symbol, timeframe)
+        now_ms = int(self.clock() * 1000)
+        since_ts = now_ms - days_to_fetch * 24 * 60 * 60 * 1000
+        candles = self.historical_cache.get(cache_key)
+        if candles is None:
+            candles = self._load_from_store(cache_key)
+
+        self._derived.discard(cache_key)
+        jobs = self._plan_fetch(symbol, timeframe, candles, since_ts, now_ms)
+        if not jobs:
+            logger.info(f"💾 Loaded {len(candles)} candles for {symbol} ({timeframe}) from the candle store.")
+        else:
+            logger.info(f"📊 Fetching historical data for {symbol} ({timeframe}) from network: {', '.join(kind for kind, _ in jobs)}...")
+            results = self.rest_client.run(self.rest_client.fetch_many([params for _, params in jobs]))
+            candles = self._apply_fetches(symbol, timeframe, candles, jobs, results)
+
+        if len(candles):
+            self._cache_candles(cache_key, candles, now_ms)
+        return slice_by_time(candles, start_ts=since_ts)
+
+    def fetch_many(self, requests: List[Tuple[str, str, int]]) -> List[np.ndarray]:
+        """
+        Fetches a batch of (symbol, timeframe, days_to_fetch) windows concurrently.
+        All network requests of the batch are issued together through the shared
+        rate-limited REST client, so a watchlist x timeframe matrix is fetched as fast as
+        OKX's limits allow. With local resampling, only the finest bar of each symbol is
+        downloaded where possible. Results are returned in request order, like get_candles.
+        """
+        now_ms = int(self.clock() * 1000)
+        widest_days: Dict[Tuple[str, str], int] = {}
+        network_requests = self._resample_plan(requests) if self.resample_locally else requests
+        for symbol, timeframe, days_to_fetch in network_requests:
+            key = (symbol, timeframe)
+            widest_days[key] = max(days_to_fetch, widest_days.get(key, 0))
+
+        # Become the single-flight leader for every key that nobody else is fetching.
+        led: Dict[Tuple[str, str], Future] = {}
+        with self._inflight_lock:
+            for key, days_to_fetch in widest_days.items():
+                if key in self._inflight:
+                    continue
+                if self._cached_window(key, now_ms - days_to_fetch * 24 * 60 * 60 * 1000, now_ms) is not None:
+                    continue
+                led[key] = self._inflight[key] = Future()
+                self.fetch_stats['fetches'] += 1
+
+        try:
+            plans = {}
+            for key in led:
+                candles = self.historical_cache.get(key)
+                if candles is None:
+                    candles = self._load_from_store(key)
+                since_ts = now_ms - widest_days[key] * 24 * 60 * 60 * 1000
+                plans[key] = (candles, self._plan_fetch(key[0], key[1], candles, since_ts, now_ms))
+
+            all_params = [params for _, jobs in plans.values() for _, params in jobs]
+            logger.info(f"📊 Bulk fetch: {len(requests)} windows, {len(led)} to download, {len(all_params)} network jobs.")
+            all_results = self.rest_client.run(self.rest_client.fetch_many(all_params)) if all_params else []
+
+            position = 0
+            for key, (candles, jobs) in plans.items():
+                results = all_results[position:position + len(jobs)]
+                position += len(jobs)
+                candles = self._apply_fetches(key[0], key[1], candles, jobs, results)
+                if len(candles):
+                    self._cache_candles(key, candles, now_ms)
+        finally:
+            with self._inflight_lock:
+                for key, future in led.items():
+                    del self._inflight[key]
+                    future.set_result(None)
+
+        return [self.get_candles(symbol, timeframe, days_to_fetch) for symbol, timeframe, days_to_fetch in requests]
+
+    def fetch_historical_data(self, symbol: str = 'BTC-USDT', timeframe: str = '1D', days_to_fetch: int = 365) -> List[Dict]:
+        """
+        Fetches historical data as a list of candle dicts. See get_candles for the
+        caching, delta and backfill behaviour.
+        """
+        return self._candles_to_records(self.get_candles(symbol, timeframe, days_to_fetch))
+
+    def fetch_historical_frame(self, symbol: str = 'BTC-USDT', timeframe: str = '1D', days_to_fetch: int = 365) -> pd.DataFrame:
+        """
+        Fetches historical data as an OHLCV DataFrame indexed by timestamp, without
+        going through per-candle dicts. See get_candles for the caching behaviour.
+        """
+        return self._candles_to_frame(self.get_candles(symbol, timeframe, days_to_fetch))
 
     def get_cached_price(self, symbol: str) -> Optional[Dict[str, Any]]:
         return self.price_cache.get(symbol)
 
     def start_data_services(self, symbols: List[str] = None):
-        """Starts background services for data collection."""
+        """Starts background services for data collection (live tickers and, if configured, live candles)."""
         if symbols is None:
             symbols = self.default_symbols
         logger.info("🚀 Starting all data services...")
@@ -196,4 +638,5 @@ class OKXDataFetcher:
         """Signals all running threads to stop."""
         logger.info("⏹️ Stopping data fetcher...")
         self._stop_event.set()
+        self.rest_client.close()
         logger.info("✅ Stop signal sent.")
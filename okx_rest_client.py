@@ -0,0 +1,213 @@
+import asyncio
+import logging
+import math
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+CANDLES_PATH = '/api/v5/market/candles'
+HISTORY_CANDLES_PATH = '/api/v5/market/history-candles'
+
+# OKX public REST limits per IP: (requests, per seconds).
+ENDPOINT_RATE_LIMITS = {
+    CANDLES_PATH: (40, 2.0),
+    HISTORY_CANDLES_PATH: (20, 2.0),
+    '/api/v5/market/tickers': (20, 2.0),
+}
+DEFAULT_RATE_LIMIT = (10, 2.0)
+
+# Rows per request of each candle endpoint. The candles endpoint only serves the latest
+# CANDLES_ENDPOINT_DEPTH rows of a bar; anything older comes from history-candles.
+PAGE_LIMITS = {CANDLES_PATH: 300, HISTORY_CANDLES_PATH: 100}
+CANDLES_ENDPOINT_DEPTH = 1440
+MAX_PAGE_REQUESTS = 20
+
+def max_candles_per_fetch(max_requests: int = MAX_PAGE_REQUESTS) -> int:
+    """How many of the latest candles one fetch_candle_pages call can page back through."""
+    recent_pages = math.ceil(CANDLES_ENDPOINT_DEPTH / PAGE_LIMITS[CANDLES_PATH])
+    return CANDLES_ENDPOINT_DEPTH + max(max_requests - recent_pages, 0) * PAGE_LIMITS[HISTORY_CANDLES_PATH]
+
+def requests_for_candles(candles: int) -> int:
+    """How many requests fetch_candle_pages needs to page back through the latest `candles` rows."""
+    recent_pages = math.ceil(min(candles, CANDLES_ENDPOINT_DEPTH) / PAGE_LIMITS[CANDLES_PATH])
+    return recent_pages + math.ceil(max(candles - CANDLES_ENDPOINT_DEPTH, 0) / PAGE_LIMITS[HISTORY_CANDLES_PATH])
+
+# OKX error code for "Too Many Requests".
+RATE_LIMIT_ERROR_CODE = '50011'
+
+class OKXAPIError(Exception):
+    """Raised when OKX answers with an HTTP error or a non-zero response code."""
+
+class TokenBucket:
+    """
+    Asyncio token bucket. Holds up to `capacity` tokens and refills continuously
+    at `rate` tokens per second; every request consumes one token.
+    """
+    def __init__(self, capacity: int, rate: float):
+        self.capacity = capacity
+        self.rate = rate
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+class OKXRestClient:
+    """
+    Asyncio REST client for OKX market data.
+    Keeps one pooled aiohttp session and one token bucket per endpoint, shared by every
+    caller, so any number of concurrent fetches stays within OKX's per-endpoint limits.
+    The client runs its own event loop in a daemon thread; synchronous code calls it via run().
+    """
+    def __init__(self, base_url: str = 'https://www.okx.com', max_connections: int = 20, timeout: float = 15, max_retries: int = 3):
+        self.base_url = base_url
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._start_lock = threading.Lock()
+
+    def start(self):
+        """Starts the client's event loop thread (idempotent)."""
+        with self._start_lock:
+            if self._loop is not None:
+                return
+            loop = asyncio.new_event_loop()
+
+            def run_loop():
+                asyncio.set_event_loop(loop)
+                loop.run_forever()
+
+            self._thread = threading.Thread(target=run_loop, name='okx-rest-client', daemon=True)
+            self._thread.start()
+            self._loop = loop
+            logger.info("✅ OKX REST client loop started.")
+
+    def run(self, coro) -> Any:
+        """Runs a coroutine on the client's loop from synchronous code and waits for the result."""
+        self.start()
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    def close(self):
+        """Closes the HTTP session and stops the event loop."""
+        if self._loop is None:
+            return
+        if self._session is not None:
+            asyncio.run_coroutine_threadsafe(self._session.close(), self._loop).result()
+            self._session = None
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+        self._loop = None
+        logger.info("✅ OKX REST client closed.")
+
+    def _bucket(self, path: str) -> TokenBucket:
+        if path not in self._buckets:
+            requests, period = ENDPOINT_RATE_LIMITS.get(path, DEFAULT_RATE_LIMIT)
+            self._buckets[path] = TokenBucket(capacity=requests, rate=requests / period)
+        return self._buckets[path]
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_connections),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={'User-Agent': 'Mozilla/5.0'}
+            )
+        return self._session
+
+    async def _request(self, path: str, params: Dict[str, str]) -> List:
+        """Performs one rate-limited GET and returns the 'data' list of the response."""
+        session = await self._get_session()
+        for attempt in range(self.max_retries + 1):
+            await self._bucket(path).acquire()
+            async with session.get(f"{self.base_url}{path}", params=params) as response:
+                if response.status == 429:
+                    payload = {'code': RATE_LIMIT_ERROR_CODE, 'msg': 'Too Many Requests'}
+                elif response.status != 200:
+                    raise OKXAPIError(f"HTTP Error: {response.status} - {await response.text()}")
+                else:
+                    payload = await response.json(content_type=None)
+
+            if payload.get('code') == '0':
+                return payload.get('data', [])
+            if payload.get('code') == RATE_LIMIT_ERROR_CODE and attempt < self.max_retries:
+                backoff = 0.5 * (2 ** attempt)
+                logger.warning(f"⚠️ OKX rate limit hit on {path}, retrying in {backoff:.1f}s...")
+                await asyncio.sleep(backoff)
+                continue
+            raise OKXAPIError(f"API Error: {payload.get('msg', 'Unknown error')}")
+        raise OKXAPIError(f"API Error: rate limited on {path} after {self.max_retries} retries")
+
+    async def fetch_candle_pages(self, inst_id: str, bar: str, newer_than: Optional[int] = None,
+                                 older_than: Optional[int] = None, max_candles: Optional[float] = None,
+                                 max_requests: int = MAX_PAGE_REQUESTS) -> Tuple[List[List[str]], bool]:
+        """
+        Pages backwards from the latest candle (or from `older_than` for a backfill).
+        Stops once max_candles rows were collected or, in delta mode, once every
+        candle newer than `newer_than` has been returned.
+        Recent pages come from the candles endpoint; once it runs out (it only serves the
+        latest CANDLES_ENDPOINT_DEPTH rows), and for backfills, paging goes on through
+        history-candles. Returns the raw rows and whether the market's history ran out,
+        which only a short history-candles page shows.
+        """
+        all_candles = []
+        exhausted = False
+        path = HISTORY_CANDLES_PATH if older_than is not None and newer_than is None else CANDLES_PATH
+
+        for _ in range(max_requests):
+            page_limit = PAGE_LIMITS[path]
+            if max_candles is not None:
+                page_limit = max(1, min(page_limit, math.ceil(max_candles - len(all_candles))))
+            params = {'instId': inst_id, 'bar': bar, 'limit': str(page_limit)}
+            # OKX: 'after' returns records older than ts, 'before' returns records newer than ts.
+            if older_than is not None:
+                params['after'] = str(older_than)
+            if newer_than is not None:
+                params['before'] = str(newer_than)
+
+            candles_data = await self._request(path, params)
+            all_candles.extend(candles_data)
+            if candles_data:
+                older_than = int(candles_data[-1][0])
+            if len(candles_data) < page_limit:
+                if path == HISTORY_CANDLES_PATH:
+                    if newer_than is None:
+                        logger.info(f"⏹️ No more historical data returned from API for {inst_id}. Fetched {len(all_candles)} candles.")
+                        exhausted = True
+                    break
+                if newer_than is not None and len(all_candles) < CANDLES_ENDPOINT_DEPTH:
+                    # Every candle newer than newer_than has been returned
+                    break
+                # The candles endpoint's depth limit, not the start of the market's history
+                path = HISTORY_CANDLES_PATH
+                continue
+            if max_candles is not None and len(all_candles) >= max_candles:
+                break
+        else:
+            logger.warning(f"⚠️ Hit max request limit for {inst_id}. The data might be incomplete.")
+
+        return all_candles, exhausted
+
+    async def fetch_many(self, jobs: List[Dict[str, Any]]) -> List[Any]:
+        """
+        Runs several fetch_candle_pages jobs concurrently (each job is a dict of its
+        keyword arguments). Results are returned in job order; a failed job yields
+        its exception instead of a result.
+        """
+        return await asyncio.gather(*(self.fetch_candle_pages(**job) for job in jobs), return_exceptions=True)
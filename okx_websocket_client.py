@@ -3,15 +3,19 @@ import websockets
 import json
 import logging
 import threading
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 from datetime import datetime
+from live_candles import LiveCandleBook
 
 logger = logging.getLogger(__name__)
 
 class OKXWebSocketClient:
-    def __init__(self, price_cache: Dict, stop_event: threading.Event):
+    def __init__(self, price_cache: Dict, stop_event: threading.Event, live_candles: Optional[LiveCandleBook] = None):
         self.ws_url = 'wss://ws.okx.com:8443/ws/v5/public'
+        # OKX serves the candle channels on the business endpoint, not the public one.
+        self.business_ws_url = 'wss://ws.okx.com:8443/ws/v5/business'
         self.price_cache = price_cache
+        self.live_candles = live_candles
         self._stop_event = stop_event
         self.is_connected = False
         self.reconnect_interval = 5
@@ -23,31 +27,45 @@ class OKXWebSocketClient:
         ]
 
     async def _start_websocket(self, symbols: List[str] = None):
-        """Starts the WebSocket connection for live data."""
+        """Starts the WebSocket connections for live tickers and, if enabled, live candles."""
         if symbols is None:
             symbols = self.default_symbols
 
+        connections = [self._run_connection(
+            self.ws_url,
+            [{"channel": "tickers", "instId": symbol} for symbol in symbols],
+            self._process_websocket_data,
+            track_status=True
+        )]
+        if self.live_candles is not None and self.live_candles.bars:
+            connections.append(self._run_connection(
+                self.business_ws_url,
+                [{"channel": f"candle{bar}", "instId": symbol} for symbol in symbols for bar in self.live_candles.bars],
+                self._process_candle_data
+            ))
+        await asyncio.gather(*connections)
+
+    async def _run_connection(self, url: str, args: List[Dict[str, str]], handler, track_status: bool = False):
+        """Keeps one subscribed connection alive, passing each data message to handler(arg, data)."""
         while not self._stop_event.is_set():
             try:
-                logger.info("🔗 Attempting to connect to WebSocket...")
-                async with websockets.connect(self.ws_url) as websocket:
-                    self.ws_connection = websocket
-                    self.is_connected = True
+                logger.info(f"🔗 Attempting to connect to WebSocket {url}...")
+                async with websockets.connect(url) as websocket:
+                    if track_status:
+                        self.ws_connection = websocket
+                        self.is_connected = True
                     logger.info("✅ WebSocket connected")
 
-                    subscribe_message = {
-                        "op": "subscribe",
-                        "args": [{"channel": "tickers", "instId": symbol} for symbol in symbols]
-                    }
+                    subscribe_message = {"op": "subscribe", "args": args}
                     await websocket.send(json.dumps(subscribe_message))
-                    logger.info(f"📡 Subscribed to {len(symbols)} symbols")
+                    logger.info(f"📡 Subscribed to {len(args)} channels")
 
                     while not self._stop_event.is_set():
                         try:
                             message = await asyncio.wait_for(websocket.recv(), timeout=1.0)
                             data = json.loads(message)
                             if 'data' in data and data.get('data'):
-                                await self._process_websocket_data(data['data'])
+                                await handler(data.get('arg', {}), data['data'])
                         except asyncio.TimeoutError:
                             continue
                         except websockets.exceptions.ConnectionClosed:
@@ -58,13 +76,14 @@ class OKXWebSocketClient:
             except Exception as e:
                 logger.error(f"❌ WebSocket error: {e}")
             finally:
-                self.is_connected = False
+                if track_status:
+                    self.is_connected = False
                 if not self._stop_event.is_set():
                     logger.info(f"⏳ Reconnecting in {self.reconnect_interval} seconds...")
                     await asyncio.sleep(self.reconnect_interval)
 
-    async def _process_websocket_data(self, data_list: List[Dict]):
-        """Processes incoming WebSocket data and updates the shared price cache."""
+    async def _process_websocket_data(self, arg: Dict[str, str], data_list: List[Dict]):
+        """Processes incoming ticker data and updates the shared price cache."""
         try:
             for ticker in data_list:
                 price_data = {
@@ -82,6 +101,18 @@ class OKXWebSocketClient:
         except Exception as e:
             logger.error(f"❌ Error processing WebSocket data: {e}")
 
+    async def _process_candle_data(self, arg: Dict[str, str], data_list: List[List[str]]):
+        """Feeds pushed candles (same row layout as the REST candles endpoint) into the live candle book."""
+        try:
+            symbol = arg['instId']
+            bar = arg['channel'][len('candle'):]
+            for row in data_list:
+                candle = (int(row[0]), float(row[1]), float(row[2]), float(row[3]), float(row[4]), float(row[5]))
+                # confirm='1' once the bar has closed (9th field).
+                self.live_candles.update(symbol, bar, candle, confirmed=len(row) >= 9 and row[8] == '1')
+        except Exception as e:
+            logger.error(f"❌ Error processing WebSocket candle data: {e}")
+
     def start(self, symbols: List[str] = None):
         """Starts the WebSocket client in a new thread."""
         def run_loop():
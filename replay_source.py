@@ -0,0 +1,199 @@
+import asyncio
+import json
+import logging
+import math
+import re
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from candle_store import CANDLE_DTYPE, empty_candles
+from okx_rest_client import OKXAPIError
+from resampler import can_resample, resample_candles
+
+logger = logging.getLogger(__name__)
+
+# One recorded series: (bar length in ms, bar offset in ms, candles sorted by timestamp).
+Recording = Tuple[int, int, np.ndarray]
+
+def _records_to_candles(records: List[Dict]) -> np.ndarray:
+    if not records:
+        return empty_candles()
+    candles = np.empty(len(records), dtype=CANDLE_DTYPE)
+    for name in CANDLE_DTYPE.names:
+        candles[name] = [record[name] for record in records]
+    _, first_idx = np.unique(candles['timestamp'], return_index=True)
+    return candles[first_idx]
+
+def load_recordings(replay_dir: str) -> Dict[str, List[Recording]]:
+    """
+    Loads every '{instId}_historical.json' / '{instId}_{bar}.json' candle file in replay_dir
+    (the format the bot used to save to okx_data/). The bar size and alignment are inferred
+    from the candle timestamps.
+    """
+    recordings: Dict[str, List[Recording]] = {}
+    for path in sorted(Path(replay_dir).glob('*.json')):
+        if path.name == 'current_prices.json':
+            continue
+        try:
+            with open(path) as f:
+                payload = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ Skipping unreadable replay file {path}: {e}")
+            continue
+        candles = _records_to_candles(payload.get('data', []))
+        if len(candles) < 2:
+            continue
+        inst_id = payload.get('symbol') or re.sub(r'_[^_]+$', '', path.stem)
+        bar_ms = int(np.diff(candles['timestamp']).min())
+        bar_offset = int(-candles['timestamp'][0] % bar_ms)
+        recordings.setdefault(inst_id, []).append((bar_ms, bar_offset, candles))
+    for series in recordings.values():
+        series.sort(key=lambda recording: recording[0])
+    logger.info(f"📼 Loaded replay data for {len(recordings)} symbols from {replay_dir}")
+    return recordings
+
+def recording_end_ms(recordings: Dict[str, List[Recording]]) -> int:
+    """Close time of the newest recorded candle; replays start there by default."""
+    ends = [int(candles['timestamp'][-1]) + bar_ms for series in recordings.values() for bar_ms, _, candles in series]
+    return max(ends) if ends else int(time.time() * 1000)
+
+class ReplayClock:
+    """
+    Simulated wall clock (seconds, like time.time) that starts at start_ms and runs
+    `speed` times faster than real time. A speed of 0 freezes it for deterministic runs.
+    """
+    def __init__(self, start_ms: int, speed: float = 1.0):
+        self.start_ms = start_ms
+        self.speed = speed
+        self._started = time.monotonic()
+
+    def __call__(self) -> float:
+        return self.start_ms / 1000 + (time.monotonic() - self._started) * self.speed
+
+class ReplayRestClient:
+    """
+    Offline stand-in for OKXRestClient (same run / fetch_many / fetch_candle_pages / close
+    interface) that answers candle requests from recordings. A requested bar
+    that was not recorded is resampled from the finest recorded bar that divides it.
+    Only candles that have opened by the replay clock are visible, and the one still
+    in progress is marked unconfirmed, as on the exchange.
+    """
+    def __init__(self, recordings: Dict[str, List[Recording]], clock: Callable[[], float],
+                 bar_spec: Callable[[str], Tuple[int, int]]):
+        self.recordings = recordings
+        self.clock = clock
+        self.bar_spec = bar_spec
+        self.requests = 0
+
+    def start(self):
+        pass
+
+    def run(self, coro) -> Any:
+        return asyncio.run(coro)
+
+    def close(self):
+        pass
+
+    def _series(self, inst_id: str, bar: str) -> Tuple[int, np.ndarray]:
+        bar_ms, bar_offset = self.bar_spec(bar)
+        for source_ms, source_offset, candles in self.recordings.get(inst_id, []):
+            if source_ms == bar_ms and source_offset == bar_offset:
+                return bar_ms, candles
+        for source_ms, source_offset, candles in self.recordings.get(inst_id, []):
+            if can_resample(source_ms, source_offset, bar_ms, bar_offset):
+                return bar_ms, resample_candles(candles, source_ms, bar_ms, bar_offset)
+        raise OKXAPIError(f"API Error: no replay data for {inst_id} ({bar})")
+
+    async def fetch_candle_pages(self, inst_id: str, bar: str, newer_than: Optional[int] = None,
+                                 older_than: Optional[int] = None, max_candles: Optional[float] = None,
+                                 max_requests: int = 20) -> Tuple[List[List[str]], bool]:
+        """Same contract as OKXRestClient.fetch_candle_pages: newest first, plus an exhausted flag."""
+        self.requests += 1
+        bar_ms, candles = self._series(inst_id, bar)
+        now_ms = int(self.clock() * 1000)
+        timestamps = candles['timestamp']
+        visible = timestamps <= now_ms
+        if newer_than is not None:
+            visible &= timestamps > newer_than
+        if older_than is not None:
+            visible &= timestamps < older_than
+        selected = candles[visible]
+        exhausted = True
+        if max_candles is not None and len(selected) > math.ceil(max_candles):
+            selected = selected[-math.ceil(max_candles):]
+            exhausted = False
+
+        rows = [
+            [str(int(c['timestamp'])), repr(float(c['open'])), repr(float(c['high'])), repr(float(c['low'])),
+             repr(float(c['close'])), repr(float(c['volume'])), '0', '0',
+             '1' if int(c['timestamp']) + bar_ms <= now_ms else '0']
+            for c in selected[::-1]
+        ]
+        return rows, exhausted
+
+    async def fetch_many(self, jobs: List[Dict[str, Any]]) -> List[Any]:
+        return await asyncio.gather(*(self.fetch_candle_pages(**job) for job in jobs), return_exceptions=True)
+
+class ReplayTickerStream:
+    """
+    Replays ticker updates into the shared price cache, standing in for OKXWebSocketClient.
+    Prices are seeded from a current_prices.json snapshot and then follow the close of the
+    latest recorded candle at the replay clock, refreshed every `interval` real seconds.
+    """
+    def __init__(self, price_cache: Dict, stop_event: threading.Event, recordings: Dict[str, List[Recording]],
+                 clock: Callable[[], float], snapshot_path: Optional[Path] = None, interval: float = 1.0):
+        self.price_cache = price_cache
+        self._stop_event = stop_event
+        self.recordings = recordings
+        self.clock = clock
+        self.snapshot_path = snapshot_path
+        self.interval = interval
+        self.is_connected = False
+
+    def _seed_from_snapshot(self, symbols: List[str]):
+        if self.snapshot_path is None or not Path(self.snapshot_path).exists():
+            return
+        with open(self.snapshot_path) as f:
+            prices = json.load(f).get('prices', {})
+        for symbol in symbols:
+            if symbol in prices:
+                self.price_cache[symbol] = {'symbol': symbol, **prices[symbol]}
+
+    def publish(self, symbols: List[str]):
+        """Pushes one ticker update per symbol for the current replay time."""
+        now_ms = int(self.clock() * 1000)
+        for symbol in symbols:
+            series = self.recordings.get(symbol)
+            if not series:
+                continue
+            candles = series[0][2]
+            index = int(np.searchsorted(candles['timestamp'], now_ms, side='right')) - 1
+            if index < 0:
+                continue
+            self.price_cache[symbol] = {
+                'symbol': symbol,
+                'price': float(candles['close'][index]),
+                'timestamp': now_ms,
+                'last_update': datetime.fromtimestamp(now_ms / 1000).isoformat()
+            }
+
+    def start(self, symbols: List[str] = None):
+        """Starts replaying tickers in a daemon thread."""
+        if symbols is None:
+            symbols = list(self.recordings)
+        self._seed_from_snapshot(symbols)
+
+        def run_loop():
+            self.is_connected = True
+            while not self._stop_event.is_set():
+                self.publish(symbols)
+                self._stop_event.wait(self.interval)
+            self.is_connected = False
+
+        threading.Thread(target=run_loop, name='replay-ticker-stream', daemon=True).start()
+        logger.info(f"✅ Replay ticker stream started for {len(symbols)} symbols.")
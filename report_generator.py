@@ -70,7 +70,7 @@ def _format_sr(analysis: Dict, current_price: float) -> str:
     return f"<b>🟢 مناطق الطلب والدعوم:</b>\n{demand_text}\n<b>🔴 مناطق العرض والمقاومات:</b>\n{supply_text}"
 
 
-def _format_timeframe_analysis(result: Dict, priority: int) -> str:
+def format_timeframe_section(result: Dict, priority: int) -> str:
     bot = result.get('bot')
     if not bot: return ""
     rec, analysis = bot.final_recommendation, bot.analysis_results
@@ -246,6 +246,36 @@ def _format_executive_summary(ranked_results: list, current_price: float) -> str
 
     return summary_text
 
+CANONICAL_TIMEFRAME_ORDER = ['1d', '4h', '2h', '1h', '30m', '15m', '5m', '3m', '1m']
+
+def _timeframe_sort_key(timeframe: str) -> int:
+    return CANONICAL_TIMEFRAME_ORDER.index(timeframe) if timeframe in CANONICAL_TIMEFRAME_ORDER else 99
+
+def timeframe_priority(timeframe: str, timeframes: list) -> int:
+    """Position of a timeframe's section in the report when all of `timeframes` succeed."""
+    return sorted(timeframes, key=_timeframe_sort_key).index(timeframe)
+
+def format_report_header(symbol: str, analysis_type: str, current_price: float) -> str:
+    return f"""💎 <b>تحليل فني شامل - {symbol.replace("/", "/")}</b> 💎
+
+📊 <b>معلومات عامة</b>
+- <b>المنصة:</b> OKX Exchange
+- <b>التاريخ والوقت:</b> {datetime.now().strftime("%Y-%m-%d | %H:%M:%S")}  
+- <b>السعر الحالي:</b> <code>${current_price:,.2f}</code>  
+- <b>نوع التحليل:</b> {analysis_type}
+"""
+
+def format_report_footer(sorted_results: list, current_price: float) -> str:
+    """The executive summary over every timeframe, then the disclaimer."""
+    return _format_executive_summary(sorted_results, current_price) + """
+---
+📝 <b>إخلاء المسؤولية</b>
+<i>هذا التحليل مبني على الاستراتيجية الفنية الشاملة. <b>ليس نصيحة استثمارية</b> ويجب إجراء البحث الخاص قبل اتخاذ أي قرارات مالية.</i>
+"""
+
+def sort_by_timeframe(results: list) -> list:
+    return sorted(results, key=lambda result: _timeframe_sort_key(result['bot'].final_recommendation.get('timeframe', 'N/A')))
+
 def generate_final_report_text(symbol: str, analysis_type: str, ranked_results: list) -> str:
     """Generates the final, detailed, and fully dynamic technical analysis report."""
     if not ranked_results or not any(r.get('success') for r in ranked_results):
@@ -258,30 +288,11 @@ def generate_final_report_text(symbol: str, analysis_type: str, ranked_results:
     first_bot = successful_results[0].get('bot')
     current_price = first_bot.final_recommendation.get('current_price', 0)
     
-    report = f"""💎 <b>تحليل فني شامل - {symbol.replace("/", "/")}</b> 💎
-
-📊 <b>معلومات عامة</b>
-- <b>المنصة:</b> OKX Exchange
-- <b>التاريخ والوقت:</b> {datetime.now().strftime("%Y-%m-%d | %H:%M:%S")}  
-- <b>السعر الحالي:</b> <code>${current_price:,.2f}</code>  
-- <b>نوع التحليل:</b> {analysis_type}
-"""
-    canonical_order = ['1d', '4h', '2h', '1h', '30m', '15m', '5m', '3m', '1m']
-
-    def get_sort_key(result):
-        timeframe = result['bot'].final_recommendation.get('timeframe', 'N/A')
-        return canonical_order.index(timeframe) if timeframe in canonical_order else 99
-
-    sorted_results = sorted(successful_results, key=get_sort_key)
+    report = format_report_header(symbol, analysis_type, current_price)
+    sorted_results = sort_by_timeframe(successful_results)
 
     for i, result in enumerate(sorted_results):
-        report += _format_timeframe_analysis(result, priority=i)
+        report += format_timeframe_section(result, priority=i)
 
-    report += _format_executive_summary(sorted_results, current_price)
-    
-    report += """
----
-📝 <b>إخلاء المسؤولية</b>
-<i>هذا التحليل مبني على الاستراتيجية الفنية الشاملة. <b>ليس نصيحة استثمارية</b> ويجب إجراء البحث الخاص قبل اتخاذ أي قرارات مالية.</i>
-"""
+    report += format_report_footer(sorted_results, current_price)
     return report
@@ -0,0 +1,49 @@
+import numpy as np
+
+from candle_store import CANDLE_DTYPE, empty_candles
+
+def can_resample(source_ms: int, source_offset_ms: int, target_ms: int, target_offset_ms: int) -> bool:
+    """True if every target bar is made of whole source bars (sizes and bar boundaries line up)."""
+    return (
+        target_ms > source_ms
+        and target_ms % source_ms == 0
+        and (target_offset_ms - source_offset_ms) % source_ms == 0
+    )
+
+def resample_candles(candles: np.ndarray, source_ms: int, target_ms: int, target_offset_ms: int = 0) -> np.ndarray:
+    """
+    Aggregates sorted candles of one bar size into larger bars, vectorized.
+    Target bars open where (timestamp + target_offset_ms) is a multiple of target_ms,
+    matching OKX's bar boundaries (e.g. an 8h offset for Hong Kong-aligned daily bars).
+
+    A leading target bar that is missing some of its source bars is dropped; the trailing
+    bar is kept even if still in progress, just like the exchange's own latest candle.
+    """
+    if len(candles) == 0:
+        return empty_candles()
+
+    timestamps = candles['timestamp']
+    buckets = (timestamps + target_offset_ms) // target_ms
+    starts = np.flatnonzero(np.concatenate(([True], buckets[1:] != buckets[:-1])))
+    ends = np.concatenate((starts[1:], [len(candles)])) - 1
+
+    resampled = np.empty(len(starts), dtype=CANDLE_DTYPE)
+    resampled['timestamp'] = buckets[starts] * target_ms - target_offset_ms
+    resampled['open'] = candles['open'][starts]
+    resampled['high'] = np.maximum.reduceat(candles['high'], starts)
+    resampled['low'] = np.minimum.reduceat(candles['low'], starts)
+    resampled['close'] = candles['close'][ends]
+    resampled['volume'] = np.add.reduceat(candles['volume'], starts)
+
+    if timestamps[0] != resampled['timestamp'][0]:
+        resampled = resampled[1:]
+    return resampled
+
+def last_complete_open(resampled: np.ndarray, target_ms: int, source_confirmed_until: int, source_ms: int) -> int:
+    """
+    Returns the open timestamp of the newest resampled bar whose source bars are all
+    confirmed, or -1 if there is none.
+    """
+    confirmed_end = source_confirmed_until + source_ms
+    complete = resampled['timestamp'] + target_ms <= confirmed_end
+    return int(resampled['timestamp'][complete][-1]) if complete.any() else -1
@@ -3,41 +3,140 @@ import os
 import argparse
 from datetime import datetime
 import time
-import copy
 import traceback
+import contextlib
+import hashlib
+import json
 import concurrent.futures
-from typing import List, Optional
+from functools import partial
+from typing import Callable, Dict, List, Optional, Tuple
 import threading
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from main_bot import ComprehensiveTradingBot
+from main_bot import ComprehensiveTradingBot, analyse_shared_candles, warm_analysis_worker
+from bounded_cache import BoundedCache
+from module_executor import SharedMarketData, get_executor, shutdown_executors
+from scan_scheduler import ScanScheduler
 from config import get_config, WATCHLIST
-from telegram_sender import send_telegram_message
-from report_generator import generate_final_report_text
+from telegram_sender import TelegramSendQueue
+from report_generator import (format_report_footer, format_report_header, format_timeframe_section,
+                              generate_final_report_text, sort_by_timeframe, timeframe_priority)
 from okx_data import OKXDataFetcher, validate_symbol_timeframe
+from indicators import IndicatorStateBook, jit
 
-def run_analysis_for_timeframe(symbol: str, timeframe: str, config: dict, okx_fetcher: OKXDataFetcher) -> dict:
-    """Runs the complete analysis for a single symbol on a specific timeframe."""
+def _create_timeframe_bot(symbol: str, timeframe: str, config: dict, okx_fetcher: OKXDataFetcher) -> ComprehensiveTradingBot:
+    # Only the trading section differs per timeframe; the rest is shared read-only
+    timeframe_config = {**config, 'trading': {**config['trading'], 'INTERVAL': timeframe}}
+    return ComprehensiveTradingBot(symbol=symbol, timeframe=timeframe, config=timeframe_config, okx_fetcher=okx_fetcher)
+
+def _failed_analysis(symbol: str, timeframe: str, e: Exception) -> dict:
+    error_message = f"❌ Exception during analysis of {symbol} on {timeframe}. Error: {type(e).__name__}: {str(e)}"
+    print(error_message)
+    # We don't print the full traceback for validation and fetch errors as they are expected.
+    if not isinstance(e, (ValueError, ConnectionError)):
+        traceback.print_exception(e)
+    return {'success': False, 'timeframe': timeframe, 'error': error_message}
+
+def run_analysis_for_timeframe(symbol: str, timeframe: str, config: dict, okx_fetcher: OKXDataFetcher,
+                               bot: Optional[ComprehensiveTradingBot] = None) -> dict:
+    """
+    Runs the complete analysis for a single symbol on a specific timeframe.
+    A bot already prepared by a scan's fetch stage skips fetching and indicator calculation.
+    On success 'bot' holds the AnalysisSummary (the bot's results without its candles).
+    """
     try:
         # First, validate if the timeframe is supported for the symbol
         validate_symbol_timeframe(symbol, timeframe)
 
         print(f"--- ⏳ Analyzing {symbol} on {timeframe} ---")
-        timeframe_config = copy.deepcopy(config)
-        timeframe_config['trading']['INTERVAL'] = timeframe
-        
-        bot = ComprehensiveTradingBot(symbol=symbol, timeframe=timeframe, config=timeframe_config, okx_fetcher=okx_fetcher)
+        if bot is None:
+            bot = _create_timeframe_bot(symbol, timeframe, config, okx_fetcher)
         bot.run_complete_analysis()
         bot.final_recommendation['timeframe'] = timeframe
-        return {'success': True, 'bot': bot}
+        return {'success': True, 'bot': bot.summary()}
     except Exception as e:
-        error_message = f"❌ Exception during analysis of {symbol} on {timeframe}. Error: {type(e).__name__}: {str(e)}"
-        print(error_message)
-        # We don't print the full traceback for validation errors as they are expected.
-        if not isinstance(e, ValueError):
-            traceback.print_exc()
-        return {'success': False, 'timeframe': timeframe, 'error': error_message}
+        return _failed_analysis(symbol, timeframe, e)
+
+def _prepare_scan_batch(batch: List[Tuple[str, List[str]]], config: dict,
+                        okx_fetcher: OKXDataFetcher) -> Tuple[Dict[Tuple[str, str], dict], Dict[Tuple[str, str], ComprehensiveTradingBot]]:
+    """
+    The I/O stage of a scan: fetches the batch's supported pairs in one go and batch-calculates
+    their indicators. Returns the failed pairs' results and the bots ready for analysis.
+    """
+    failures, bots, pairs = {}, {}, []
+    for symbol, timeframes in batch:
+        for tf in timeframes:
+            try:
+                validate_symbol_timeframe(symbol, tf)
+            except ValueError as e:
+                failures[(symbol, tf)] = _failed_analysis(symbol, tf, e)
+                continue
+            pairs.append((symbol, tf))
+    for (symbol, tf), bot in _prepare_bots(pairs, config, okx_fetcher).items():
+        if bot is None:
+            failures[(symbol, tf)] = _failed_analysis(symbol, tf, ConnectionError(f"Failed to fetch data for {symbol}"))
+        else:
+            bots[(symbol, tf)] = bot
+    return failures, bots
+
+def _submit_analysis(executor: concurrent.futures.Executor, mode: str, config: dict, okx_fetcher: OKXDataFetcher,
+                     symbol: str, timeframe: str, bot: ComprehensiveTradingBot) -> concurrent.futures.Future:
+    """
+    Submits one prepared bot's analysis and returns a Future of its run_analysis_for_timeframe
+    result. In process mode the candles go through a shared-memory block and only an
+    AnalysisSummary comes back from the worker.
+    """
+    if mode != 'process':
+        return executor.submit(run_analysis_for_timeframe, symbol, timeframe, config, okx_fetcher, bot)
+
+    print(f"--- ⏳ Analyzing {symbol} on {timeframe} ---")
+    shared = SharedMarketData(bot.market_data)
+    live_price = okx_fetcher.get_cached_price(symbol.replace('/', '-'))
+    result = concurrent.futures.Future()
+
+    def finished(future: concurrent.futures.Future):
+        shared.close()
+        try:
+            result.set_result({'success': True, 'bot': future.result()})
+        except Exception as e:
+            result.set_result(_failed_analysis(symbol, timeframe, e))
+
+    executor.submit(analyse_shared_candles, shared.spec, symbol, timeframe, bot.config, live_price).add_done_callback(finished)
+    return result
+
+def scan_watchlist(jobs: List[Tuple[str, List[str]]], config: dict, okx_fetcher: OKXDataFetcher,
+                   report: Callable[[str, List[dict]], None],
+                   on_result: Optional[Callable[[str, str, dict], None]] = None):
+    """
+    Analyses every (symbol, timeframes) job on one bounded pool while the next symbols are
+    fetched, and calls report(symbol, results) once a symbol's timeframes are all done.
+    ANALYSIS_CONFIG picks threads or worker processes (TIMEFRAME_EXECUTOR), the pool size
+    (TIMEFRAME_WORKERS), how many symbols are fetched per batch and ahead of the analyses
+    (SCAN_BATCH_SYMBOLS, SCAN_MAX_PENDING_BATCHES) and the report order (SCAN_ORDER).
+    on_result(symbol, timeframe, result) is called for each timeframe as soon as it is done.
+    """
+    analysis_config = config['analysis']
+    mode = analysis_config.get('TIMEFRAME_EXECUTOR', 'thread')
+    workers = analysis_config.get('TIMEFRAME_WORKERS')
+    if mode == 'process':
+        # The long-lived shared pool; it is shut down with shutdown_executors()
+        pool = contextlib.nullcontext(get_executor('process', workers, initializer=warm_analysis_worker))
+    else:
+        pool = concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix='timeframe-analysis')
+
+    with pool as executor:
+        scheduler = ScanScheduler(
+            prepare=partial(_prepare_scan_batch, config=config, okx_fetcher=okx_fetcher),
+            analyse=partial(_submit_analysis, executor, mode, config, okx_fetcher),
+            report=report,
+            on_error=_failed_analysis,
+            batch_size=analysis_config.get('SCAN_BATCH_SYMBOLS', 1),
+            max_pending=analysis_config.get('SCAN_MAX_PENDING_BATCHES', 2),
+            order=analysis_config.get('SCAN_ORDER', 'watchlist'),
+            on_result=on_result,
+        )
+        scheduler.run(jobs)
 
 def rank_opportunities(results: list) -> list:
     """
@@ -62,6 +161,26 @@ def rank_opportunities(results: list) -> list:
             res['rank_score'] = -1
     return sorted(results, key=lambda x: x.get('rank_score', -1), reverse=True)
 
+def _prefetch(bots: List[ComprehensiveTradingBot], okx_fetcher: OKXDataFetcher):
+    if bots:
+        print(f"📥 Prefetching {len(bots)} candle windows for {len({bot.symbol for bot in bots})} symbols...")
+        okx_fetcher.fetch_many([bot.get_fetch_request() for bot in bots])
+
+# Streaming indicator state per (symbol, timeframe), kept across scans so a rescan only
+# feeds the candles that closed since the last one
+_indicator_book = IndicatorStateBook()
+
+def _prepare_bots(pairs: List[Tuple[str, str]], config: dict, okx_fetcher: OKXDataFetcher) -> Dict[Tuple[str, str], Optional[ComprehensiveTradingBot]]:
+    """Fetches the given pairs in one batch and batch-calculates their indicators; pairs that failed to fetch map to None."""
+    bots = {pair: _create_timeframe_bot(pair[0], pair[1], config, okx_fetcher) for pair in pairs}
+    _prefetch(list(bots.values()), okx_fetcher)
+    for pair, bot in bots.items():
+        if not bot.fetch_data():
+            bots[pair] = None
+    state_book = _indicator_book if config.get('analysis', {}).get('STREAMING_INDICATORS') else None
+    ComprehensiveTradingBot.prepare_batch([bot for bot in bots.values() if bot is not None], state_book=state_book)
+    return bots
+
 def get_top_20_symbols(okx_fetcher: OKXDataFetcher) -> List[str]:
     """Fetches all tickers and returns the top 20 by USDT volume."""
     # This functionality is simplified as the main focus is the bot's analysis engine.
@@ -69,38 +188,148 @@ def get_top_20_symbols(okx_fetcher: OKXDataFetcher) -> List[str]:
     # In a real scenario, this would involve a call to okx_fetcher
     return WATCHLIST
 
+# Finished multi-timeframe analyses keyed by (symbol, timeframes, config fingerprint); an
+# entry expires when the candle of its fastest timeframe closes and holds the ranked
+# results plus the reports already formatted from them. The cache runs on the fetcher's
+# clock, so replayed candles expire on replay time.
+_analysis_cache = BoundedCache(max_entries=128)
+_inflight_analyses: Dict[Tuple, concurrent.futures.Future] = {}
+_inflight_lock = threading.Lock()
+_coalesced_analyses = 0
+
+def _config_fingerprint(config: dict) -> str:
+    """A digest of the settings that change analysis results."""
+    settings = json.dumps({section: config.get(section) for section in ('trading', 'analysis')}, sort_keys=True, default=str)
+    return hashlib.blake2b(settings.encode(), digest_size=16).hexdigest()
+
+def _next_close(timeframes: List[str], okx_fetcher: OKXDataFetcher) -> float:
+    """When (fetcher clock, seconds) the candle in progress of the fastest timeframe closes."""
+    now_ms = int(okx_fetcher.clock() * 1000)
+    return min(okx_fetcher.bar_bounds(ComprehensiveTradingBot.okx_bar(tf), now_ms)[1] for tf in timeframes) / 1000
+
+def _cached_symbol_analysis(symbol: str, timeframes: List[str], config: dict, okx_fetcher: OKXDataFetcher,
+                            on_result: Optional[Callable[[str, str, dict], None]] = None) -> dict:
+    """
+    Returns {'ranked_results': [...], 'reports': {analysis_type: text}} for a symbol's
+    timeframes, from the cache when possible. Concurrent requests for the same key wait for
+    the one analysis in progress instead of starting their own. on_result only sees the
+    timeframes of an analysis this call runs itself.
+    """
+    global _coalesced_analyses
+    key = (symbol, tuple(timeframes), _config_fingerprint(config))
+    _analysis_cache.clock = okx_fetcher.clock
+    entry = _analysis_cache.get(key)
+    if entry is not None:
+        return entry
+    with _inflight_lock:
+        future = _inflight_analyses.get(key)
+        leader = future is None
+        if leader:
+            future = _inflight_analyses[key] = concurrent.futures.Future()
+        else:
+            _coalesced_analyses += 1
+    if not leader:
+        return future.result()
+
+    try:
+        # Valid until the candle that is in progress now closes, however long the analysis takes
+        expires_at = _next_close(timeframes, okx_fetcher)
+        print(f"📊 Starting PARALLEL analysis for {symbol} on {len(timeframes)} timeframes: {timeframes}...")
+        results = []
+        scan_watchlist([(symbol, timeframes)], config, okx_fetcher, lambda _, scanned: results.extend(scanned), on_result)
+        successful_results = [r for r in results if r.get('success')]
+        entry = {'ranked_results': rank_opportunities(successful_results), 'reports': {}}
+        # A failed fetch is retried on the next request rather than cached until the close
+        if successful_results and okx_fetcher.clock() < expires_at:
+            _analysis_cache.set(key, entry, expires_at=expires_at)
+        future.set_result(entry)
+        return entry
+    except Exception as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _inflight_lock:
+            del _inflight_analyses[key]
+
+def _requested_timeframes(config: dict, timeframes_to_analyze: Optional[List[str]]) -> List[str]:
+    if timeframes_to_analyze:
+        return timeframes_to_analyze
+    return config['trading'].get('TIMEFRAMES_TO_ANALYZE', ['1d'])
+
+def get_ranked_results_for_symbol(symbol: str, config: dict, okx_fetcher: OKXDataFetcher,
+                                  timeframes_to_analyze: Optional[List[str]] = None) -> List[dict]:
+    """The symbol's successful timeframe results, best first (cached like get_ranked_analysis_for_symbol)."""
+    return _cached_symbol_analysis(symbol, _requested_timeframes(config, timeframes_to_analyze), config, okx_fetcher)['ranked_results']
+
 def get_ranked_analysis_for_symbol(symbol: str, config: dict, okx_fetcher: OKXDataFetcher, timeframes_to_analyze: Optional[List[str]] = None, analysis_type: str = "تحليل مخصص") -> str:
     """
     Performs multi-timeframe analysis in parallel and returns a single, formatted report string.
+    The timeframes are fetched in one batch and analysed through scan_watchlist. The result
+    is reused until the next candle close of the fastest timeframe for the same symbol,
+    timeframes and configuration.
     """
-    if timeframes_to_analyze:
-        timeframes = timeframes_to_analyze
+    entry = _cached_symbol_analysis(symbol, _requested_timeframes(config, timeframes_to_analyze), config, okx_fetcher)
+    report = entry['reports'].get(analysis_type)
+    if report is None:
+        report = entry['reports'][analysis_type] = _format_ranked_report(symbol, analysis_type, entry['ranked_results'])
+    return report
+
+def stream_ranked_analysis_for_symbol(symbol: str, config: dict, okx_fetcher: OKXDataFetcher, send: Callable[[str], None],
+                                      timeframes_to_analyze: Optional[List[str]] = None, analysis_type: str = "تحليل مخصص") -> str:
+    """
+    Streaming variant of get_ranked_analysis_for_symbol: send() receives the report header
+    with the first finished timeframe's section, then every other section as soon as its
+    timeframe is done, and finally the executive summary. Returns the complete report.
+    """
+    timeframes = _requested_timeframes(config, timeframes_to_analyze)
+    sent = []
+
+    def send_section(_, timeframe: str, result: dict):
+        if not result.get('success'):
+            return
+        section = format_timeframe_section(result, timeframe_priority(timeframe, timeframes))
+        if not sent:
+            current_price = result['bot'].final_recommendation.get('current_price', 0)
+            section = format_report_header(symbol, analysis_type, current_price) + section
+        send(section)
+        sent.append(timeframe)
+
+    entry = _cached_symbol_analysis(symbol, timeframes, config, okx_fetcher, on_result=send_section)
+    ranked_results = entry['ranked_results']
+    # Served from the cache or by another request's analysis: send what was not streamed
+    for result in sort_by_timeframe(ranked_results):
+        timeframe = result['bot'].final_recommendation.get('timeframe')
+        if timeframe not in sent:
+            send_section(symbol, timeframe, result)
+
+    if ranked_results:
+        current_price = ranked_results[0]['bot'].final_recommendation.get('current_price', 0)
+        send(format_report_footer(sort_by_timeframe(ranked_results), current_price))
     else:
-        timeframes = config['trading'].get('TIMEFRAMES_TO_ANALYZE', ['1d'])
+        send(_format_ranked_report(symbol, analysis_type, ranked_results))
 
-    print(f"📊 Starting PARALLEL analysis for {symbol} on {len(timeframes)} timeframes: {timeframes}...")
+    report = entry['reports'].get(analysis_type)
+    if report is None:
+        report = entry['reports'][analysis_type] = _format_ranked_report(symbol, analysis_type, ranked_results)
+    return report
 
-    all_timeframe_results = []
-    with concurrent.futures.ThreadPoolExecutor(max_workers=len(timeframes)) as executor:
-        future_to_tf = {executor.submit(run_analysis_for_timeframe, symbol, tf, config, okx_fetcher): tf for tf in timeframes}
-        for future in concurrent.futures.as_completed(future_to_tf):
-            tf = future_to_tf[future]
-            try:
-                result = future.result()
-                all_timeframe_results.append(result)
-            except Exception as exc:
-                print(f'❌ Timeframe {tf} for {symbol} generated an exception: {exc}')
-                # Optionally, append a failure result to still show it in the report
-                all_timeframe_results.append({'success': False, 'timeframe': tf, 'error': str(exc)})
+def get_analysis_cache_stats() -> Dict:
+    """Hit/miss counters of the ranked-analysis cache, its hit rate and the requests that joined a running analysis."""
+    stats = _analysis_cache.get_stats()
+    lookups = stats['hits'] + stats['misses']
+    return {**stats, 'coalesced': _coalesced_analyses, 'hit_rate': stats['hits'] / lookups if lookups else 0.0}
 
+def build_ranked_report(symbol: str, analysis_type: str, all_timeframe_results: List[dict]) -> str:
+    """Ranks one symbol's timeframe results and formats them into a single report string."""
     # Filter out only successful results for ranking, but we could also rank failures low
     successful_results = [r for r in all_timeframe_results if r.get('success')]
-    if not successful_results:
+    return _format_ranked_report(symbol, analysis_type, rank_opportunities(successful_results))
+
+def _format_ranked_report(symbol: str, analysis_type: str, ranked_results: List[dict]) -> str:
+    if not ranked_results:
          # If all timeframes failed, return an error report
          return f"❌ تعذر تحليل {symbol} لجميع الأطر الزمنية المطلوبة."
 
-    ranked_results = rank_opportunities(successful_results)
-
     final_report = generate_final_report_text(
         symbol=symbol,
         analysis_type=analysis_type,
@@ -118,9 +347,16 @@ def _setup_analysis_parameters(config: dict) -> tuple:
     analysis_group.add_argument('--long', action='store_true', help='Run long-term analysis')
     analysis_group.add_argument('--medium', action='store_true', help='Run medium-term analysis')
     analysis_group.add_argument('--short', action='store_true', help='Run short-term analysis')
+    parser.add_argument('--replay', metavar='DIR', help='Replay recorded data from DIR instead of connecting to OKX')
+    parser.add_argument('--replay-speed', type=float, default=None, help='Replay clock speed (0 freezes the clock)')
 
     args = parser.parse_args()
 
+    if args.replay:
+        config['data'] = {**config['data'], 'DATA_SOURCE': 'replay', 'REPLAY_DIR': args.replay}
+        if args.replay_speed is not None:
+            config['data']['REPLAY_SPEED'] = args.replay_speed
+
     timeframe_groups = config['trading']['TIMEFRAME_GROUPS']
     if args.long:
         analysis_type = "استثمار طويل المدى (1D - 4H - 1H)"
@@ -143,25 +379,34 @@ def main():
     """Main function to run the bot."""
     config = get_config()
     symbols_to_analyze, timeframes, analysis_type = _setup_analysis_parameters(config)
+    # Compile the indicator kernels while the fetcher starts up
+    jit.configure(config['analysis'].get('INDICATOR_JIT', True))
 
     print("🚀 Initializing OKX Data Fetcher...")
-    okx_fetcher = OKXDataFetcher()
+    okx_fetcher = OKXDataFetcher(config=config.get('data'))
     okx_symbols = [s.replace('/', '-') for s in symbols_to_analyze]
     okx_fetcher.start_data_services(okx_symbols)
 
-    print("⏳ Waiting 10 seconds for initial data...")
-    time.sleep(10)
+    if okx_fetcher.data_source == 'okx':
+        print("⏳ Waiting 10 seconds for initial data...")
+        time.sleep(10)
+
+    # Reports are sent from a background thread, within Telegram's rate limits, while the scan goes on
+    sender = TelegramSendQueue()
+
+    def report(symbol: str, results: List[dict]):
+        final_report = build_ranked_report(symbol, analysis_type, results)
+        print(final_report)
+        sender.send(final_report)
 
     try:
-        for symbol in symbols_to_analyze:
-            final_report = get_ranked_analysis_for_symbol(symbol, config, okx_fetcher, timeframes, analysis_type)
-            print(final_report)
-            send_telegram_message(final_report)
-            if len(symbols_to_analyze) > 1:
-                time.sleep(5)
+        # Every symbol's timeframes go to one pool; the next symbols are fetched meanwhile
+        scan_watchlist([(symbol, timeframes) for symbol in symbols_to_analyze], config, okx_fetcher, report)
     finally:
+        sender.close()
         print("⏹️ Stopping OKX Data Fetcher...")
         okx_fetcher.stop()
+        shutdown_executors()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,139 @@
+import logging
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+SCAN_ORDERS = ('watchlist', 'completed')
+
+# (symbol, timeframes to analyse)
+ScanJob = Tuple[str, List[str]]
+Pair = Tuple[str, str]
+
+class ScanScheduler:
+    """
+    Pipelines a watchlist scan: batches of symbols are fetched and prepared on an I/O
+    thread while the analyses of earlier batches run on one bounded analysis pool.
+
+    - `prepare(batch)` fetches a batch of ScanJobs and returns (results, items): final
+      results for pairs that cannot be analysed and the prepared items of the others.
+    - `analyse(symbol, timeframe, item)` submits one analysis and returns its Future.
+    - `report(symbol, results)` receives a symbol's results in its timeframe order.
+    - `on_error(symbol, timeframe, exc)` turns a failed analysis into a result.
+    - `on_result(symbol, timeframe, result)`, if given, sees every result as soon as it is in.
+
+    At most `max_pending` batches are fetched ahead of the analyses (backpressure), and
+    `order` reports symbols in watchlist order or as soon as they complete.
+    """
+    def __init__(self, prepare: Callable[[List[ScanJob]], Tuple[Dict[Pair, Any], Dict[Pair, Any]]],
+                 analyse: Callable[[str, str, Any], Future], report: Callable[[str, List[Any]], None],
+                 on_error: Callable[[str, str, Exception], Any], batch_size: int = 1, max_pending: int = 2,
+                 order: str = 'watchlist', on_result: Optional[Callable[[str, str, Any], None]] = None):
+        if order not in SCAN_ORDERS:
+            raise ValueError(f"Unknown scan order '{order}', expected one of {SCAN_ORDERS}.")
+        self.prepare = prepare
+        self.analyse = analyse
+        self.report = report
+        self.on_error = on_error
+        self.batch_size = max(int(batch_size), 1)
+        self.max_pending = max(int(max_pending), 1)
+        self.order = order
+        self.on_result = on_result
+
+    @staticmethod
+    def _merge_jobs(jobs: Sequence[ScanJob]) -> List[ScanJob]:
+        """One job per symbol, in first-seen order, with the union of its timeframes."""
+        merged: Dict[str, List[str]] = {}
+        for symbol, tfs in jobs:
+            merged.setdefault(symbol, []).extend(tfs)
+        return [(symbol, list(dict.fromkeys(tfs))) for symbol, tfs in merged.items()]
+
+    def run(self, jobs: Sequence[ScanJob]):
+        # A symbol listed twice would be analysed and reported twice over one result slot
+        jobs = self._merge_jobs(jobs)
+        batches = deque(list(jobs[i:i + self.batch_size]) for i in range(0, len(jobs), self.batch_size))
+        timeframes = dict(jobs)
+        order = [symbol for symbol, _ in jobs]
+        results: Dict[str, Dict[str, Any]] = {symbol: {} for symbol in order}
+        # batch number -> symbols of it still being analysed
+        open_batches: Dict[int, set] = {}
+        batch_of: Dict[str, int] = {}
+        completed: set = set()
+        next_report = 0
+        futures: Dict[Future, Tuple[str, Any]] = {}
+        batch_number = 0
+
+        def submit_fetches():
+            nonlocal batch_number
+            while batches and len(open_batches) < self.max_pending:
+                batch = batches.popleft()
+                open_batches[batch_number] = {symbol for symbol, _ in batch}
+                for symbol, _ in batch:
+                    batch_of[symbol] = batch_number
+                futures[fetcher.submit(self.prepare, batch)] = ('prepare', batch)
+                batch_number += 1
+
+        def record(symbol: str, timeframe: str, result: Any):
+            nonlocal next_report
+            results[symbol][timeframe] = result
+            if self.on_result is not None and timeframe is not None:
+                self._notify(symbol, timeframe, result)
+            if len(results[symbol]) < len(timeframes[symbol]):
+                return
+            completed.add(symbol)
+            batch = open_batches[batch_of[symbol]]
+            batch.discard(symbol)
+            if not batch:
+                del open_batches[batch_of[symbol]]
+            if self.order == 'completed':
+                self._report(symbol, timeframes[symbol], results.pop(symbol))
+                return
+            while next_report < len(order) and order[next_report] in completed:
+                symbol = order[next_report]
+                self._report(symbol, timeframes[symbol], results.pop(symbol))
+                next_report += 1
+
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix='scan-fetch') as fetcher:
+            submit_fetches()
+            while futures:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    kind, payload = futures.pop(future)
+                    if kind == 'prepare':
+                        try:
+                            ready, items = future.result()
+                        except Exception as e:
+                            ready = {(symbol, tf): self.on_error(symbol, tf, e) for symbol, tfs in payload for tf in tfs}
+                            items = {}
+                        for (symbol, tf), item in items.items():
+                            try:
+                                futures[self.analyse(symbol, tf, item)] = ('analyse', (symbol, tf))
+                            except Exception as e:
+                                ready[(symbol, tf)] = self.on_error(symbol, tf, e)
+                        for (symbol, tf), result in ready.items():
+                            record(symbol, tf, result)
+                        # A symbol without any timeframe to analyse is complete straight away
+                        for symbol, tfs in payload:
+                            if not tfs:
+                                record(symbol, None, None)
+                    else:
+                        symbol, tf = payload
+                        try:
+                            result = future.result()
+                        except Exception as e:
+                            result = self.on_error(symbol, tf, e)
+                        record(symbol, tf, result)
+                submit_fetches()
+
+    def _notify(self, symbol: str, timeframe: str, result: Any):
+        try:
+            self.on_result(symbol, timeframe, result)
+        except Exception:
+            logger.exception(f"Result callback for {symbol} {timeframe} failed")
+
+    def _report(self, symbol: str, timeframes: List[str], results: Dict[str, Any]):
+        try:
+            self.report(symbol, [results[tf] for tf in timeframes])
+        except Exception:
+            logger.exception(f"Reporting {symbol} failed")
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 import os
 import re
@@ -8,9 +9,12 @@ from telegram.ext import Application, CommandHandler, CallbackQueryHandler, Cont
 
 # Import the analysis engine and config
 from config import get_config, WATCHLIST
-from run_bot import get_ranked_analysis_for_symbol
-from telegram_sender import send_telegram_message
+from run_bot import get_ranked_analysis_for_symbol, stream_ranked_analysis_for_symbol
+from analysis_daemon import AnalysisDaemon
+from analysis_jobs import AnalysisJobQueue
+from telegram_sender import send_telegram_message, split_html_message
 from okx_data import OKXDataFetcher
+from indicators import jit
 
 # --- Security: Add logging filter to hide token ---
 class TokenFilter(logging.Filter):
@@ -34,6 +38,8 @@ logger = logging.getLogger(__name__)
 bot_state = {"is_active": True}
 okx_fetcher = None # Global fetcher instance
 data_fetcher_thread = None # Global thread for the fetcher
+analysis_daemon = None # Background analyses, when ANALYSIS_DAEMON is enabled
+analysis_queue = None # Worker pool the analysis requests run on
 
 def get_main_keyboard() -> InlineKeyboardMarkup:
     """Creates the main interactive keyboard."""
@@ -151,25 +157,107 @@ async def main_button_callback(update: Update, context: ContextTypes.DEFAULT_TYP
         }
         analysis_name = analysis_type_map.get(analysis_type, "غير محدد")
 
-        await query.edit_message_text(
+        config = get_config()
+        timeframes = config['trading']['TIMEFRAME_GROUPS'].get(analysis_type)
+        if not timeframes:
+            await query.message.reply_text(f"خطأ: لم يتم العثور على مجموعة الإطارات الزمنية لـ {analysis_type}")
+            return
+
+        busy_text = "⏳ لديك تحليل قيد التنفيذ بالفعل. يرجى الانتظار حتى يكتمل."
+        if analysis_queue.active_jobs(query.message.chat_id) >= analysis_queue.max_jobs_per_chat:
+            await query.message.reply_text(busy_text)
+            return
+
+        progress_message = await query.edit_message_text(
             text=f"جاري إعداد <b>{analysis_name}</b> لـ <code>{symbol}</code>... قد يستغرق هذا بعض الوقت.",
             parse_mode='HTML'
         )
+        # With streaming, each timeframe's section replaces or follows this message as soon as it is ready
+        stream = TelegramReportStream(progress_message, asyncio.get_running_loop()) if config['telegram'].get('STREAM_REPORTS', True) else None
 
-        try:
-            config = get_config()
-            timeframes = config['trading']['TIMEFRAME_GROUPS'].get(analysis_type)
-            if not timeframes:
-                await query.message.reply_text(f"خطأ: لم يتم العثور على مجموعة الإطارات الزمنية لـ {analysis_type}")
+        # The analysis runs on the job queue; identical requests in progress share one job
+        future = analysis_queue.submit(query.message.chat_id, (symbol, analysis_type), build_analysis_report,
+                                       symbol, timeframes, analysis_name, config, stream)
+        if future is None:
+            await progress_message.edit_text(busy_text)
+            return
+        context.application.create_task(deliver_analysis_report(progress_message, symbol, future, stream))
+
+class TelegramReportStream:
+    """
+    Sends report parts from a worker thread through the bot's event loop: the first part
+    replaces the progress message, later parts follow it as new messages, in order.
+    Parts over Telegram's length limit are split. After a failed send nothing more is
+    sent and `failed` is set, so the caller can reply with an error instead.
+    """
+    def __init__(self, progress_message, loop: asyncio.AbstractEventLoop):
+        self.progress_message = progress_message
+        self.loop = loop
+        self.started = False
+        self.failed = False
+
+    def send(self, text: str):
+        if self.failed:
+            return
+        for part in split_html_message(text):
+            if self.started:
+                coroutine = self.progress_message.reply_text(text=part, parse_mode='HTML')
+            else:
+                coroutine = self.progress_message.edit_text(text=part, parse_mode='HTML')
+            try:
+                # Waiting keeps the parts in order; it only holds up this worker, not the event loop
+                asyncio.run_coroutine_threadsafe(coroutine, self.loop).result(timeout=30)
+            except Exception as e:
+                logger.warning(f"Could not send a report part: {e}")
+                self.failed = True
                 return
+            self.started = True
+
+def build_analysis_report(symbol: str, timeframes: list, analysis_name: str, config: dict, stream=None) -> str:
+    """Runs on the job queue's workers, never on the event loop."""
+    # Served from the background analyses when they cover every requested timeframe
+    final_report = analysis_daemon.report(symbol, analysis_name, timeframes) if analysis_daemon else None
+    if final_report is not None:
+        if stream is not None:
+            stream.send(final_report)
+        return final_report
+    if stream is not None:
+        return stream_ranked_analysis_for_symbol(symbol, config, okx_fetcher, stream.send, timeframes, analysis_name)
+    return get_ranked_analysis_for_symbol(symbol, config, okx_fetcher, timeframes, analysis_name)
 
-            final_report = get_ranked_analysis_for_symbol(symbol, config, okx_fetcher, timeframes, analysis_name)
+async def deliver_analysis_report(progress_message, symbol: str, future, stream=None) -> None:
+    """
+    Waits for an analysis job without blocking the event loop. Unless the job already
+    streamed the report into this chat (another chat's identical request does not), the
+    progress message is replaced with the report. If the analysis or the streaming
+    failed, the user gets an error reply instead.
+    """
+    error_text = f"حدث خطأ أثناء تحليل {symbol}. يرجى المحاولة مرة أخرى."
+    try:
+        final_report = await asyncio.wrap_future(future)
+    except Exception as e:
+        logger.error(f"Error during analysis for {symbol}: {e}", exc_info=True)
+        final_report = None
+
+    if final_report is None or (stream is not None and stream.failed):
+        if stream is not None and stream.started:
+            await progress_message.reply_text(error_text)
+        else:
+            await progress_message.edit_text(error_text)
+        return
 
-            await query.message.reply_text(text=final_report, parse_mode='HTML')
-            await query.message.reply_text(text=get_start_message_text(), reply_markup=get_main_keyboard(), parse_mode='HTML')
+    streamed = stream is not None and stream.started
+    if not streamed:
+        parts = split_html_message(final_report)
+        try:
+            await progress_message.edit_text(text=parts[0], parse_mode='HTML')
         except Exception as e:
-            logger.error(f"Error during analysis for {symbol}: {e}", exc_info=True)
-            await query.message.reply_text(f"حدث خطأ أثناء تحليل {symbol}. يرجى المحاولة مرة أخرى.")
+            # e.g. the progress message can no longer be edited
+            logger.warning(f"Could not edit the progress message for {symbol}: {e}")
+            await progress_message.reply_text(text=parts[0], parse_mode='HTML')
+        for part in parts[1:]:
+            await progress_message.reply_text(text=part, parse_mode='HTML')
+    await progress_message.reply_text(text=get_start_message_text(), reply_markup=get_main_keyboard(), parse_mode='HTML')
 
 def run_fetcher_service():
     """Function to run in a separate thread to manage the data fetcher."""
@@ -185,16 +273,19 @@ def run_fetcher_service():
 
 def main() -> None:
     """Main function to run the bot."""
-    global okx_fetcher, data_fetcher_thread
+    global okx_fetcher, data_fetcher_thread, analysis_daemon, analysis_queue
     config = get_config()
     token = config['telegram']['BOT_TOKEN']
     if not token:
         logger.error("CRITICAL: Telegram bot token not found in .env file. The bot cannot start.")
         return
 
+    # Compile the indicator kernels in the background while the services start
+    jit.configure(config['analysis'].get('INDICATOR_JIT', True))
+
     # Initialize and start the data fetcher
     logger.info("🚀 Initializing OKX Data Fetcher...")
-    okx_fetcher = OKXDataFetcher()
+    okx_fetcher = OKXDataFetcher(config=config.get('data'))
     
     data_fetcher_thread = threading.Thread(target=run_fetcher_service, daemon=True)
     data_fetcher_thread.start()
@@ -202,6 +293,16 @@ def main() -> None:
     logger.info("⏳ Waiting 5 seconds for initial data...")
     time.sleep(5)
 
+    if config['analysis'].get('ANALYSIS_DAEMON'):
+        # Every timeframe any analysis group can ask for
+        timeframes = list(dict.fromkeys(tf for group in config['trading']['TIMEFRAME_GROUPS'].values() for tf in group))
+        analysis_daemon = AnalysisDaemon(WATCHLIST, timeframes, config, okx_fetcher)
+        analysis_daemon.start()
+        logger.info("🔄 Background analysis daemon started.")
+
+    analysis_queue = AnalysisJobQueue(max_workers=config['telegram'].get('ANALYSIS_WORKERS', 2),
+                                      max_jobs_per_chat=config['telegram'].get('MAX_JOBS_PER_CHAT', 1))
+
     application = Application.builder().token(token).build()
     application.add_handler(CommandHandler("start", start_command))
     application.add_handler(CallbackQueryHandler(main_button_callback))
@@ -213,6 +314,9 @@ def main() -> None:
         logger.info("Bot shutdown requested.")
     finally:
         logger.info("⏹️ Stopping bot and data fetcher...")
+        analysis_queue.shutdown()
+        if analysis_daemon is not None:
+            analysis_daemon.stop()
 
 if __name__ == "__main__":
     import time
@@ -1,50 +1,294 @@
+import bisect
+import queue
+import re
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
 import requests
-import os
-from dotenv import load_dotenv
 
-def send_telegram_message(message: str):
+from config import TELEGRAM_CONFIG
+
+MAX_MESSAGE_LENGTH = 4096
+# Room kept in every part for the "part i/n" header
+PART_HEADER_RESERVE = 64
+
+_TAG = re.compile(r'<(/?)([a-zA-Z][\w-]*)[^>]*>')
+_PIECE = re.compile(r'(<[^>]*>|\n)')
+
+def _length(text: str) -> int:
+    """Telegram counts UTF-16 code units, so an emoji takes two."""
+    return len(text.encode('utf-16-le')) // 2
+
+def _apply_tags(stack: List[Tuple[str, str]], text: str) -> List[Tuple[str, str]]:
+    """The (name, opening tag) stack of still-open tags after `text`."""
+    stack = list(stack)
+    for match in _TAG.finditer(text):
+        closing, name = match.group(1), match.group(2).lower()
+        if not closing:
+            stack.append((name, match.group(0)))
+            continue
+        for i in range(len(stack) - 1, -1, -1):
+            if stack[i][0] == name:
+                del stack[i]
+                break
+    return stack
+
+def _closing_tags(stack: List[Tuple[str, str]]) -> str:
+    return ''.join(f'</{name}>' for name, _ in reversed(stack))
+
+def _cut_text(text: str, size: int) -> List[str]:
+    """Cuts plain text into chunks of at most `size`, preferring spaces and never inside an &entity;."""
+    chunks = []
+    while _length(text) > size:
+        cut = size
+        while cut > 1 and _length(text[:cut]) > size:
+            cut -= 1
+        space = text.rfind(' ', 0, cut)
+        if space > cut // 2:
+            cut = space + 1
+        entity = text.rfind('&', 0, cut)
+        if entity > 0 and ';' not in text[entity:cut]:
+            cut = entity
+        chunks.append(text[:cut])
+        text = text[cut:]
+    if text:
+        chunks.append(text)
+    return chunks
+
+def _pieces(text: str, size: int) -> List[str]:
+    """Lines of `text` (with their newline); a line longer than `size` is cut between tags and words."""
+    pieces = []
+    for line in text.splitlines(keepends=True):
+        if _length(line) <= size:
+            pieces.append(line)
+            continue
+        for token in _PIECE.split(line):
+            if token.startswith('<'):
+                pieces.append(token)
+            elif token:
+                pieces.extend(_cut_text(token, size))
+    return pieces
+
+def split_html_message(text: str, max_length: int = MAX_MESSAGE_LENGTH) -> List[str]:
+    """
+    Splits an HTML message into parts of at most `max_length`, at line breaks where possible.
+    A tag is never cut in half, and tags still open at the end of a part are closed there
+    and reopened at the start of the next one, so every part is valid HTML on its own.
+    """
+    if _length(text) <= max_length:
+        return [text]
+    parts = []
+    stack: List[Tuple[str, str]] = []
+    current, has_content = '', False
+    for piece in _pieces(text, max_length // 2):
+        after = _apply_tags(stack, piece)
+        if has_content and _length(current) + _length(piece) + _length(_closing_tags(after)) > max_length:
+            parts.append(current + _closing_tags(stack))
+            current, has_content = ''.join(tag for _, tag in stack), False
+        current += piece
+        has_content = has_content or bool(piece.strip())
+        stack = after
+    if has_content:
+        parts.append(current + _closing_tags(stack))
+    return parts
+
+class TelegramRateLimiter:
+    """
+    Spaces out sends to stay within the Bot API limits: one message a second per chat,
+    20 a minute per group, and `messages_per_second` over all chats. A 429 pauses a chat
+    for its retry_after.
+    """
+    def __init__(self, per_chat_interval: float = 1.0, group_interval: float = 3.0, messages_per_second: float = 30,
+                 clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep):
+        self.per_chat_interval = per_chat_interval
+        self.group_interval = group_interval
+        self.global_interval = 1 / messages_per_second
+        self.clock = clock
+        self.sleep = sleep
+        self._next_chat: Dict[str, float] = {}
+        # Send slots taken over all chats, in time order
+        self._slots: List[float] = []
+        self._lock = threading.Lock()
+
+    def _interval(self, chat_id: str) -> float:
+        # Group and channel ids are negative
+        return self.group_interval if str(chat_id).startswith('-') else self.per_chat_interval
+
+    def _global_slot(self, earliest: float) -> float:
+        """The first time from `earliest` that is `global_interval` away from every taken slot."""
+        slot = earliest
+        for taken in self._slots:
+            if taken - slot >= self.global_interval:
+                break
+            if slot - taken < self.global_interval:
+                slot = taken + self.global_interval
+        bisect.insort(self._slots, slot)
+        return slot
+
+    def reserve(self, chat_id: str) -> float:
+        """Takes the chat's next send slot and returns how long to wait for it."""
+        chat_id = str(chat_id)
+        with self._lock:
+            now = self.clock()
+            self._slots = [taken for taken in self._slots if taken > now - self.global_interval]
+            slot = self._global_slot(max(now, self._next_chat.get(chat_id, 0.0)))
+            self._next_chat[chat_id] = slot + self._interval(chat_id)
+            return slot - now
+
+    def wait(self, chat_id: str):
+        delay = self.reserve(chat_id)
+        if delay > 0:
+            self.sleep(delay)
+
+    def pause(self, chat_id: str, seconds: float):
+        chat_id = str(chat_id)
+        with self._lock:
+            self._next_chat[chat_id] = max(self._next_chat.get(chat_id, 0.0), self.clock() + seconds)
+
+class TelegramClient:
     """
-    Sends a message to the configured Telegram chat.
-    This function is self-sufficient and loads .env variables itself.
+    Posts to the Bot API over one pooled HTTP session. Rate-limited requests are retried
+    after Telegram's retry_after, server and network errors with exponential backoff;
+    other errors (e.g. a malformed message) are not retried.
     """
-    load_dotenv() # Load environment variables from .env file
+    API_URL = 'https://api.telegram.org/bot{token}/{method}'
+
+    def __init__(self, token: str, limiter: Optional[TelegramRateLimiter] = None, session: Optional[requests.Session] = None,
+                 max_retries: int = 3, timeout: float = 10, sleep: Callable[[float], None] = time.sleep):
+        self.token = token
+        self.limiter = limiter or TelegramRateLimiter()
+        self.session = session or requests.Session()
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.sleep = sleep
+        self.stats = {'sent': 0, 'failed': 0, 'rate_limited': 0, 'retried': 0}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, telegram_config: dict, **kwargs) -> 'TelegramClient':
+        limiter = TelegramRateLimiter(
+            per_chat_interval=telegram_config.get('PER_CHAT_INTERVAL_SECONDS', 1.0),
+            group_interval=telegram_config.get('GROUP_CHAT_INTERVAL_SECONDS', 3.0),
+            messages_per_second=telegram_config.get('GLOBAL_MESSAGES_PER_SECOND', 30))
+        return cls(telegram_config.get('BOT_TOKEN', ''), limiter=limiter, **kwargs)
+
+    def _count(self, key: str):
+        with self._lock:
+            self.stats[key] += 1
+
+    def send_message(self, chat_id: str, text: str, parse_mode: str = 'HTML') -> bool:
+        url = self.API_URL.format(token=self.token, method='sendMessage')
+        payload = {'chat_id': chat_id, 'text': text, 'parse_mode': parse_mode, 'disable_web_page_preview': True}
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self._count('retried')
+            self.limiter.wait(chat_id)
+            try:
+                response = self.session.post(url, json=payload, timeout=self.timeout)
+            except requests.exceptions.RequestException as e:
+                error = str(e)
+                self.sleep(0.5 * (2 ** attempt))
+                continue
+            if response.status_code == 200:
+                self._count('sent')
+                return True
+            try:
+                body = response.json()
+            except ValueError:
+                body = {}
+            error = body.get('description') or f"HTTP {response.status_code}"
+            if response.status_code == 429:
+                self._count('rate_limited')
+                retry_after = body.get('parameters', {}).get('retry_after', 1)
+                print(f"⚠️ Telegram rate limit hit, retrying in {retry_after}s...")
+                self.limiter.pause(chat_id, retry_after)
+            elif response.status_code >= 500:
+                self.sleep(0.5 * (2 ** attempt))
+            else:
+                break
+        print(f"❌ خطأ في إرسال رسالة تليجرام: {error}")
+        self._count('failed')
+        return False
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.stats)
+
+    def close(self):
+        self.session.close()
+
+def message_parts(message: str, max_length: int = MAX_MESSAGE_LENGTH) -> List[str]:
+    """The message as sent: a long report is split and each part gets a "part i/n" header."""
+    parts = split_html_message(message, max_length - PART_HEADER_RESERVE)
+    if len(parts) == 1:
+        return [message]
+    return [f"📊 <b>تقرير التحليل (جزء {i + 1}/{len(parts)})</b>\n\n{part}" for i, part in enumerate(parts)]
 
-    token = os.getenv('TELEGRAM_BOT_TOKEN')
-    chat_id = os.getenv('TELEGRAM_CHAT_ID')
+_default_client: Optional[TelegramClient] = None
+_default_client_lock = threading.Lock()
 
-    if not token or not chat_id:
+def get_default_client() -> Optional[TelegramClient]:
+    """The shared client for the configured bot token, or None if no token is set."""
+    global _default_client
+    if not TELEGRAM_CONFIG.get('BOT_TOKEN'):
+        return None
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = TelegramClient.from_config(TELEGRAM_CONFIG)
+        return _default_client
+
+def send_telegram_message(message: str, chat_id: Optional[str] = None) -> bool:
+    """
+    Sends a message to the configured Telegram chat and waits until it is delivered.
+    Returns whether every part was sent.
+    """
+    client = get_default_client()
+    chat_id = chat_id or TELEGRAM_CONFIG.get('CHAT_ID')
+    if client is None or not chat_id:
         print("⚠️ Telegram BOT_TOKEN or CHAT_ID not set in .env file. Skipping message.")
-        return
+        return False
 
     # A simple way to represent the message for logging without printing the whole thing
     message_preview = message.split('\n')[0]
     print(f"Attempting to send report to Telegram: {message_preview}...")
+    sent = all([client.send_message(chat_id, part) for part in message_parts(message)])
+    if sent:
+        print("✅ تم إرسال التقرير بنجاح إلى تليجرام.")
+    return sent
 
-    max_length = 4096
-    try:
-        if len(message) <= max_length:
-            send_text = f"https://api.telegram.org/bot{token}/sendMessage?chat_id={chat_id}&parse_mode=Markdown&text={requests.utils.quote(message)}"
-            response = requests.get(send_text, timeout=10)
-            response.raise_for_status()
-        else:
-            parts = []
-            current_part = ""
-            for line in message.split('\n'):
-                if len(current_part) + len(line) + 1 > max_length:
-                    parts.append(current_part)
-                    current_part = ""
-                current_part += line + "\n"
-            if current_part:
-                parts.append(current_part)
-
-            for i, part in enumerate(parts):
-                header = f"📊 **تقرير التحليل (جزء {i+1}/{len(parts)})**\n\n"
-                send_text = f"https://api.telegram.org/bot{token}/sendMessage?chat_id={chat_id}&parse_mode=Markdown&text={requests.utils.quote(header + part)}"
-                response = requests.get(send_text, timeout=10)
-                response.raise_for_status()
+class TelegramSendQueue:
+    """
+    Sends reports from a background thread so an analysis never waits on Telegram.
+    Messages go out in the order they were queued, as fast as the client's rate limits
+    allow; the parts of one message are never interleaved with another's.
+    """
+    def __init__(self, client: Optional[TelegramClient] = None, chat_id: Optional[str] = None):
+        self.client = client if client is not None else get_default_client()
+        self.chat_id = chat_id or TELEGRAM_CONFIG.get('CHAT_ID')
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='telegram-sender', daemon=True)
+        self._thread.start()
 
-        print("✅ تم إرسال التقرير بنجاح إلى تليجرام.")
-    except requests.exceptions.RequestException as e:
-        print(f"❌ خطأ في إرسال رسالة تليجرام: {e}")
-    except Exception as e:
-        print(f"❌ خطأ غير متوقع أثناء إرسال رسالة تليجرام: {e}")
+    def send(self, message: str, chat_id: Optional[str] = None):
+        self._queue.put((chat_id or self.chat_id, message_parts(message)))
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            chat_id, parts = item
+            if self.client is None or not chat_id:
+                print("⚠️ Telegram BOT_TOKEN or CHAT_ID not set in .env file. Skipping message.")
+                continue
+            for part in parts:
+                try:
+                    self.client.send_message(chat_id, part)
+                except Exception as e:
+                    print(f"❌ خطأ غير متوقع أثناء إرسال رسالة تليجرام: {e}")
+
+    def close(self):
+        """Waits until every queued message has been sent."""
+        self._queue.put(None)
+        self._thread.join()
@@ -0,0 +1,73 @@
+import pytest
+import sys
+import os
+import numpy as np
+import pandas as pd
+
+# Add project root to path to allow imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+analysis_daemon = pytest.importorskip('analysis_daemon')
+from config import get_config
+
+MINUTE_MS = 60 * 1000
+BAR_MS = {'3m': 3 * MINUTE_MS, '1H': 60 * MINUTE_MS}
+START_MS = 1_700_000_000_000 // BAR_MS['1H'] * BAR_MS['1H']
+
+class FakeFetcher:
+    """Serves synthetic candles on a settable clock and counts the fetches per (symbol, bar)."""
+    def __init__(self):
+        self.now_ms = START_MS + 30 * 1000
+        self.fetches = {}
+
+    def clock(self):
+        return self.now_ms / 1000
+
+    def bar_bounds(self, timeframe, now_ms=None):
+        bar_ms = BAR_MS[timeframe]
+        bar_open = (self.now_ms if now_ms is None else now_ms) // bar_ms * bar_ms
+        return bar_open, bar_open + bar_ms
+
+    def fetch_many(self, jobs):
+        pass
+
+    def get_cached_price(self, symbol):
+        return None
+
+    def fetch_historical_frame(self, symbol, timeframe, days_to_fetch):
+        self.fetches[(symbol, timeframe)] = self.fetches.get((symbol, timeframe), 0) + 1
+        rng = np.random.default_rng(len(self.fetches))
+        close = 100 + np.cumsum(rng.normal(size=300))
+        index = pd.date_range(end=pd.Timestamp(self.now_ms, unit='ms'), periods=300, freq='min')
+        return pd.DataFrame({'open': close, 'high': close + 1, 'low': close - 1, 'close': close,
+                             'volume': rng.uniform(1, 5, 300)}, index=index)
+
+@pytest.fixture
+def daemon():
+    config = get_config()
+    config = {**config, 'analysis': {**config['analysis'], 'DAEMON_SETTLE_SECONDS': 5, 'INDICATOR_ENGINE': 'fused'}}
+    return analysis_daemon.AnalysisDaemon(['BTC/USDT'], ['3m', '1h'], config, FakeFetcher())
+
+def test_only_timeframes_with_a_closed_candle_are_reanalysed(daemon):
+    fetcher = daemon.okx_fetcher
+    assert daemon.refresh() == 2
+    assert daemon.refresh() == 0
+    assert daemon.report('BTC/USDT', 'test') is not None
+    assert len(daemon.ranked_results('BTC/USDT')) == 2
+
+    # The 3m candle closed, but not long enough ago to be confirmed
+    fetcher.now_ms = START_MS + BAR_MS['3m'] + 2 * 1000
+    assert daemon.due_jobs() == []
+    fetcher.now_ms = START_MS + BAR_MS['3m'] + 6 * 1000
+    assert daemon.due_jobs() == [('BTC/USDT', ['3m'])]
+    assert daemon.refresh() == 1
+    assert fetcher.fetches == {('BTC-USDT', '3m'): 2, ('BTC-USDT', '1H'): 1}
+
+def test_next_wake_up_is_the_next_close(daemon):
+    assert daemon.next_due_ms() == START_MS + BAR_MS['3m'] + 5 * 1000
+
+def test_report_needs_every_requested_timeframe(daemon):
+    assert daemon.report('BTC/USDT', 'test') is None
+    daemon.refresh()
+    assert daemon.report('BTC/USDT', 'test', ['3m']) is not None
+    assert daemon.report('BTC/USDT', 'test', ['4h']) is None
+    assert daemon.report('ETH/USDT', 'test') is None
@@ -0,0 +1,54 @@
+import pytest
+import sys
+import os
+import threading
+
+# Add project root to path to allow imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from analysis_jobs import AnalysisJobQueue
+
+@pytest.fixture
+def queue():
+    jobs = AnalysisJobQueue(max_workers=2, max_jobs_per_chat=1)
+    yield jobs
+    jobs.shutdown(wait=True)
+
+def test_identical_requests_share_one_job(queue):
+    release = threading.Event()
+    calls = []
+
+    def analyse(symbol):
+        calls.append(symbol)
+        release.wait(5)
+        return f'report {symbol}'
+
+    first = queue.submit('chat-1', ('BTC/USDT', 'long'), analyse, 'BTC/USDT')
+    second = queue.submit('chat-2', ('BTC/USDT', 'long'), analyse, 'BTC/USDT')
+    assert second is first
+    release.set()
+    assert first.result(5) == 'report BTC/USDT'
+    assert calls == ['BTC/USDT']
+    assert queue.get_stats() == {'submitted': 1, 'deduplicated': 1, 'rejected': 0, 'failed': 0, 'running': 0}
+
+def test_a_chat_waits_for_its_running_job(queue):
+    release = threading.Event()
+    future = queue.submit('chat-1', 'BTC', release.wait, 5)
+    assert queue.submit('chat-1', 'ETH', lambda: 'ETH') is None
+    # Other chats are not limited by it
+    assert queue.submit('chat-2', 'ETH', lambda: 'ETH').result(5) == 'ETH'
+    release.set()
+    future.result(5)
+    assert queue.active_jobs('chat-1') == 0
+    assert queue.submit('chat-1', 'ETH', lambda: 'again').result(5) == 'again'
+    assert queue.get_stats()['rejected'] == 1
+
+def test_failures_release_the_chat_and_the_key(queue):
+    def fail():
+        raise RuntimeError('offline')
+
+    future = queue.submit('chat-1', 'BTC', fail)
+    with pytest.raises(RuntimeError):
+        future.result(5)
+    assert queue.active_jobs('chat-1') == 0
+    assert queue.submit('chat-1', 'BTC', lambda: 'ok').result(5) == 'ok'
+    assert queue.get_stats()['failed'] == 1
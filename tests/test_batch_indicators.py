@@ -0,0 +1,92 @@
+import pytest
+import sys
+import os
+import pandas as pd
+import numpy as np
+
+# Add project root to path to allow imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from indicators import apply_all_indicators, apply_batch_indicators
+from indicators.batch import stack_frames
+
+def make_frame(seed: int, rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100 * seed + np.cumsum(rng.normal(size=rows))
+    df = pd.DataFrame({
+        'Open': close + rng.normal(scale=0.3, size=rows),
+        'Close': close,
+        'Volume': rng.uniform(1000, 5000, size=rows)
+    }, index=pd.date_range('2024-01-01', periods=rows, freq='h'))
+    df['High'] = df[['Open', 'Close']].max(axis=1) + rng.uniform(0, 1, size=rows)
+    df['Low'] = df[['Open', 'Close']].min(axis=1) - rng.uniform(0, 1, size=rows)
+    return df
+
+@pytest.fixture
+def frames():
+    # Uneven histories, including one too short for the slow indicators
+    return {'BTC-USDT': make_frame(1, 500), 'ETH-USDT': make_frame(2, 320), 'NEW-USDT': make_frame(3, 40)}
+
+def test_stacking_right_aligns_shorter_histories(frames):
+    symbols, matrices = stack_frames(frames)
+    assert symbols == list(frames)
+    assert matrices['Close'].shape == (3, 500)
+    assert np.isnan(matrices['Close'][2, :460]).all()
+    np.testing.assert_array_equal(matrices['Close'][2, 460:], frames['NEW-USDT']['Close'].to_numpy())
+
+def test_batch_matches_per_symbol_computation(frames):
+    batched = apply_batch_indicators(frames)
+    for symbol, frame in frames.items():
+        expected = apply_all_indicators(frame.copy(), engine='fused')
+        result = batched[symbol]
+        assert result.index.equals(frame.index)
+        pd.testing.assert_frame_equal(result[expected.columns], expected, check_exact=False, rtol=1e-10)
+
+def test_batch_honours_the_requested_columns(frames):
+    batched = apply_batch_indicators(frames, columns=['RSI_14', 'EMA_50'])
+    assert list(batched['ETH-USDT'].columns) == ['Open', 'High', 'Low', 'Close', 'Volume', 'EMA_50', 'RSI_14']
+    assert batched['NEW-USDT']['EMA_50'].isna().all()
+
+def test_prepare_batch_fills_the_bots(frames):
+    main_bot = pytest.importorskip('main_bot')
+    config = {'analysis': {'INDICATOR_ENGINE': 'fused', 'ENABLED_MODULES': ['trends']}}
+    bots = []
+    for symbol, frame in frames.items():
+        bot = main_bot.ComprehensiveTradingBot(symbol, '1h', config, okx_fetcher=None)
+        bot.df = frame.rename(columns=str.lower)
+        bots.append(bot)
+
+    main_bot.ComprehensiveTradingBot.prepare_batch(bots)
+    for bot, frame in zip(bots, frames.values()):
+        expected = apply_all_indicators(frame.copy(), engine='fused', columns=['EMA_20', 'EMA_50', 'EMA_100', 'ADX_14'])
+        pd.testing.assert_frame_equal(bot.df_with_indicators[expected.columns], expected, check_exact=False, rtol=1e-10)
+
+class FakeFetcher:
+    """Reports the bar after the last candle as the one in progress."""
+    def __init__(self, bar_open_ms: int):
+        self.bar_open_ms = bar_open_ms
+
+    def bar_bounds(self, timeframe, now_ms=None):
+        return self.bar_open_ms, self.bar_open_ms + 3600 * 1000
+
+def test_prepare_batch_streams_rescans_through_the_state_book(frames):
+    main_bot = pytest.importorskip('main_bot')
+    from indicators import IndicatorStateBook
+    config = {'analysis': {'INDICATOR_ENGINE': 'fused', 'ENABLED_MODULES': ['trends']}}
+    frame = frames['BTC-USDT']
+    fetcher = FakeFetcher((frame.index[-1] + pd.Timedelta(hours=1)).value // 10**6)
+    book = IndicatorStateBook()
+
+    def scan(candles):
+        bot = main_bot.ComprehensiveTradingBot('BTC/USDT', '1h', config, okx_fetcher=fetcher)
+        bot.df = candles.rename(columns=str.lower)
+        main_bot.ComprehensiveTradingBot.prepare_batch([bot], state_book=book)
+        return bot.df_with_indicators
+
+    first = scan(frame.iloc[:-5])
+    expected = apply_all_indicators(frame.iloc[:-5].copy(), engine='fused', columns=['EMA_20', 'EMA_50', 'EMA_100', 'ADX_14'])
+    pd.testing.assert_frame_equal(first[expected.columns], expected, check_exact=False, rtol=1e-10)
+
+    rescanned = scan(frame.iloc[5:])
+    assert book._frames[('BTC/USDT', '1h')][0].bars == len(frame)
+    expected = apply_all_indicators(frame.copy(), engine='fused', columns=['EMA_20', 'EMA_50', 'EMA_100', 'ADX_14'])
+    pd.testing.assert_frame_equal(rescanned[expected.columns], expected.iloc[5:], check_exact=False, rtol=1e-10)
@@ -0,0 +1,55 @@
+import sys
+import os
+import numpy as np
+
+# Add project root to path to allow imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from bounded_cache import BoundedCache
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def test_lru_entry_is_evicted_when_over_budget():
+    """
+    Tests that the least recently used array is dropped once the byte budget is exceeded.
+    """
+    cache = BoundedCache(max_bytes=3 * 800)
+    for key in ('a', 'b', 'c'):
+        cache[key] = np.zeros(100)
+    cache.get('a')
+    cache['d'] = np.zeros(100)
+
+    assert 'b' not in cache
+    assert all(key in cache for key in ('a', 'c', 'd'))
+    stats = cache.get_stats()
+    assert stats['evictions'] == 1
+    assert stats['bytes'] == 3 * 800
+
+def test_entries_expire_at_their_deadline():
+    clock = FakeClock()
+    cache = BoundedCache(default_ttl=60, clock=clock)
+    cache.set('bar', 1, expires_at=clock.now + 5)
+    cache['ticker'] = 2
+
+    clock.now += 10
+    assert cache.get('bar') is None
+    assert cache.get('ticker') == 2
+    clock.now += 60
+    assert 'ticker' not in cache
+    assert cache.get_stats()['expirations'] == 2
+
+def test_stats_count_hits_and_misses():
+    cache = BoundedCache(max_entries=2)
+    cache['x'] = 1
+    cache.get('x')
+    cache.get('y')
+    cache['y'] = 2
+    cache['z'] = 3
+
+    stats = cache.get_stats()
+    assert (stats['hits'], stats['misses'], stats['evictions'], stats['entries']) == (1, 1, 1, 2)
+    assert cache.keys() == ['y', 'z']
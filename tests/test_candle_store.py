@@ -0,0 +1,76 @@
+import pytest
+import sys
+import os
+import numpy as np
+
+# Add project root to path to allow imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from candle_store import CandleStore, CANDLE_DTYPE, slice_by_time
+
+def make_candles(start_ts: int, count: int, step_ms: int = 60_000) -> np.ndarray:
+    """Builds a simple ascending candle array for tests."""
+    candles = np.zeros(count, dtype=CANDLE_DTYPE)
+    candles['timestamp'] = start_ts + np.arange(count) * step_ms
+    candles['open'] = np.arange(count) + 100.0
+    candles['high'] = candles['open'] + 1
+    candles['low'] = candles['open'] - 1
+    candles['close'] = candles['open'] + 0.5
+    candles['volume'] = 10.0
+    return candles
+
+@pytest.fixture
+def store(tmp_path):
+    return CandleStore(tmp_path / 'candles')
+
+def test_append_and_load_roundtrip(store):
+    """
+    Tests that appended candles are memory-mapped back unchanged.
+    """
+    candles = make_candles(1_000_000, 50)
+    assert store.append('BTC-USDT', '1m', candles) == 50
+
+    loaded = store.load('BTC-USDT', '1m')
+    assert isinstance(loaded, np.memmap)
+    assert np.array_equal(loaded, candles)
+    assert store.last_timestamp('BTC-USDT', '1m') == candles['timestamp'][-1]
+
+def test_append_only_writes_newer_candles(store):
+    """
+    Tests that overlapping candles are skipped so the file stays sorted and unique.
+    """
+    candles = make_candles(1_000_000, 50)
+    store.append('BTC-USDT', '1m', candles[:30])
+    assert store.append('BTC-USDT', '1m', candles[20:]) == 20
+
+    loaded = store.load('BTC-USDT', '1m')
+    assert len(loaded) == 50
+    assert np.all(np.diff(loaded['timestamp']) > 0)
+
+def test_load_range_slices_by_timestamp(store):
+    """
+    Tests that range lookups return exactly the candles inside the window.
+    """
+    candles = make_candles(1_000_000, 100)
+    store.append('ETH-USDT', '5m', candles)
+
+    window = store.load_range('ETH-USDT', '5m', start_ts=candles['timestamp'][10], end_ts=candles['timestamp'][19])
+    assert len(window) == 10
+    assert window['timestamp'][0] == candles['timestamp'][10]
+    assert len(slice_by_time(candles, start_ts=candles['timestamp'][-1] + 1)) == 0
+
+def test_partial_trailing_record_is_ignored(store):
+    """
+    Tests that a half-written record does not corrupt reads or later appends.
+    """
+    candles = make_candles(1_000_000, 10)
+    store.append('BTC-USDT', '1m', candles[:5])
+    with open(store._path('BTC-USDT', '1m'), 'ab') as f:
+        f.write(b'\x00' * 7)
+
+    assert len(store.load('BTC-USDT', '1m')) == 5
+    store.append('BTC-USDT', '1m', candles[5:])
+    assert np.array_equal(store.load('BTC-USDT', '1m'), candles)
+
+def test_missing_file_returns_empty(store):
+    assert len(store.load('SOL-USDT', '1H')) == 0
+    assert store.last_timestamp('SOL-USDT', '1H') is None
@@ -0,0 +1,62 @@
+import pytest
+import sys
+import os
+import pandas as pd
+import numpy as np
+
+# Add project root to path to allow imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from indicators import apply_all_indicators
+
+@pytest.fixture
+def price_dataframe():
+    """Create a random-walk OHLCV dataframe long enough for every indicator to warm up."""
+    rng = np.random.default_rng(7)
+    close = 100 + np.cumsum(rng.normal(size=1000))
+    df = pd.DataFrame({
+        'Open': close + rng.normal(scale=0.3, size=1000),
+        'Close': close,
+        'Volume': rng.uniform(1000, 5000, size=1000)
+    })
+    df['High'] = df[['Open', 'Close']].max(axis=1) + rng.uniform(0, 1, size=1000)
+    df['Low'] = df[['Open', 'Close']].min(axis=1) - rng.uniform(0, 1, size=1000)
+    return df
+
+def test_fused_engine_emits_the_columns_the_analysis_reads(price_dataframe):
+    df = apply_all_indicators(price_dataframe.copy(), engine='fused')
+
+    expected_columns = [
+        'SMA_20', 'SMA_50', 'SMA_200',
+        'EMA_20', 'EMA_50', 'EMA_100',
+        'RSI_14',
+        'MACD_12_26_9', 'MACDh_12_26_9', 'MACDs_12_26_9',
+        'BBL_20_2.0', 'BBM_20_2.0', 'BBU_20_2.0',
+        'STOCHk_14_3_3', 'STOCHd_14_3_3',
+        'ATRr_14',
+        'OBV',
+        'ADX_14'
+    ]
+    for col in expected_columns:
+        assert col in df.columns, f"Column '{col}' is missing from DataFrame after applying indicators."
+        assert not df[col].iloc[-50:].isnull().any(), f"Column '{col}' has NaNs in the last 50 periods."
+
+    assert df['SMA_200'].iloc[-1] == pytest.approx(df['Close'].iloc[-200:].mean())
+    assert df['RSI_14'].between(0, 100).iloc[-50:].all()
+
+def test_unknown_engine_is_rejected(price_dataframe):
+    with pytest.raises(ValueError):
+        apply_all_indicators(price_dataframe, engine='talib')
+
+def test_fused_engine_matches_pandas_ta(price_dataframe):
+    """
+    Tests that both backends agree once the indicators have warmed up
+    (the pandas_ta column names differ slightly between versions, e.g. for BBANDS).
+    """
+    pytest.importorskip('pandas_ta')
+    reference = apply_all_indicators(price_dataframe.copy(), engine='pandas_ta')
+    fused = apply_all_indicators(price_dataframe.copy(), engine='fused')
+
+    for col in fused.columns.difference(price_dataframe.columns):
+        reference_col = next((c for c in reference.columns if c == col or c.startswith(col + '_')), None)
+        assert reference_col is not None, f"Column '{col}' is not produced by pandas_ta."
+        np.testing.assert_allclose(fused[col].iloc[-300:], reference[reference_col].iloc[-300:], rtol=1e-4, err_msg=col)
@@ -0,0 +1,74 @@
+import pytest
+import sys
+import os
+import pandas as pd
+import numpy as np
+
+# Add project root to path to allow imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from indicators import apply_all_indicators
+from indicators.planner import parse_indicator_column, plan_indicators, warmup_bars
+from analysis.trends import TrendAnalysis
+from analysis.classic_patterns import ClassicPatterns
+from analysis.technical_score import TechnicalIndicators
+
+@pytest.fixture
+def price_dataframe():
+    rng = np.random.default_rng(11)
+    close = 100 + np.cumsum(rng.normal(size=400))
+    df = pd.DataFrame({
+        'Open': close + rng.normal(scale=0.3, size=400),
+        'Close': close,
+        'Volume': rng.uniform(1000, 5000, size=400)
+    })
+    df['High'] = df[['Open', 'Close']].max(axis=1) + rng.uniform(0, 1, size=400)
+    df['Low'] = df[['Open', 'Close']].min(axis=1) - rng.uniform(0, 1, size=400)
+    return df
+
+def test_columns_map_to_the_spec_that_produces_them():
+    assert parse_indicator_column('MACDh_12_26_9') == ('MACD', 12, 26, 9)
+    assert parse_indicator_column('BBU_20_2.0') == ('BBANDS', 20, 2.0)
+    assert parse_indicator_column('STOCHk_14_3_3') == ('STOCH', 14, 3, 3)
+    assert parse_indicator_column('OBV') == ('OBV',)
+    with pytest.raises(ValueError):
+        parse_indicator_column('VWAP_D')
+
+def test_plan_deduplicates_multi_output_indicators():
+    plan = plan_indicators(['MACD_12_26_9', 'MACDs_12_26_9', 'ADX_14', 'EMA_50', 'EMA_20', 'BBL_20_2.0'])
+    assert plan == [('BBANDS', 20, 2.0), ('EMA', 20), ('EMA', 50), ('MACD', 12, 26, 9), ('ADX', 14)]
+    assert warmup_bars(plan) == 49  # EMA_50 outlasts MACD (26 + 9 - 2) and ADX (2 * 14 - 1)
+    assert warmup_bars([]) == 0
+
+def test_warmup_matches_the_first_valid_row(price_dataframe):
+    for column in ['SMA_50', 'EMA_100', 'RSI_14', 'MACDs_12_26_9', 'STOCHd_14_3_3', 'ATRr_14', 'ADX_14', 'OBV']:
+        df = apply_all_indicators(price_dataframe.copy(), engine='fused', columns=[column])
+        assert df[column].first_valid_index() == warmup_bars(plan_indicators([column])), column
+
+def test_only_the_requested_columns_are_computed(price_dataframe):
+    columns = TrendAnalysis.required_indicators({}) + ClassicPatterns.required_indicators({})
+    df = apply_all_indicators(price_dataframe.copy(), engine='fused', columns=columns)
+    full = apply_all_indicators(price_dataframe.copy(), engine='fused')
+
+    added = set(df.columns) - set(price_dataframe.columns)
+    assert added == {'EMA_20', 'EMA_50', 'EMA_100', 'ADX_14', 'DMP_14', 'DMN_14', 'RSI_14'}
+    for column in added:
+        pd.testing.assert_series_equal(df[column], full[column])
+
+def test_module_declarations_follow_the_config():
+    assert TrendAnalysis.required_indicators({'TREND_SHORT_PERIOD': 9, 'ADX_PERIOD': 10}) == ['EMA_9', 'EMA_50', 'EMA_100', 'ADX_10']
+    assert 'SMA_200' in TechnicalIndicators.required_indicators()
+    # Every declared column must be producible by the planner
+    plan_indicators(TechnicalIndicators.required_indicators({'RSI_PERIOD': 21}))
+
+def test_disabled_modules_skip_their_indicators(price_dataframe):
+    main_bot = pytest.importorskip('main_bot')
+    config = {'analysis': {'INDICATOR_ENGINE': 'fused', 'ENABLED_MODULES': ['trends', 'channels']}}
+    bot = main_bot.ComprehensiveTradingBot('BTC/USDT', '1h', config, okx_fetcher=None)
+    assert bot.required_indicator_columns() == {'EMA_20', 'EMA_50', 'EMA_100', 'ADX_14'}
+
+    bot.df = price_dataframe
+    bot._prepare_data_with_indicators()
+    assert 'SMA_200' not in bot.df_with_indicators.columns
+    bot.run_all_analyses()
+    assert set(bot.analysis_results) == {'trends', 'channels'}
+    assert 'error' not in bot.analysis_results['trends']
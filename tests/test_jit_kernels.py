@@ -0,0 +1,49 @@
+import pytest
+import sys
+import os
+import numpy as np
+
+# Add project root to path to allow imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from indicators import fused, jit
+
+@pytest.fixture
+def padded_matrix():
+    """Three symbols with different history lengths, left-padded with NaN."""
+    rng = np.random.default_rng(5)
+    close = 100 + np.cumsum(rng.normal(size=(3, 300)), axis=1)
+    volume = rng.uniform(1000, 5000, size=(3, 300))
+    close[1, :120] = close[2, :290] = np.nan
+    volume[1, :120] = volume[2, :290] = np.nan
+    return close, volume
+
+@pytest.fixture
+def numpy_only():
+    previous = jit._enabled
+    jit._enabled = False
+    yield
+    jit._enabled = previous
+
+def test_python_kernels_match_the_numpy_path(padded_matrix, numpy_only):
+    close, volume = padded_matrix
+    for length in (3, 14, 50):
+        np.testing.assert_allclose(jit._smoothed_rows(close, length, 1 / length), fused.rma(close, length), rtol=1e-12)
+    expected = fused._obv(None, None, close, volume, {})['OBV']
+    np.testing.assert_allclose(jit._obv_rows(close, volume), expected, rtol=1e-12)
+
+def test_compiled_kernels_match_the_numpy_path(padded_matrix, numpy_only):
+    pytest.importorskip('numba')
+    close, volume = padded_matrix
+    expected = fused.compute_indicators(close + 1, close - 1, close, volume)
+
+    assert jit.configure(True, background=False)
+    assert jit.enabled()
+    compiled = fused.compute_indicators(close + 1, close - 1, close, volume)
+    for column, values in expected.items():
+        np.testing.assert_allclose(compiled[column], values, rtol=1e-9, atol=1e-9, err_msg=column)
+    # 1-D series go through the same kernels
+    np.testing.assert_allclose(fused.ema(close[0], 20), jit.smoothed(close[0], 20, 2 / 21), rtol=1e-12)
+
+def test_configure_without_jit_keeps_numpy(numpy_only):
+    assert jit.configure(False) is False
+    assert not jit.enabled()
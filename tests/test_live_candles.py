@@ -0,0 +1,50 @@
+import sys
+import os
+
+# Add project root to path to allow imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from live_candles import CandleRingBuffer, LiveCandleBook
+
+MINUTE_MS = 60_000
+
+def candle(ts: int, close: float = 100.0):
+    return (ts, close, close + 1, close - 1, close, 5.0)
+
+def test_in_progress_bar_is_updated_in_place():
+    buffer = CandleRingBuffer(MINUTE_MS, capacity=10)
+    buffer.update(candle(0, 100), confirmed=False)
+    buffer.update(candle(0, 101), confirmed=True)
+    buffer.update(candle(MINUTE_MS, 102), confirmed=False)
+
+    candles, confirmed = buffer.snapshot()
+    assert list(candles['timestamp']) == [0, MINUTE_MS]
+    assert list(candles['close']) == [101, 102]
+    assert list(confirmed) == [True, False]
+
+def test_ring_keeps_only_the_newest_bars_in_order():
+    buffer = CandleRingBuffer(MINUTE_MS, capacity=3)
+    for i in range(5):
+        buffer.update(candle(i * MINUTE_MS), confirmed=True)
+
+    candles, _ = buffer.snapshot()
+    assert list(candles['timestamp']) == [2 * MINUTE_MS, 3 * MINUTE_MS, 4 * MINUTE_MS]
+
+def test_a_missed_bar_resets_the_buffer():
+    """
+    Tests that the buffer never holds a gap, so it can be merged into the history as is.
+    """
+    buffer = CandleRingBuffer(MINUTE_MS, capacity=10)
+    buffer.update(candle(0), confirmed=True)
+    buffer.update(candle(3 * MINUTE_MS), confirmed=False)
+    buffer.update(candle(MINUTE_MS), confirmed=True)
+
+    candles, _ = buffer.snapshot()
+    assert list(candles['timestamp']) == [3 * MINUTE_MS]
+
+def test_book_ignores_untracked_bars():
+    book = LiveCandleBook(bar_ms={'1m': MINUTE_MS})
+    book.update('BTC-USDT', '1m', candle(0), confirmed=False)
+    book.update('BTC-USDT', '5m', candle(0), confirmed=False)
+
+    assert book.snapshot('BTC-USDT', '1m') is not None
+    assert book.snapshot('BTC-USDT', '5m') is None
@@ -0,0 +1,67 @@
+import pytest
+import sys
+import os
+import numpy as np
+import pandas as pd
+
+# Add project root to path to allow imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from market_data import MarketData, as_frame
+from indicators import apply_all_indicators
+from analysis.trends import TrendAnalysis
+from analysis.technical_score import TechnicalIndicators
+
+@pytest.fixture
+def indicator_frame():
+    rng = np.random.default_rng(4)
+    close = 100 + np.cumsum(rng.normal(size=300))
+    df = pd.DataFrame({
+        'Open': close, 'High': close + rng.uniform(0, 1, 300), 'Low': close - rng.uniform(0, 1, 300),
+        'Close': close, 'Volume': rng.uniform(1000, 5000, 300)
+    }, index=pd.date_range('2024-01-01', periods=300, freq='h'))
+    return apply_all_indicators(df, engine='fused')
+
+def test_views_share_the_source_buffers(indicator_frame):
+    data = MarketData.from_frame(indicator_frame)
+    assert np.shares_memory(data['RSI_14'], indicator_frame['RSI_14'].to_numpy())
+    assert np.shares_memory(data.frame['Close'].to_numpy(), data['Close'])
+    assert data.frame is not data.frame
+    assert 'RSI_14' in data.indicator_columns and 'Close' not in data.indicator_columns
+
+    tail = data.tail(50)
+    assert len(tail) == 50 and tail.index[0] == indicator_frame.index[-50]
+    assert np.shares_memory(tail['Close'], data['Close'])
+
+def test_writes_are_rejected(indicator_frame):
+    data = MarketData.from_frame(indicator_frame)
+    with pytest.raises(ValueError):
+        data['Close'][0] = 0.0
+    with pytest.raises(ValueError):
+        frame = data.frame
+        frame.iloc[-1, frame.columns.get_loc('Close')] = 0.0
+
+def test_column_changes_stay_in_one_modules_frame(indicator_frame):
+    data = MarketData.from_frame(indicator_frame)
+    columns = list(as_frame(data).columns)
+    frame = as_frame(data)
+    frame['X'] = 1
+    frame.insert(0, 'Y', 2)
+    frame.drop(columns=['Close'], inplace=True)
+    assert 'X' in frame and 'Close' not in frame
+    assert list(as_frame(data).columns) == columns
+    assert data.columns == columns and 'X' not in data
+    assert np.shares_memory(as_frame(data)['Close'].to_numpy(), data['Close'])
+    # The source frame itself stays writable
+    indicator_frame.loc[indicator_frame.index[0], 'Open'] = 1.0
+
+def test_modules_share_the_arrays(indicator_frame):
+    data = MarketData.from_frame(indicator_frame)
+    trends = TrendAnalysis(data)
+    indicators = TechnicalIndicators(data)
+    assert trends.df is not indicators.df
+    assert np.shares_memory(trends.df['Close'].to_numpy(), indicators.df['Close'].to_numpy())
+    assert as_frame(indicator_frame) is indicator_frame
+
+    result = indicators.get_comprehensive_analysis()
+    assert 'error' not in result
+    assert trends.get_comprehensive_trends_analysis()['total_score'] == TrendAnalysis(indicator_frame.copy()).get_comprehensive_trends_analysis()['total_score']
@@ -0,0 +1,104 @@
+import pytest
+import sys
+import os
+import threading
+import numpy as np
+import pandas as pd
+from functools import partial
+
+# Add project root to path to allow imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from market_data import MarketData
+from indicators import apply_all_indicators
+from analysis.trends import TrendAnalysis
+from analysis.technical_score import TechnicalIndicators
+from module_executor import GraphTask, SharedMarketData, attach_market_data, get_executor, run_module, run_module_shared, run_task_graph
+
+@pytest.fixture
+def market_data():
+    rng = np.random.default_rng(6)
+    close = 100 + np.cumsum(rng.normal(size=300))
+    df = pd.DataFrame({
+        'Open': close, 'High': close + rng.uniform(0, 1, 300), 'Low': close - rng.uniform(0, 1, 300),
+        'Close': close, 'Volume': rng.uniform(1000, 5000, 300)
+    }, index=pd.date_range('2024-01-01', periods=300, freq='h'))
+    return MarketData.from_frame(apply_all_indicators(df, engine='fused'))
+
+class Broken:
+    def __init__(self, df, config=None, timeframe='1h'):
+        raise KeyError('close')
+
+@pytest.mark.parametrize('mode', ['serial', 'thread'])
+def test_stages_wait_for_their_inputs(mode):
+    order = []
+    lock = threading.Lock()
+
+    def step(name):
+        with lock:
+            order.append(name)
+        return name
+
+    tasks = {
+        'a': GraphTask(partial(step, 'a')),
+        'b': GraphTask(partial(step, 'b')),
+        'final': GraphTask(partial(step, 'final'), deps=('a', 'b', 'disabled'), local=True),
+        'plan': GraphTask(partial(step, 'plan'), deps=('final',), local=True),
+    }
+    results = run_task_graph(tasks, get_executor(mode))
+    assert results == {'a': 'a', 'b': 'b', 'final': 'final', 'plan': 'plan'}
+    assert order.index('final') > max(order.index('a'), order.index('b'))
+    assert order[-1] == 'plan'
+
+def test_circular_dependencies_are_reported():
+    tasks = {'a': GraphTask(lambda: 1, deps=('b',)), 'b': GraphTask(lambda: 2, deps=('a',))}
+    with pytest.raises(ValueError):
+        run_task_graph(tasks)
+
+def test_module_errors_stay_isolated(market_data):
+    tasks = {
+        'broken': GraphTask(partial(run_module, market_data, Broken, 'analyse', {}, '1h')),
+        'trends': GraphTask(partial(run_module, market_data, TrendAnalysis, 'get_comprehensive_trends_analysis', {}, '1h')),
+    }
+    results = run_task_graph(tasks, get_executor('thread'))
+    assert results['broken'] == {'error': "'close'"}
+    assert 'error' not in results['trends']
+
+def test_process_workers_read_shared_memory(market_data):
+    expected = {
+        'trends': run_module(market_data, TrendAnalysis, 'get_comprehensive_trends_analysis', {}, '1h'),
+        'indicators': run_module(market_data, TechnicalIndicators, 'get_comprehensive_analysis', {}, '1h'),
+    }
+    with SharedMarketData(market_data) as shared:
+        tasks = {
+            'trends': GraphTask(partial(run_module_shared, shared.spec, TrendAnalysis, 'get_comprehensive_trends_analysis', {}, '1h')),
+            'indicators': GraphTask(partial(run_module_shared, shared.spec, TechnicalIndicators, 'get_comprehensive_analysis', {}, '1h')),
+        }
+        results = run_task_graph(tasks, get_executor('process', max_workers=2))
+    assert results['trends'] == expected['trends']
+    assert results['indicators']['total_score'] == expected['indicators']['total_score']
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError):
+        get_executor('gpu')
+
+def test_shared_block_round_trips_the_columns(market_data):
+    with SharedMarketData(market_data) as shared:
+        with attach_market_data(shared.spec) as data:
+            assert data.columns == market_data.columns
+            assert data.index.equals(market_data.index)
+            np.testing.assert_array_equal(data['RSI_14'], market_data['RSI_14'])
+
+def test_shared_candle_analysis_matches_the_bot(market_data):
+    main_bot = pytest.importorskip('main_bot')
+    from config import get_config
+    config = get_config()
+    live_price = {'price': 123.0}
+    bot = main_bot.ComprehensiveTradingBot.from_market_data('BTC/USDT', '1h', config, market_data, live_price)
+    bot.run_complete_analysis()
+    with SharedMarketData(market_data) as shared:
+        executor = get_executor('process', max_workers=1, initializer=main_bot.warm_analysis_worker)
+        summary = executor.submit(main_bot.analyse_shared_candles, shared.spec, 'BTC/USDT', '1h', config, live_price).result()
+    assert summary.timeframe == '1h'
+    assert summary.final_recommendation['current_price'] == 123.0
+    assert summary.final_recommendation['total_score'] == bot.final_recommendation['total_score']
+    assert sorted(summary.analysis_results) == sorted(bot.analysis_results)
@@ -0,0 +1,67 @@
+import pytest
+import sys
+import os
+import pandas as pd
+import numpy as np
+
+# Add project root to path to allow imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+main_bot = pytest.importorskip('main_bot')
+from analysis.channels import PriceChannels
+from config import get_config
+from indicators import apply_all_indicators
+from market_data import MarketData
+
+@pytest.fixture
+def channel_frame():
+    """A slowly rising 12-candle wave whose last candle breaks below the channel."""
+    i = np.arange(400)
+    close = 100 + 0.05 * i + 5 * np.sin(2 * np.pi * i / 12)
+    close[-1] = close[-2] - 12
+    df = pd.DataFrame({'Open': close - 0.2, 'Close': close, 'Volume': 1000 + 10 * (i % 7)},
+                      index=pd.date_range('2025-01-01', periods=400, freq='4h'))
+    df['High'] = df[['Open', 'Close']].max(axis=1) + 0.5
+    df['Low'] = df[['Open', 'Close']].min(axis=1) - 0.5
+    return apply_all_indicators(df[['Open', 'High', 'Low', 'Close', 'Volume']], engine='fused')
+
+def make_bot(frame, modules):
+    config = get_config()
+    config['analysis']['INDICATOR_ENGINE'] = 'fused'
+    config['analysis']['ENABLED_MODULES'] = modules
+    return main_bot.ComprehensiveTradingBot.from_market_data('BTC/USDT', '4h', config, MarketData.from_frame(frame))
+
+def test_channels_read_the_price_columns_the_bot_passes(channel_frame):
+    result = PriceChannels(channel_frame, timeframe='4h').get_comprehensive_channel_analysis()
+    assert 'error' not in result
+    assert result['details']['lower_bound'] < result['details']['upper_bound']
+    # The close below the lower bound counts as a buy
+    assert result['total_score'] == 1
+
+def test_indicators_trends_trend_lines_and_channels_score(channel_frame):
+    """
+    These four modules used to fail on every run (an unknown channels method and a timeframe
+    argument the others did not accept), so they added nothing to the recommendation.
+    """
+    bot = make_bot(channel_frame, ['indicators', 'trends', 'trend_lines', 'channels'])
+    bot.run_all_analyses()
+    bot.calculate_final_recommendation()
+
+    assert not any('error' in result for result in bot.analysis_results.values())
+    scores = bot.final_recommendation['individual_scores']
+    assert (scores['indicators'], scores['trends'], scores['channels']) == (-9, 1.5, 1)
+    # 1.5 * -9 + 3.0 * 1.5 + 1.0 * 1
+    assert bot.final_recommendation['total_score'] == pytest.approx(-8.0)
+    assert bot.final_recommendation['main_action'] == 'بيع 📉'
+    assert bot.final_recommendation['trend_line_analysis']['price_position'] == 'Below Downtrend'
+
+def test_a_failing_module_adds_nothing_to_the_score(channel_frame, monkeypatch):
+    def broken(self):
+        raise KeyError('close')
+    monkeypatch.setattr(PriceChannels, 'get_comprehensive_channel_analysis', broken)
+    bot = make_bot(channel_frame, ['indicators', 'trends', 'trend_lines', 'channels'])
+    bot.run_all_analyses()
+    bot.calculate_final_recommendation()
+
+    assert 'error' in bot.analysis_results['channels']
+    assert bot.final_recommendation['individual_scores']['channels'] == 0
+    assert bot.final_recommendation['total_score'] == pytest.approx(-9.0)
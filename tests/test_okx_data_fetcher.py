@@ -0,0 +1,324 @@
+import pytest
+import sys
+import os
+import time
+
+# Add project root to path to allow imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import okx_rest_client
+from okx_data import OKXDataFetcher
+
+HOUR_MS = 60 * 60 * 1000
+BAR_MS = {'15m': 15 * 60 * 1000, '1H': HOUR_MS, '4H': 4 * HOUR_MS}
+
+class FakeOKX:
+    """
+    A minimal stand-in for the OKX candles and history-candles endpoints that honours
+    the 'bar', 'after', 'before' and 'limit' parameters. With `depth`, the candles
+    endpoint only serves that many of the latest rows, as on the exchange.
+    """
+    def __init__(self, bar_ms: int = HOUR_MS, history_bars: int = 2000, depth: int = None):
+        self.bar_ms = bar_ms
+        self.history_bars = history_bars
+        self.depth = depth
+        self.requests = []
+        self.paths = []
+
+    def candles(self, bar_ms: int = None):
+        bar_ms = bar_ms or self.bar_ms
+        now_ms = int(time.time() * 1000)
+        current_open = now_ms // bar_ms * bar_ms
+        first_open = current_open - self.history_bars * bar_ms
+        rows = []
+        for ts in range(first_open, current_open + bar_ms, bar_ms):
+            price = 100 + (ts // bar_ms) % 50
+            confirm = '0' if ts == current_open else '1'
+            rows.append([str(ts), str(price), str(price + 2), str(price - 2), str(price + 1), '10', '0', '0', confirm])
+        return rows
+
+    def respond(self, params, path=okx_rest_client.CANDLES_PATH):
+        self.requests.append(dict(params))
+        self.paths.append(path)
+        rows = self.candles(BAR_MS.get(params.get('bar')))
+        if path == okx_rest_client.CANDLES_PATH and self.depth is not None:
+            rows = rows[-self.depth:]
+        if 'after' in params:
+            rows = [r for r in rows if int(r[0]) < int(params['after'])]
+        if 'before' in params:
+            rows = [r for r in rows if int(r[0]) > int(params['before'])]
+        rows.sort(key=lambda r: int(r[0]), reverse=True)
+        return rows[:int(params['limit'])]
+
+@pytest.fixture
+def fake_okx(monkeypatch):
+    fake = FakeOKX()
+
+    async def fake_request(client, path, params):
+        return fake.respond(params, path)
+
+    monkeypatch.setattr(okx_rest_client.OKXRestClient, '_request', fake_request)
+    return fake
+
+@pytest.fixture
+def fetcher(tmp_path, fake_okx):
+    return OKXDataFetcher(data_dir=str(tmp_path))
+
+def test_full_fetch_pages_backwards(fetcher, fake_okx):
+    """
+    Tests that a cold fetch pages back in time and returns sorted, unique candles.
+    """
+    data = fetcher.fetch_historical_data('BTC-USDT', '1H', days_to_fetch=30)
+
+    assert len(data) >= 30 * 24
+    timestamps = [c['timestamp'] for c in data]
+    assert timestamps == sorted(set(timestamps))
+    assert all('after' in r for r in fake_okx.requests[1:])
+
+def test_warm_start_is_served_from_store(tmp_path, fake_okx):
+    """
+    Tests that a new fetcher reuses the persisted candles without a REST call.
+    """
+    OKXDataFetcher(data_dir=str(tmp_path)).fetch_historical_data('BTC-USDT', '1H', days_to_fetch=10)
+    requests_after_cold_start = len(fake_okx.requests)
+
+    data = OKXDataFetcher(data_dir=str(tmp_path)).fetch_historical_data('BTC-USDT', '1H', days_to_fetch=10)
+    assert len(data) >= 10 * 24 - 1
+    assert len(fake_okx.requests) == requests_after_cold_start
+
+def test_delta_fetch_requests_only_newer_candles(tmp_path, fake_okx):
+    """
+    Tests that a stale store triggers a single 'before' request for the missing candles.
+    """
+    fetcher = OKXDataFetcher(data_dir=str(tmp_path))
+    fetcher.fetch_historical_data('BTC-USDT', '1H', days_to_fetch=10)
+
+    # Drop the last few stored candles to simulate a bot that was offline for a while.
+    stored = fetcher.candle_store.load('BTC-USDT', '1H')
+    fetcher.candle_store.rewrite('BTC-USDT', '1H', stored[:-5].copy())
+    fake_okx.requests.clear()
+
+    data = OKXDataFetcher(data_dir=str(tmp_path)).fetch_historical_data('BTC-USDT', '1H', days_to_fetch=10)
+    assert len(fake_okx.requests) == 1
+    assert 'before' in fake_okx.requests[0]
+    assert data[-1]['timestamp'] == int(fake_okx.candles()[-1][0])
+    assert fetcher.candle_store.last_timestamp('BTC-USDT', '1H') == int(fake_okx.candles()[-2][0])
+
+def test_narrower_request_is_a_view_of_the_cached_superset(fetcher, fake_okx):
+    """
+    Tests that a shorter window for the same (symbol, timeframe) is sliced from the cache.
+    """
+    wide = fetcher.get_candles('BTC-USDT', '1H', days_to_fetch=20)
+    requests_made = len(fake_okx.requests)
+
+    narrow = fetcher.get_candles('BTC-USDT', '1H', days_to_fetch=5)
+    assert len(fake_okx.requests) == requests_made
+    assert narrow.base is not None and narrow['timestamp'][-1] == wide['timestamp'][-1]
+    assert 5 * 24 <= len(narrow) <= 5 * 24 + 1
+
+def test_wider_request_backfills_only_the_older_gap(fetcher, fake_okx):
+    """
+    Tests that widening the window downloads only candles older than the cached ones.
+    """
+    narrow = fetcher.get_candles('BTC-USDT', '1H', days_to_fetch=5)
+    oldest_cached = int(narrow['timestamp'][0])
+    fake_okx.requests.clear()
+
+    wide = fetcher.get_candles('BTC-USDT', '1H', days_to_fetch=20)
+    assert fake_okx.requests and all(int(r['after']) <= oldest_cached for r in fake_okx.requests)
+    assert 20 * 24 <= len(wide) <= 20 * 24 + 2
+    assert fetcher.candle_store.load('BTC-USDT', '1H')['timestamp'][0] <= wide['timestamp'][0]
+
+def test_concurrent_fetches_are_coalesced(fetcher, fake_okx, monkeypatch):
+    """
+    Tests that threads asking for the same key while a fetch is running wait for it
+    instead of issuing their own REST calls.
+    """
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+
+    release = threading.Event()
+
+    async def slow_request(client, path, params):
+        release.wait(timeout=5)
+        return fake_okx.respond(params)
+
+    monkeypatch.setattr(okx_rest_client.OKXRestClient, '_request', slow_request)
+
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        futures = [executor.submit(fetcher.get_candles, 'BTC-USDT', '1H', 10) for _ in range(5)]
+        while fetcher.get_fetch_stats()['coalesced'] < 4:
+            time.sleep(0.01)
+        release.set()
+        results = [f.result() for f in futures]
+
+    stats = fetcher.get_fetch_stats()
+    assert stats['fetches'] == 1
+    assert stats['coalesced'] == 4
+    assert all(len(r) == len(results[0]) for r in results)
+    assert len(fake_okx.requests) == 1
+
+def test_fetch_many_fetches_a_matrix_in_one_batch(fetcher, fake_okx):
+    """
+    Tests that the bulk API returns every window in order and that a repeated
+    batch is answered from the cache.
+    """
+    jobs = [(symbol, '1H', days) for symbol in ('BTC-USDT', 'ETH-USDT') for days in (5, 10)]
+    results = fetcher.fetch_many(jobs)
+
+    assert [len(r) >= days * 24 for (_, _, days), r in zip(jobs, results)] == [True] * 4
+    assert fetcher.get_fetch_stats()['fetches'] == 2
+
+    requests_made = len(fake_okx.requests)
+    fetcher.fetch_many(jobs)
+    assert len(fake_okx.requests) == requests_made
+
+def test_fetch_many_resamples_coarser_bars_from_the_finest_one(fetcher, fake_okx):
+    """
+    Tests that 1H and 4H windows requested together with 15m are built locally
+    and match the exchange's own aggregation of the same bars.
+    """
+    results = fetcher.fetch_many([('BTC-USDT', '15m', 3), ('BTC-USDT', '1H', 3), ('BTC-USDT', '4H', 3)])
+
+    assert {r['bar'] for r in fake_okx.requests} == {'15m'}
+    assert fetcher.get_fetch_stats()['resampled'] == 2
+    for (bar, days), candles in zip([('15m', 3), ('1H', 3), ('4H', 3)], results):
+        assert len(candles) >= days * 24 * HOUR_MS // BAR_MS[bar]
+
+    hourly = results[1]
+    base = fetcher.historical_cache[('BTC-USDT', '15m')]
+    first_hour = base[(base['timestamp'] >= hourly['timestamp'][0]) & (base['timestamp'] < hourly['timestamp'][0] + HOUR_MS)]
+    assert len(first_hour) == 4
+    assert hourly['high'][0] == first_hour['high'].max()
+    assert hourly['volume'][0] == first_hour['volume'].sum()
+    assert hourly['close'][0] == first_hour['close'][-1]
+
+def test_parse_candles_dedupes_and_sorts_vectorized(fetcher, fake_okx):
+    """
+    Tests that raw OKX rows are parsed into sorted unique columns with the confirm mask kept.
+    """
+    rows = fake_okx.candles()[-5:]
+    raw = list(reversed(rows)) + [rows[0]]
+
+    candles, confirmed = fetcher._parse_candles(raw)
+    assert list(candles['timestamp']) == [int(r[0]) for r in rows]
+    assert list(candles['close']) == [float(r[4]) for r in rows]
+    assert list(confirmed) == [True, True, True, True, False]
+
+def test_fetch_historical_frame_matches_the_records(fetcher, fake_okx):
+    frame = fetcher.fetch_historical_frame('BTC-USDT', '1H', days_to_fetch=3)
+    records = fetcher.fetch_historical_data('BTC-USDT', '1H', days_to_fetch=3)
+
+    assert list(frame.columns) == ['open', 'high', 'low', 'close', 'volume']
+    assert frame.index.name == 'timestamp'
+    assert len(frame) == len(records)
+    assert frame['close'].tolist() == [r['close'] for r in records]
+    assert frame.index[0].value // 10**6 == records[0]['timestamp']
+
+def test_live_candles_keep_the_history_current_without_rest(tmp_path, fake_okx):
+    """
+    Tests that candles pushed over the WebSocket are merged into the stored history,
+    so a stale store needs no delta request.
+    """
+    fetcher = OKXDataFetcher(data_dir=str(tmp_path))
+    fetcher.fetch_historical_data('BTC-USDT', '1H', days_to_fetch=10)
+    stored = fetcher.candle_store.load('BTC-USDT', '1H')
+    fetcher.candle_store.rewrite('BTC-USDT', '1H', stored[:-5].copy())
+    fake_okx.requests.clear()
+
+    live_fetcher = OKXDataFetcher(data_dir=str(tmp_path), config={'LIVE_CANDLE_BARS': ['1H']})
+    for row in fake_okx.candles()[-7:]:
+        live = (int(row[0]), float(row[1]), float(row[2]), float(row[3]), float(row[4]), float(row[5]))
+        live_fetcher.live_candles.update('BTC-USDT', '1H', live, confirmed=row[8] == '1')
+
+    candles = live_fetcher.get_candles('BTC-USDT', '1H', days_to_fetch=10)
+    assert fake_okx.requests == []
+    assert live_fetcher.get_fetch_stats()['live_merges'] == 1
+    assert candles['timestamp'][-1] == int(fake_okx.candles()[-1][0])
+    assert live_fetcher.candle_store.last_timestamp('BTC-USDT', '1H') == int(fake_okx.candles()[-2][0])
+
+def test_bar_bounds_follow_okx_bar_alignment(fetcher):
+    now_ms = 1_700_000_000_000 + 90 * 60 * 1000
+    bar_open, bar_close = fetcher.bar_bounds('1H', now_ms)
+    assert bar_open <= now_ms < bar_close and bar_open % HOUR_MS == 0 and bar_close - bar_open == HOUR_MS
+    # Daily bars open at 00:00 Hong Kong time (16:00 UTC)
+    day_open, day_close = fetcher.bar_bounds('1D', now_ms)
+    assert day_open <= now_ms < day_close and (day_open + 8 * HOUR_MS) % (24 * HOUR_MS) == 0
+
+def test_history_past_the_candles_endpoint_depth_comes_from_history_candles(fetcher, fake_okx):
+    """
+    Tests that a window deeper than the candles endpoint serves is paged on through
+    history-candles instead of being taken for the start of the market's history.
+    """
+    fake_okx.depth, fake_okx.history_bars = 1440, 3000
+    candles = fetcher.get_candles('BTC-USDT', '1H', days_to_fetch=100)
+
+    assert len(candles) >= 100 * 24
+    assert set((candles['timestamp'][1:] - candles['timestamp'][:-1]).tolist()) == {HOUR_MS}
+    assert okx_rest_client.HISTORY_CANDLES_PATH in fake_okx.paths
+    assert ('BTC-USDT', '1H') not in fetcher._history_start
+
+def test_only_a_short_history_candles_page_ends_the_history(fetcher, fake_okx):
+    """Tests that a recent listing is recognised once history-candles runs out as well."""
+    fake_okx.depth, fake_okx.history_bars = 1440, 500
+    candles = fetcher.get_candles('BTC-USDT', '1H', days_to_fetch=100)
+
+    assert len(candles) == 501
+    assert fake_okx.paths[-1] == okx_rest_client.HISTORY_CANDLES_PATH
+    assert fetcher._history_start[('BTC-USDT', '1H')] == int(candles['timestamp'][0])
+
+def test_resampling_never_widens_the_base_past_what_can_be_fetched(fetcher, fake_okx):
+    """
+    Tests that a coarse window whose base bar would need more rows than one paged fetch
+    returns is downloaded natively and arrives complete.
+    """
+    fake_okx.depth, fake_okx.history_bars = 1440, 6000
+    assert fetcher.max_resample_base_candles == okx_rest_client.max_candles_per_fetch()
+
+    hourly, four_hourly = fetcher.fetch_many([('BTC-USDT', '1H', 30), ('BTC-USDT', '4H', 200)])
+    assert {r['bar'] for r in fake_okx.requests} == {'1H', '4H'}
+    assert len(hourly) >= 30 * 24
+    assert len(four_hourly) >= 200 * 6
+
+def test_a_long_downtime_is_bridged_without_a_gap(tmp_path, fake_okx):
+    """
+    Tests that a delta fetch after more missing bars than the candles endpoint serves
+    pages on through history-candles until it connects to the stored history.
+    """
+    fake_okx.depth, fake_okx.history_bars = 1440, 5000
+    fetcher = OKXDataFetcher(data_dir=str(tmp_path))
+    # Stored up to 4700 bars ago: far more than one default-sized fetch pages through
+    stored = fetcher._parse_candles(fake_okx.candles())[0][:300]
+    first_stored = int(stored['timestamp'][0])
+    fetcher.candle_store.rewrite('BTC-USDT', '1H', stored)
+
+    candles = fetcher.get_candles('BTC-USDT', '1H', days_to_fetch=200)
+    stored = fetcher.candle_store.load('BTC-USDT', '1H')
+    for series in (candles, stored):
+        assert set((series['timestamp'][1:] - series['timestamp'][:-1]).tolist()) == {HOUR_MS}
+    assert int(stored['timestamp'][0]) == first_stored
+    assert candles['timestamp'][-1] == int(fake_okx.candles()[-1][0])
+
+def test_a_gap_too_wide_to_bridge_keeps_the_stored_history(tmp_path, fake_okx):
+    """
+    Tests that when catching up would take too many requests, the window is fetched afresh
+    and the longer stored history is not replaced by it.
+    """
+    fake_okx.depth, fake_okx.history_bars = 1440, 3000
+    OKXDataFetcher(data_dir=str(tmp_path)).get_candles('BTC-USDT', '1H', days_to_fetch=100)
+    fetcher = OKXDataFetcher(data_dir=str(tmp_path), config={'MAX_DELTA_REQUESTS': 5})
+    stored = fetcher.candle_store.load('BTC-USDT', '1H')[:300].copy()
+    fetcher.candle_store.rewrite('BTC-USDT', '1H', stored)
+    fake_okx.requests.clear()
+
+    candles = fetcher.get_candles('BTC-USDT', '1H', days_to_fetch=10)
+    assert all('before' not in r for r in fake_okx.requests)
+    assert set((candles['timestamp'][1:] - candles['timestamp'][:-1]).tolist()) == {HOUR_MS}
+    assert candles['timestamp'][-1] == int(fake_okx.candles()[-1][0])
+    assert (fetcher.candle_store.load('BTC-USDT', '1H') == stored).all()
+
+def test_merging_across_a_gap_keeps_only_the_newer_candles(fetcher):
+    older = fetcher._parse_candles(FakeOKX(history_bars=50).candles())[0]
+    newer = older[30:].copy()
+    newer['timestamp'] += 100 * HOUR_MS
+    assert (fetcher._merge_candles(older[:20], newer, '1H') == newer).all()
+    assert len(fetcher._merge_candles(older[:40], older[30:], '1H')) == len(older)
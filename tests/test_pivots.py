@@ -0,0 +1,45 @@
+import pytest
+import sys
+import os
+import numpy as np
+import pandas as pd
+from scipy.signal import find_peaks
+
+# Add project root to path to allow imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from analysis.pivots import PivotIndex, get_pivot_index, find_series_peaks
+from analysis.patterns.utils import get_price_pivots
+
+@pytest.mark.parametrize('seed', range(20))
+def test_index_matches_find_peaks_for_any_window_and_threshold(seed):
+    rng = np.random.default_rng(seed)
+    values = np.cumsum(rng.normal(size=300))
+    if seed % 2:
+        values = np.round(values * 2) / 2  # plateaus
+    if seed % 3 == 0:
+        values[:12] = np.nan  # indicator warm-up
+    index = PivotIndex(values)
+    for window in (20, 90, 150, 299, 300, 500):
+        for prominence in (0.0, 0.5, 1.5, 4.0):
+            for distance in (1, 3, 5, 10):
+                expected, _ = find_peaks(values[-window:], prominence=prominence, distance=distance)
+                np.testing.assert_array_equal(index.find(prominence, distance, window), expected)
+
+def test_index_is_shared_by_content():
+    rng = np.random.default_rng(1)
+    high = pd.Series(100 + np.cumsum(rng.normal(size=200)))
+    first = get_pivot_index(high)
+    assert get_pivot_index(high.copy()) is first
+    assert get_pivot_index(-high) is not first
+
+    changed = high.copy()
+    changed.iloc[-1] += 1
+    assert get_pivot_index(changed) is not first
+
+def test_windowed_price_pivots_match_the_sliced_frame():
+    rng = np.random.default_rng(2)
+    close = 100 + np.cumsum(rng.normal(size=400))
+    df = pd.DataFrame({'High': close + rng.uniform(0, 1, 400), 'Low': close - rng.uniform(0, 1, 400)})
+    assert get_price_pivots(df, window=90) == get_price_pivots(df.tail(90))
+    assert list(find_series_peaks(df['High'], prominence=1.0, distance=5, window=120)) == \
+        list(find_peaks(df['High'].tail(120), prominence=1.0, distance=5)[0])
@@ -0,0 +1,141 @@
+import pytest
+import sys
+import os
+import threading
+import numpy as np
+import pandas as pd
+
+# Add project root to path to allow imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+run_bot = pytest.importorskip('run_bot')
+from bounded_cache import BoundedCache
+from config import get_config as get_default_config
+
+MINUTE_MS = 60 * 1000
+BAR_MS = {'15m': 15 * MINUTE_MS, '1H': 60 * MINUTE_MS}
+START_MS = 1_700_000_000_000 // BAR_MS['1H'] * BAR_MS['1H']
+
+class FakeFetcher:
+    """Serves synthetic candles on a settable clock and counts the candle fetches."""
+    def __init__(self):
+        self.now_ms = START_MS + MINUTE_MS
+        self.fetches = 0
+        # How far the clock moves while one window is fetched and analysed
+        self.fetch_delay_ms = 0
+        self.lock = threading.Lock()
+
+    def clock(self):
+        return self.now_ms / 1000
+
+    def bar_bounds(self, timeframe, now_ms=None):
+        bar_ms = BAR_MS[timeframe]
+        bar_open = (self.now_ms if now_ms is None else now_ms) // bar_ms * bar_ms
+        return bar_open, bar_open + bar_ms
+
+    def fetch_many(self, jobs):
+        pass
+
+    def get_cached_price(self, symbol):
+        return None
+
+    def fetch_historical_frame(self, symbol, timeframe, days_to_fetch):
+        with self.lock:
+            self.fetches += 1
+            self.now_ms += self.fetch_delay_ms
+        rng = np.random.default_rng(7)
+        close = 100 + np.cumsum(rng.normal(size=300))
+        index = pd.date_range(end=pd.Timestamp(self.now_ms, unit='ms'), periods=300, freq='min')
+        return pd.DataFrame({'open': close, 'high': close + 1, 'low': close - 1, 'close': close,
+                             'volume': rng.uniform(1, 5, 300)}, index=index)
+
+@pytest.fixture
+def fetcher(monkeypatch):
+    fake = FakeFetcher()
+    # The cache is switched to the fetcher's clock on use
+    monkeypatch.setattr(run_bot, '_analysis_cache', BoundedCache(max_entries=16))
+    monkeypatch.setattr(run_bot, '_coalesced_analyses', 0)
+    return fake
+
+TIMEFRAMES = ['15m', '1h']
+
+def get_config():
+    # The fused engine needs no pandas_ta
+    config = get_default_config()
+    return {**config, 'analysis': {**config['analysis'], 'INDICATOR_ENGINE': 'fused'}}
+
+def test_repeated_requests_are_served_until_the_fastest_close(fetcher):
+    config = get_config()
+    report = run_bot.get_ranked_analysis_for_symbol('BTC/USDT', config, fetcher, TIMEFRAMES, 'long')
+    assert fetcher.fetches == 2
+    assert run_bot.get_ranked_analysis_for_symbol('BTC/USDT', config, fetcher, TIMEFRAMES, 'long') == report
+    # Another report type is formatted from the same ranked results
+    assert 'short' in run_bot.get_ranked_analysis_for_symbol('BTC/USDT', config, fetcher, TIMEFRAMES, 'short')
+    assert len(run_bot.get_ranked_results_for_symbol('BTC/USDT', config, fetcher, TIMEFRAMES)) == 2
+    assert fetcher.fetches == 2
+
+    # The 15m candle closes: the entry expires
+    fetcher.now_ms = START_MS + BAR_MS['15m']
+    run_bot.get_ranked_analysis_for_symbol('BTC/USDT', config, fetcher, TIMEFRAMES, 'long')
+    assert fetcher.fetches == 4
+    stats = run_bot.get_analysis_cache_stats()
+    assert (stats['hits'], stats['misses'], stats['expirations']) == (3, 2, 1)
+    assert stats['hit_rate'] == pytest.approx(0.6)
+
+def test_a_slow_analysis_still_expires_at_the_close(fetcher):
+    config = get_config()
+    fetcher.fetch_delay_ms = 5 * MINUTE_MS
+    run_bot.get_ranked_analysis_for_symbol('BTC/USDT', config, fetcher, TIMEFRAMES, 'long')
+    assert fetcher.fetches == 2 and fetcher.now_ms == START_MS + 11 * MINUTE_MS
+    fetcher.fetch_delay_ms = 0
+
+    fetcher.now_ms = START_MS + BAR_MS['15m'] - 1
+    run_bot.get_ranked_analysis_for_symbol('BTC/USDT', config, fetcher, TIMEFRAMES, 'long')
+    assert fetcher.fetches == 2
+    # Not 14 minutes after the analysis finished, but when the 15m candle closes
+    fetcher.now_ms = START_MS + BAR_MS['15m']
+    run_bot.get_ranked_analysis_for_symbol('BTC/USDT', config, fetcher, TIMEFRAMES, 'long')
+    assert fetcher.fetches == 4
+
+def test_an_analysis_that_outlasts_the_close_is_not_cached(fetcher):
+    config = get_config()
+    fetcher.fetch_delay_ms = 8 * MINUTE_MS
+    run_bot.get_ranked_analysis_for_symbol('BTC/USDT', config, fetcher, TIMEFRAMES, 'long')
+    assert fetcher.now_ms > START_MS + BAR_MS['15m']
+    run_bot.get_ranked_analysis_for_symbol('BTC/USDT', config, fetcher, TIMEFRAMES, 'long')
+    assert fetcher.fetches == 4
+
+def test_config_and_timeframes_are_part_of_the_key(fetcher):
+    config = get_config()
+    run_bot.get_ranked_analysis_for_symbol('BTC/USDT', config, fetcher, TIMEFRAMES)
+    run_bot.get_ranked_analysis_for_symbol('BTC/USDT', config, fetcher, ['15m'])
+    changed = {**config, 'analysis': {**config['analysis'], 'SR_LOOKBACK': 50}}
+    run_bot.get_ranked_analysis_for_symbol('BTC/USDT', changed, fetcher, TIMEFRAMES)
+    assert fetcher.fetches == 5
+
+def test_concurrent_requests_share_one_analysis(fetcher):
+    config = get_config()
+    reports = []
+    threads = [threading.Thread(target=lambda: reports.append(
+        run_bot.get_ranked_analysis_for_symbol('BTC/USDT', config, fetcher, TIMEFRAMES, 'long'))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(set(reports)) == 1
+    assert fetcher.fetches == 2
+
+def test_streaming_sends_each_timeframe_then_the_summary(fetcher):
+    config = get_config()
+    parts = []
+    report = run_bot.stream_ranked_analysis_for_symbol('BTC/USDT', config, fetcher, parts.append, TIMEFRAMES, 'long')
+    assert len(parts) == 3
+    assert parts[0].startswith('💎') and 'الأولوية' in parts[0]
+    assert 'إخلاء المسؤولية' in parts[-1]
+    assert report == run_bot.get_ranked_analysis_for_symbol('BTC/USDT', config, fetcher, TIMEFRAMES, 'long')
+
+    # A cached analysis is streamed in the report's timeframe order
+    cached_parts = []
+    run_bot.stream_ranked_analysis_for_symbol('BTC/USDT', config, fetcher, cached_parts.append, TIMEFRAMES, 'long')
+    assert len(cached_parts) == 3
+    assert ''.join(cached_parts[1:]) in report
+    assert fetcher.fetches == 2
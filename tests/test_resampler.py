@@ -0,0 +1,71 @@
+import sys
+import os
+import numpy as np
+
+# Add project root to path to allow imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from candle_store import CANDLE_DTYPE
+from resampler import can_resample, resample_candles, last_complete_open
+
+MINUTE_MS = 60_000
+HOUR_MS = 60 * MINUTE_MS
+DAY_MS = 24 * HOUR_MS
+HK_OFFSET_MS = 8 * HOUR_MS
+
+def make_candles(start_ts: int, count: int, step_ms: int) -> np.ndarray:
+    """Builds an ascending candle array with distinct prices for tests."""
+    candles = np.zeros(count, dtype=CANDLE_DTYPE)
+    candles['timestamp'] = start_ts + np.arange(count) * step_ms
+    candles['open'] = np.arange(count) + 100.0
+    candles['high'] = candles['open'] + 1 + (np.arange(count) % 3)
+    candles['low'] = candles['open'] - 1
+    candles['close'] = candles['open'] + 0.5
+    candles['volume'] = np.arange(count) + 1.0
+    return candles
+
+def test_can_resample_requires_aligned_multiples():
+    assert can_resample(3 * MINUTE_MS, 0, 15 * MINUTE_MS, 0)
+    assert not can_resample(3 * MINUTE_MS, 0, 5 * MINUTE_MS, 0)
+    assert not can_resample(HOUR_MS, 0, HOUR_MS, 0)
+    assert can_resample(HOUR_MS, 0, DAY_MS, HK_OFFSET_MS)
+    assert not can_resample(5 * HOUR_MS, 0, DAY_MS, HK_OFFSET_MS)
+
+def test_resample_aggregates_ohlcv():
+    """
+    Tests that each target bar takes the first open, max high, min low, last close
+    and summed volume of its source bars.
+    """
+    candles = make_candles(0, 12, 5 * MINUTE_MS)
+    hourly = resample_candles(candles, 5 * MINUTE_MS, HOUR_MS)
+
+    assert len(hourly) == 1
+    assert hourly['open'][0] == candles['open'][0]
+    assert hourly['high'][0] == candles['high'].max()
+    assert hourly['low'][0] == candles['low'].min()
+    assert hourly['close'][0] == candles['close'][-1]
+    assert hourly['volume'][0] == candles['volume'].sum()
+
+def test_incomplete_leading_bucket_is_dropped():
+    candles = make_candles(30 * MINUTE_MS, 18, 5 * MINUTE_MS)
+    hourly = resample_candles(candles, 5 * MINUTE_MS, HOUR_MS)
+
+    assert list(hourly['timestamp']) == [HOUR_MS]
+    assert hourly['volume'][0] == candles['volume'][6:].sum()
+
+def test_daily_bars_follow_the_hong_kong_boundary():
+    """
+    Tests that 1D bars built from 1H bars open at 16:00 UTC like OKX's daily candles.
+    """
+    candles = make_candles(DAY_MS - HK_OFFSET_MS, 48, HOUR_MS)
+    daily = resample_candles(candles, HOUR_MS, DAY_MS, HK_OFFSET_MS)
+
+    assert list(daily['timestamp']) == [DAY_MS - HK_OFFSET_MS, 2 * DAY_MS - HK_OFFSET_MS]
+
+def test_last_complete_open_ignores_unconfirmed_source_bars():
+    candles = make_candles(0, 20, 15 * MINUTE_MS)
+    hourly = resample_candles(candles, 15 * MINUTE_MS, HOUR_MS)
+
+    # The last two 15m bars of the 5th hour are not confirmed yet.
+    confirmed_until = int(candles['timestamp'][-3])
+    assert last_complete_open(hourly, HOUR_MS, confirmed_until, 15 * MINUTE_MS) == 3 * HOUR_MS
+    assert last_complete_open(hourly, HOUR_MS, -1, 15 * MINUTE_MS) == -1
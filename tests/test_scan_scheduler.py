@@ -0,0 +1,100 @@
+import pytest
+import sys
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Add project root to path to allow imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from scan_scheduler import ScanScheduler
+
+JOBS = [('BTC', ['1h', '4h']), ('ETH', ['1h', '4h']), ('SOL', ['1h']), ('XRP', ['1h', '4h'])]
+
+class FakeScan:
+    """Records the stages; analyses of `slow` symbols take longer than the others."""
+    def __init__(self, slow=(), unsupported=()):
+        self.slow = set(slow)
+        self.unsupported = set(unsupported)
+        self.pool = ThreadPoolExecutor(max_workers=4)
+        self.lock = threading.Lock()
+        self.events = []
+        self.reports = []
+
+    def log(self, *event):
+        with self.lock:
+            self.events.append(event)
+
+    def prepare(self, batch):
+        self.log('prepare', tuple(symbol for symbol, _ in batch))
+        ready, items = {}, {}
+        for symbol, timeframes in batch:
+            for tf in timeframes:
+                if (symbol, tf) in self.unsupported:
+                    ready[(symbol, tf)] = {'success': False, 'timeframe': tf}
+                else:
+                    items[(symbol, tf)] = f'{symbol}-{tf}'
+        return ready, items
+
+    def analyse(self, symbol, tf, item):
+        def run():
+            time.sleep(0.05 if symbol in self.slow else 0.001)
+            if item == 'XRP-4h':
+                raise RuntimeError('boom')
+            self.log('analysed', symbol, tf)
+            return {'success': True, 'timeframe': tf, 'item': item}
+        return self.pool.submit(run)
+
+    def report(self, symbol, results):
+        self.log('report', symbol)
+        self.reports.append((symbol, results))
+
+    def scheduler(self, **kwargs):
+        return ScanScheduler(self.prepare, self.analyse, self.report,
+                             on_error=lambda symbol, tf, e: {'success': False, 'timeframe': tf, 'error': str(e)}, **kwargs)
+
+def test_reports_follow_the_watchlist_order():
+    scan = FakeScan(slow={'BTC'}, unsupported={('ETH', '4h')})
+    scan.scheduler(batch_size=1, max_pending=4).run(JOBS)
+    assert [symbol for symbol, _ in scan.reports] == ['BTC', 'ETH', 'SOL', 'XRP']
+    results = dict(scan.reports)
+    assert [r['timeframe'] for r in results['BTC']] == ['1h', '4h']
+    assert results['ETH'][1] == {'success': False, 'timeframe': '4h'}
+    assert results['XRP'][1] == {'success': False, 'timeframe': '4h', 'error': 'boom'}
+
+def test_completed_order_reports_fast_symbols_first():
+    scan = FakeScan(slow={'BTC'})
+    scan.scheduler(batch_size=1, max_pending=4, order='completed').run(JOBS)
+    reported = [symbol for symbol, _ in scan.reports]
+    assert sorted(reported) == ['BTC', 'ETH', 'SOL', 'XRP']
+    assert reported[-1] == 'BTC'
+
+def test_fetching_stays_a_bounded_number_of_batches_ahead():
+    scan = FakeScan(slow={'BTC', 'ETH', 'SOL', 'XRP'})
+    scan.scheduler(batch_size=2, max_pending=1).run(JOBS)
+    prepares = [i for i, event in enumerate(scan.events) if event[0] == 'prepare']
+    assert [scan.events[i][1] for i in prepares] == [('BTC', 'ETH'), ('SOL', 'XRP')]
+    # With one pending batch, the second is only fetched once the first is fully analysed
+    first_batch_done = max(i for i, event in enumerate(scan.events) if event[0] == 'analysed' and event[1] in ('BTC', 'ETH'))
+    assert prepares[1] > first_batch_done
+
+def test_a_failed_fetch_is_reported_for_every_timeframe():
+    scan = FakeScan()
+    def prepare(batch):
+        raise ConnectionError('offline')
+    scan.prepare = prepare
+    scan.scheduler().run(JOBS[:1])
+    assert scan.reports == [('BTC', [{'success': False, 'timeframe': '1h', 'error': 'offline'},
+                                     {'success': False, 'timeframe': '4h', 'error': 'offline'}])]
+
+@pytest.mark.parametrize('order', ['watchlist', 'completed'])
+def test_a_repeated_symbol_is_scanned_once_with_all_its_timeframes(order):
+    scan = FakeScan()
+    scan.scheduler(batch_size=1, order=order).run([('BTC', ['1h']), ('ETH', ['1h']), ('BTC', ['4h', '1h'])])
+    assert sorted(symbol for symbol, _ in scan.reports) == ['BTC', 'ETH']
+    assert [r['timeframe'] for r in dict(scan.reports)['BTC']] == ['1h', '4h']
+    assert sorted(event[1:] for event in scan.events if event[0] == 'analysed') == [('BTC', '1h'), ('BTC', '4h'), ('ETH', '1h')]
+
+def test_unknown_order_is_rejected():
+    with pytest.raises(ValueError):
+        FakeScan().scheduler(order='random')
@@ -0,0 +1,96 @@
+import pytest
+import sys
+import os
+import pandas as pd
+import numpy as np
+
+# Add project root to path to allow imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from indicators import StreamingIndicators, IndicatorStateBook
+from indicators.fused import compute_indicators
+
+@pytest.fixture
+def price_dataframe():
+    """Create a random-walk OHLCV dataframe at BTC-like prices, indexed by candle time."""
+    rng = np.random.default_rng(3)
+    close = 30000 + np.cumsum(rng.normal(scale=50, size=600))
+    df = pd.DataFrame({
+        'High': close + rng.uniform(0, 30, size=600),
+        'Low': close - rng.uniform(0, 30, size=600),
+        'Close': close,
+        'Volume': rng.uniform(1, 5, size=600)
+    }, index=pd.date_range('2025-01-01', periods=600, freq='5min'))
+    return df
+
+def bars(df):
+    return df[['High', 'Low', 'Close', 'Volume']].itertuples(index=False, name=None)
+
+def test_streaming_updates_match_the_fused_engine(price_dataframe):
+    """
+    Tests that feeding candles one by one gives the same latest values as a full recompute.
+    """
+    reference = compute_indicators(*(price_dataframe[c].to_numpy() for c in ('High', 'Low', 'Close', 'Volume')))
+    state = StreamingIndicators()
+    for bar in bars(price_dataframe):
+        latest = state.update(bar)
+
+    for column, values in reference.items():
+        assert latest[column] == pytest.approx(values[-1], rel=1e-9), column
+
+def test_preview_does_not_change_the_state(price_dataframe):
+    state = StreamingIndicators()
+    for bar in bars(price_dataframe.iloc[:-1]):
+        state.update(bar)
+    live_bar = next(bars(price_dataframe.iloc[-1:]))
+
+    preview = state.preview(live_bar)
+    assert state.preview(live_bar) == preview
+    assert state.update(live_bar) == preview
+
+def test_state_book_feeds_only_new_candles_and_checkpoints(price_dataframe, tmp_path):
+    book = IndicatorStateBook(checkpoint_dir=str(tmp_path))
+    book.sync('BTC/USDT', '5m', price_dataframe.iloc[:500])
+    latest = book.sync('BTC/USDT', '5m', price_dataframe)
+    assert book._states[('BTC/USDT', '5m')][0].bars == 600
+
+    book.save('BTC/USDT', '5m')
+    restored = IndicatorStateBook(checkpoint_dir=str(tmp_path))
+    assert restored.sync('BTC/USDT', '5m', price_dataframe) == latest
+
+    # A live bar that was already consumed as closed is not counted twice.
+    assert restored.sync('BTC/USDT', '5m', price_dataframe, last_closed=False) == latest
+    assert restored._states[('BTC/USDT', '5m')][0].bars == 600
+
+    fresh = IndicatorStateBook()
+    assert fresh.sync('BTC/USDT', '5m', price_dataframe, last_closed=False) == latest
+    assert fresh._states[('BTC/USDT', '5m')][0].bars == 599
+
+def test_state_book_frame_extends_the_previous_scan(price_dataframe):
+    book = IndicatorStateBook()
+    first = book.frame('BTC/USDT', '5m', price_dataframe.iloc[:500])
+    reference = compute_indicators(*(price_dataframe.iloc[:500][c].to_numpy() for c in ('High', 'Low', 'Close', 'Volume')))
+    for column, values in reference.items():
+        np.testing.assert_allclose(first[column].to_numpy(), values, rtol=1e-9, err_msg=column)
+
+    # The window moves on by ten candles: only those are fed, earlier rows are kept as they were
+    moved = book.frame('BTC/USDT', '5m', price_dataframe.iloc[10:510])
+    assert book._frames[('BTC/USDT', '5m')][0].bars == 510
+    assert moved.index.equals(price_dataframe.index[10:510])
+    pd.testing.assert_frame_equal(moved.loc[first.index[10:]], first.iloc[10:])
+    full = compute_indicators(*(price_dataframe.iloc[:510][c].to_numpy() for c in ('High', 'Low', 'Close', 'Volume')))
+    for column, values in full.items():
+        assert moved[column].iloc[-1] == pytest.approx(values[-1], rel=1e-9), column
+
+def test_state_book_frame_previews_the_live_bar_and_restarts_on_corrections(price_dataframe):
+    book = IndicatorStateBook()
+    book.frame('BTC/USDT', '5m', price_dataframe.iloc[:500])
+    live = book.frame('BTC/USDT', '5m', price_dataframe.iloc[:501], last_closed=False)
+    state = book._frames[('BTC/USDT', '5m')][0]
+    assert state.bars == 500
+    assert live['RSI_14'].iloc[-1] == state.preview(next(bars(price_dataframe.iloc[500:501])))['RSI_14']
+
+    corrected = price_dataframe.iloc[:500].copy()
+    corrected.iloc[450, corrected.columns.get_loc('Close')] += 1
+    book.frame('BTC/USDT', '5m', corrected)
+    assert book._frames[('BTC/USDT', '5m')][0].bars == 500
+    assert book._frames[('BTC/USDT', '5m')][0] is not state
@@ -0,0 +1,58 @@
+import pytest
+import sys
+import os
+import asyncio
+import threading
+from concurrent.futures import Future
+
+# Add project root to path to allow imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+telegram_bot = pytest.importorskip('telegram_bot')
+
+class FakeMessage:
+    """Records edits and replies; texts over Telegram's limit or containing 'bad' are rejected."""
+    def __init__(self):
+        self.sent = []
+
+    async def _send(self, kind, text):
+        if len(text) > 4096 or 'bad' in text:
+            raise RuntimeError('Bad Request: message is too long or malformed')
+        self.sent.append((kind, text))
+
+    async def edit_text(self, text, parse_mode=None, **kwargs):
+        await self._send('edit', text)
+
+    async def reply_text(self, text, parse_mode=None, **kwargs):
+        await self._send('reply', text)
+
+@pytest.fixture
+def loop():
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    yield loop
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+
+def test_long_parts_are_split(loop):
+    message = FakeMessage()
+    stream = telegram_bot.TelegramReportStream(message, loop)
+    stream.send('<b>line</b>\n' * 1000)
+    assert stream.started and not stream.failed
+    assert [kind for kind, _ in message.sent] == ['edit', 'reply', 'reply']
+
+def test_a_failed_first_part_ends_in_an_error_reply(loop, monkeypatch):
+    monkeypatch.setattr(telegram_bot, 'get_start_message_text', lambda: 'menu')
+    monkeypatch.setattr(telegram_bot, 'get_main_keyboard', lambda: None)
+    message = FakeMessage()
+    stream = telegram_bot.TelegramReportStream(message, loop)
+    stream.send('bad <b>report')
+    stream.send('later part')
+    assert not stream.started and stream.failed and message.sent == []
+
+    future = Future()
+    future.set_result('bad <b>report')
+    asyncio.run_coroutine_threadsafe(
+        telegram_bot.deliver_analysis_report(message, 'BTC/USDT', future, stream), loop).result(timeout=5)
+    assert len(message.sent) == 1
+    assert message.sent[0][0] == 'edit' and 'BTC/USDT' in message.sent[0][1]
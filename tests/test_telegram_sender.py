@@ -0,0 +1,149 @@
+import pytest
+import sys
+import os
+import re
+import requests
+
+# Add project root to path to allow imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from telegram_sender import (TelegramClient, TelegramRateLimiter, TelegramSendQueue, message_parts,
+                             split_html_message)
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+        self.sleeps = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+class FakeResponse:
+    def __init__(self, status_code: int, body: dict):
+        self.status_code = status_code
+        self._body = body
+
+    def json(self) -> dict:
+        return self._body
+
+class FakeSession:
+    """Replays the given responses (or raises the given exceptions) and records every post."""
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.posts = []
+
+    def post(self, url, json=None, timeout=None):
+        self.posts.append((url, json))
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    def close(self):
+        pass
+
+OK = FakeResponse(200, {'ok': True})
+
+def make_client(*responses):
+    clock = FakeClock()
+    limiter = TelegramRateLimiter(clock=clock, sleep=clock.sleep)
+    client = TelegramClient('TOKEN', limiter=limiter, session=FakeSession(*responses), sleep=clock.sleep)
+    return client, clock
+
+def _balanced(part: str) -> bool:
+    stack = []
+    for closing, name in re.findall(r'<(/?)([a-z]+)[^>]*>', part):
+        if not closing:
+            stack.append(name)
+        elif not stack or stack.pop() != name:
+            return False
+    return not stack
+
+def test_short_message_is_not_split():
+    assert split_html_message('<b>hi</b>\n', 100) == ['<b>hi</b>\n']
+
+def test_split_keeps_tags_whole_and_balanced():
+    report = ''.join(f'<b>Line {i}</b> &amp; <a href="https://example.com/{i}">link</a>\n' for i in range(50))
+    parts = split_html_message(report, 300)
+    assert len(parts) > 1
+    assert all(len(part) <= 300 and _balanced(part) for part in parts)
+    assert ''.join(parts) == report
+
+def test_split_reopens_tags_spanning_parts():
+    report = '<pre>' + ''.join(f'row {i}\n' for i in range(100)) + '</pre>'
+    parts = split_html_message(report, 200)
+    assert len(parts) > 1
+    assert all(part.startswith('<pre>') and part.endswith('</pre>') and _balanced(part) for part in parts)
+    assert ''.join(part[len('<pre>'):-len('</pre>')] for part in parts) == report[len('<pre>'):-len('</pre>')]
+
+def test_split_cuts_long_lines_outside_entities():
+    report = '<i>' + 'word &amp; ' * 200 + '</i>'
+    parts = split_html_message(report, 250)
+    assert all(len(part) <= 250 and _balanced(part) for part in parts)
+    assert all(not re.search(r'&[a-z]*$', part.replace('</i>', '')) for part in parts)
+
+def test_split_counts_emoji_as_two_characters():
+    parts = split_html_message('📈\n' * 100, 100)
+    assert all(len(part.encode('utf-16-le')) // 2 <= 100 for part in parts)
+
+def test_long_messages_get_part_headers():
+    parts = message_parts('line\n' * 2000)
+    assert len(parts) == 3
+    assert all(f'(جزء {i}/3)' in part and len(part) <= 4096 for i, part in enumerate(parts, 1))
+
+def test_rate_limiter_spaces_chats_and_global_sends():
+    clock = FakeClock()
+    limiter = TelegramRateLimiter(per_chat_interval=1.0, group_interval=3.0, messages_per_second=10, clock=clock)
+    assert limiter.reserve('1') == 0
+    assert limiter.reserve('1') == pytest.approx(1.0)
+    assert limiter.reserve('2') == pytest.approx(0.1)
+    assert limiter.reserve('-100') == pytest.approx(0.2)
+    assert limiter.reserve('-100') == pytest.approx(3.2)
+
+def test_client_posts_json_over_one_session():
+    client, clock = make_client(OK, OK)
+    assert client.send_message('42', '<b>a</b>')
+    assert client.send_message('42', '<b>b</b>')
+    url, payload = client.session.posts[0]
+    assert url == 'https://api.telegram.org/botTOKEN/sendMessage'
+    assert payload['chat_id'] == '42' and payload['text'] == '<b>a</b>' and payload['parse_mode'] == 'HTML'
+    # The second message waited for the chat's one-second slot
+    assert clock.sleeps == [pytest.approx(1.0)]
+
+def test_client_honours_retry_after():
+    client, clock = make_client(FakeResponse(429, {'ok': False, 'parameters': {'retry_after': 7}}), OK)
+    assert client.send_message('42', 'text')
+    assert clock.sleeps == [pytest.approx(7)]
+    assert client.get_stats() == {'sent': 1, 'failed': 0, 'rate_limited': 1, 'retried': 1}
+
+def test_client_retries_server_and_network_errors_but_not_bad_requests():
+    client, _ = make_client(FakeResponse(502, {}), requests.exceptions.ConnectionError('reset'), OK)
+    assert client.send_message('42', 'text')
+    assert len(client.session.posts) == 3
+
+    client, _ = make_client(FakeResponse(400, {'ok': False, 'description': "can't parse entities"}))
+    assert not client.send_message('42', '<b>broken')
+    assert client.get_stats()['failed'] == 1
+
+class RecordingClient:
+    def __init__(self):
+        self.sent = []
+
+    def send_message(self, chat_id, text):
+        self.sent.append((chat_id, text))
+        return True
+
+def test_send_queue_keeps_order_and_parts_together():
+    client = RecordingClient()
+    sender = TelegramSendQueue(client, chat_id='42')
+    sender.send('a')
+    sender.send('line\n' * 2000)
+    sender.send('c', chat_id='7')
+    sender.close()
+    texts = [text for _, text in client.sent]
+    assert texts[0] == 'a' and texts[-1] == 'c'
+    assert [('جزء' in text) for text in texts[1:-1]] == [True] * 3
+    assert [chat_id for chat_id, _ in client.sent] == ['42'] * 4 + ['7']
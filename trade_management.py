@@ -1,19 +1,21 @@
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Tuple, Any, Optional
+from typing import Dict, List, Tuple, Any, Optional, Union
 import warnings
 
+from market_data import MarketData, as_frame
+
 warnings.filterwarnings('ignore')
 
 class TradeManagement:
     """وحدة إدارة الصفقات الشاملة"""
 
-    def __init__(self, df: pd.DataFrame, account_balance: float = 10000,
+    def __init__(self, df: Union[pd.DataFrame, MarketData], account_balance: float = 10000,
                  max_risk_per_trade: float = 0.02):
-        self.df = df.copy()
+        self.df = as_frame(df)
         self.account_balance = account_balance
         self.max_risk_per_trade = max_risk_per_trade
-        self.current_price = df['close'].iloc[-1]
+        self.current_price = self.df['close'].iloc[-1]
 
     def calculate_position_size(self, entry_price: float, stop_loss: float) -> Dict[str, Any]:
         """حساب حجم المركز بناءً على إدارة المخاطر"""